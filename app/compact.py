@@ -0,0 +1,170 @@
+import logging
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# Coordinates are stored as integers in units of 10^-COORDINATE_DECIMALS degrees (fits int32 for +-180 degrees)
+COORDINATE_DECIMALS = 7
+
+
+def compact_dataframe(
+    dataframe: pd.DataFrame,
+    coordinate_columns: list[str],
+    max_category_ratio: float = 0.5,
+) -> pd.DataFrame:
+    """
+    Convert a dataframe to a compact in-memory representation.
+
+    - Text columns with repeated values are converted to categoricals (this includes YES/NO columns, which
+      are kept as text categories so the values seen through the API are unchanged).
+    - Integer columns are downcast to the smallest integer type that fits the values.
+    - Coordinate columns are scaled to int32, if this can be done without loss of precision.
+
+    The original dtypes are kept in the attributes of the dataframe, so it can be restored with
+    'restore_dataframe'.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Dataframe to convert (is not changed).
+    coordinate_columns: list[str]
+        Names of the columns containing coordinates in degrees.
+    max_category_ratio: float
+        Text columns are converted to categoricals if the ratio of unique values to rows is below this.
+
+    Returns
+    -------
+    pd.DataFrame
+        The compact dataframe.
+    """
+    compact = {}
+    scaled_columns = []
+    for column in dataframe:
+        series = dataframe[column]
+
+        if column in coordinate_columns and pd.api.types.is_float_dtype(series):
+            scale = 10**COORDINATE_DECIMALS
+            scaled = np.round(series.to_numpy() * scale)
+            if (
+                not series.isna().any()
+                and np.abs(scaled).max(initial=0) <= np.iinfo(np.int32).max
+                and np.array_equal(scaled / scale, series.to_numpy())
+            ):
+                compact[column] = pd.Series(
+                    scaled.astype(np.int32), index=series.index, name=column
+                )
+                scaled_columns.append(column)
+            else:
+                log.debug(
+                    'Column "%s" can not be scaled without loss, keeping it as %s.',
+                    column,
+                    series.dtype,
+                )
+                compact[column] = series
+
+        elif pd.api.types.is_integer_dtype(series):
+            compact[column] = pd.to_numeric(series, downcast="integer")
+
+        elif pd.api.types.is_string_dtype(
+            series
+        ) and series.nunique() <= max_category_ratio * len(series):
+            compact[column] = series.astype("category")
+
+        else:
+            compact[column] = series
+
+    compact_frame = pd.DataFrame(compact, index=dataframe.index)
+    compact_frame.attrs["original_dtypes"] = dict(dataframe.dtypes)
+    compact_frame.attrs["scaled_columns"] = scaled_columns
+
+    return compact_frame
+
+
+def restore_dataframe(
+    dataframe: pd.DataFrame, keep_categories: bool = False
+) -> pd.DataFrame:
+    """
+    Restore a dataframe made by 'compact_dataframe' to its original dtypes.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        The compact dataframe (is not changed).
+    keep_categories: bool
+        If True, categorical columns are kept as categoricals (which does not change the values).
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with the original dtypes, or the dataframe itself if it is not compact.
+    """
+    original_dtypes = dataframe.attrs.get("original_dtypes")
+    if original_dtypes is None:
+        return dataframe
+
+    scaled_columns = dataframe.attrs["scaled_columns"]
+    restored = {}
+    for column in dataframe:
+        series = dataframe[column]
+        if column in scaled_columns:
+            restored[column] = (
+                series.astype(np.float64) / 10**COORDINATE_DECIMALS
+            ).astype(original_dtypes[column])
+        elif keep_categories and isinstance(series.dtype, pd.CategoricalDtype):
+            restored[column] = series
+        else:
+            restored[column] = series.astype(original_dtypes[column])
+
+    return pd.DataFrame(restored, index=dataframe.index)
+
+
+def memory_report(dataframe: pd.DataFrame) -> str:
+    """
+    Create a report of the memory used by each column of a dataframe.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Dataframe to report on.
+
+    Returns
+    -------
+    str
+        Table with dtype and memory usage (in bytes and percentage of total) for each column.
+    """
+    usage = dataframe.memory_usage(deep=True)
+    total = usage.sum()
+    report = pd.DataFrame(
+        {
+            "dtype": [
+                str(dataframe[column].dtype) if column in dataframe else ""
+                for column in usage.index
+            ],
+            "bytes": usage,
+            "percent": (100 * usage / total).round(1) if total else 0,
+        }
+    )
+    return f"{report.to_string()}\nTotal: {total} bytes ({len(dataframe)} rows)"
+
+
+def coordinate_values(dataframe: pd.DataFrame, column: str) -> np.ndarray:
+    """
+    Get the values of a coordinate column in degrees, also if the dataframe is compact.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Dataframe containing the coordinate column (compact or not).
+    column: str
+        Name of the coordinate column.
+
+    Returns
+    -------
+    np.ndarray
+        The coordinates in degrees (float64).
+    """
+    values = dataframe[column].to_numpy(dtype=np.float64)
+    if column in dataframe.attrs.get("scaled_columns", []):
+        values = values / 10**COORDINATE_DECIMALS
+    return values
@@ -0,0 +1,251 @@
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from .geometry import LineGeometry
+from .rest import RestServer, Request, Response, HTTPError, json_response
+
+log = logging.getLogger(__name__)
+
+# Names of the changes of a line
+ADDED = "added"
+REMOVED = "removed"
+GEOMETRY = "geometry"
+DLR_ENABLED = "dlr_enabled"
+
+
+def line_state(
+    table: pd.DataFrame,
+    geometry: LineGeometry,
+    mrid_column: str,
+    dlr_enabled_column: str,
+) -> pd.DataFrame:
+    """
+    Summarize each line by a hash of its geometry and its DLR enabled state, for finding changed lines.
+
+    The geometry hash combines the hash of each point (coordinates and position on the line), so it
+    changes if any point is moved, added, removed or reordered.
+
+    Parameters
+    ----------
+    table: pd.DataFrame
+        The enriched dataframe.
+    geometry: LineGeometry
+        Geometry of the lines in the table.
+    mrid_column: str
+        Name of the column with the MRID.
+    dlr_enabled_column: str
+        Name of the column with the DLR enabled state.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe indexed by MRID with the columns GEOMETRY_HASH and the DLR enabled column.
+    """
+    counts = np.diff(geometry.offsets)
+    point_hashes = pd.util.hash_pandas_object(
+        pd.DataFrame(
+            {
+                "longitude": geometry.longitude,
+                "latitude": geometry.latitude,
+                "position": np.arange(len(geometry.longitude))
+                - np.repeat(geometry.offsets[:-1], counts),
+            }
+        ),
+        index=False,
+    ).to_numpy()
+    # Sum (wrapping around) of the point hashes of each line
+    geometry_hashes = np.zeros(len(geometry.mrids), dtype=np.uint64)
+    has_points = counts > 0
+    geometry_hashes[has_points] = np.add.reduceat(
+        point_hashes, geometry.offsets[:-1][has_points]
+    )
+
+    dlr_enabled = table.groupby(mrid_column, observed=True, sort=False)[
+        dlr_enabled_column
+    ].first()
+    return pd.DataFrame(
+        {
+            "GEOMETRY_HASH": geometry_hashes,
+            dlr_enabled_column: dlr_enabled.reindex(geometry.mrids).to_numpy(),
+        },
+        index=pd.Index(geometry.mrids, name=mrid_column),
+    )
+
+
+def diff_line_states(
+    old: pd.DataFrame, new: pd.DataFrame, dlr_enabled_column: str
+) -> pd.DataFrame:
+    """
+    Find the lines that were added, removed or changed between two line states (from 'line_state').
+
+    Parameters
+    ----------
+    old: pd.DataFrame
+        The old line state.
+    new: pd.DataFrame
+        The new line state.
+    dlr_enabled_column: str
+        Name of the column with the DLR enabled state.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe indexed by MRID (sorted) with a row for each changed line, and the columns CHANGES (list
+        of 'added', 'removed', 'geometry' and 'dlr_enabled') and the new DLR enabled state.
+    """
+    joined = old.join(new, how="outer", lsuffix="_OLD", rsuffix="_NEW")
+    in_old = joined.index.isin(old.index)
+    in_new = joined.index.isin(new.index)
+    both = in_old & in_new
+    old_dlr = joined[f"{dlr_enabled_column}_OLD"]
+    new_dlr = joined[f"{dlr_enabled_column}_NEW"]
+
+    flags = {
+        ADDED: ~in_old,
+        REMOVED: ~in_new,
+        GEOMETRY: both
+        & (
+            joined["GEOMETRY_HASH_OLD"].to_numpy()
+            != joined["GEOMETRY_HASH_NEW"].to_numpy()
+        ),
+        DLR_ENABLED: both
+        & ~((old_dlr == new_dlr) | (old_dlr.isna() & new_dlr.isna())).to_numpy(),
+    }
+    changed = np.logical_or.reduce(list(flags.values()))
+    changes = [
+        [name for name, flag in flags.items() if flag[i]]
+        for i in np.flatnonzero(changed)
+    ]
+
+    index = joined.index[changed].rename(new.index.name or old.index.name)
+    return pd.DataFrame(
+        {
+            "CHANGES": changes,
+            dlr_enabled_column: new_dlr.to_numpy()[changed],
+        },
+        index=index,
+    ).sort_index()
+
+
+class ChangeLog:
+    """
+    Keeps the line states of the latest snapshot versions, so the changes since any of them can be found.
+
+    Version 0 is the state before the first snapshot (no lines) and is always kept, so the changes since
+    version 0 list all current lines as added.
+
+    Parameters
+    ----------
+    dlr_enabled_column: str
+        Name of the column with the DLR enabled state.
+    max_versions: int
+        Number of versions to keep the line states of.
+    """
+
+    def __init__(self, dlr_enabled_column: str, max_versions: int = 100):
+        self.dlr_enabled_column = dlr_enabled_column
+        self.max_versions = max_versions
+        self.states: OrderedDict[int, pd.DataFrame] = OrderedDict()
+        self._empty_state = pd.DataFrame(
+            {"GEOMETRY_HASH": pd.Series(dtype=np.uint64), dlr_enabled_column: []}
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """
+        The latest recorded version (0 if none is recorded yet).
+        """
+        return next(reversed(self.states), 0)
+
+    def _state(self, version: int) -> pd.DataFrame | None:
+        return self._empty_state if version == 0 else self.states.get(version)
+
+    def record(self, version: int, state: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add the line state of a new version, and log the changes since the previous version.
+
+        Returns
+        -------
+        pd.DataFrame
+            The changes since the previous version (see 'diff_line_states').
+        """
+        with self._lock:
+            previous = self._state(self.version)
+            self.states[version] = state
+            while len(self.states) > self.max_versions:
+                self.states.popitem(last=False)
+
+        changes = diff_line_states(previous, state, self.dlr_enabled_column)
+        counts = pd.Series(
+            [change for line_changes in changes["CHANGES"] for change in line_changes],
+            dtype=object,
+        ).value_counts()
+        log.info(
+            "Changes in snapshot version %d: %s",
+            version,
+            {
+                name: int(counts.get(name, 0))
+                for name in [ADDED, REMOVED, GEOMETRY, DLR_ENABLED]
+            },
+        )
+        return changes
+
+    def since(self, version: int) -> tuple[int, pd.DataFrame] | None:
+        """
+        Find the net changes of the lines since a version.
+
+        Returns
+        -------
+        tuple[int, pd.DataFrame] | None
+            The current version and the changes (see 'diff_line_states'), or None if the line state of the
+            version is not kept (the consumer must reload all data).
+        """
+        with self._lock:
+            current = self.version
+            old, new = self._state(version), self._state(current)
+        if old is None:
+            return None
+        return current, diff_line_states(old, new, self.dlr_enabled_column)
+
+
+def add_change_endpoints(server: RestServer, change_log: ChangeLog):
+    """
+    Add an endpoint with the changed lines since a snapshot version to the REST server.
+
+    - GET /changes?since=N - lines added, removed or changed (geometry or DLR enabled) since version N
+
+    Parameters
+    ----------
+    server: RestServer
+        Server to add the endpoint to.
+    change_log: ChangeLog
+        Change log recording the line state of each snapshot.
+    """
+
+    def changes(request: Request) -> Response:
+        since = request.parameter("since", int, 0)
+        result = change_log.since(since)
+        if result is None:
+            raise HTTPError(
+                410,
+                f"Changes since version {since} are not available, all data must be reloaded.",
+            )
+        version, line_changes = result
+        mrid_column = line_changes.index.name
+        return json_response(
+            {
+                "from_version": since,
+                "to_version": version,
+                "changes": [
+                    {mrid_column: mrid, **record}
+                    for mrid, record in zip(
+                        line_changes.index, line_changes.to_dict("records")
+                    )
+                ],
+            }
+        )
+
+    server.route("/changes", changes)
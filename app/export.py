@@ -0,0 +1,234 @@
+import logging
+import threading
+from collections import OrderedDict
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from .rest import RestServer, Request, Response, HTTPError
+from .snapshot import Snapshot, SnapshotStore
+
+log = logging.getLogger(__name__)
+
+# Content type and file extension of each export format
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def serialize_table(table: pa.Table, export_format: str) -> pa.Buffer:
+    """
+    Serialize an arrow table as an Arrow IPC stream or a Parquet file, into a single buffer.
+    """
+    sink = pa.BufferOutputStream()
+    if export_format == "arrow":
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    elif export_format == "parquet":
+        # Imported when needed, as parquet support is only used by exports
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, sink)
+    else:
+        raise ValueError("Unknown export format: '%s'.", export_format)
+    return sink.getvalue()
+
+
+class SnapshotExporter:
+    """
+    Exports tables of the current snapshot in binary formats, keeping the dtypes of the columns.
+
+    Each table is converted to an arrow table once per snapshot version (without copying the data where
+    the dtypes allow it), and serialized exports of whole tables (or a projection of their columns) are
+    cached, so later requests for the same export reuse the buffer. Exports filtered by MRID are small,
+    and serialized for each request.
+
+    Parameters
+    ----------
+    store: SnapshotStore
+        Store with the current snapshot.
+    mrid_column: str
+        Name of the column with the MRID (used for filtering).
+    max_cached: int
+        Max. number of serialized exports to cache.
+    """
+
+    def __init__(self, store: SnapshotStore, mrid_column: str, max_cached: int = 8):
+        self.store = store
+        self.mrid_column = mrid_column
+        self.max_cached = max_cached
+        self._version = None
+        self._tables: dict[str, pa.Table] = {}
+        self._exports: OrderedDict[tuple, pa.Buffer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _arrow_table(self, snapshot: Snapshot, table_name: str) -> pa.Table:
+        # Must be called with the lock, dropping the tables and exports of older versions
+        if self._version != snapshot.version:
+            self._version = snapshot.version
+            self._tables.clear()
+            self._exports.clear()
+        table = self._tables.get(table_name)
+        if table is None:
+            table = self._tables[table_name] = pa.Table.from_pandas(
+                snapshot.tables[table_name], preserve_index=False
+            )
+        return table
+
+    def export(
+        self,
+        table_name: str,
+        export_format: str,
+        columns: list[str] | None = None,
+        mrids: list[str] | None = None,
+    ) -> tuple[int, pa.Buffer]:
+        """
+        Export a table of the current snapshot.
+
+        Parameters
+        ----------
+        table_name: str
+            Name of the table.
+        export_format: str
+            'arrow' (Arrow IPC stream) or 'parquet'.
+        columns: list[str]
+            Columns to export (default is all columns).
+        mrids: list[str]
+            MRIDs of the rows to export (default is all rows).
+
+        Returns
+        -------
+        int
+            Version of the exported snapshot.
+        pa.Buffer
+            The serialized table.
+        """
+        snapshot = self.store.current
+        self._check_request(snapshot, table_name, export_format, columns, mrids)
+
+        key = (table_name, export_format, tuple(columns) if columns else None)
+        table, buffer = self._cached_export(snapshot, key, use_cache=mrids is None)
+        if buffer is not None:
+            return snapshot.version, buffer
+
+        buffer = serialize_table(self._select(table, columns, mrids), export_format)
+        if mrids is None:
+            self._store_export(snapshot, key, buffer)
+        return snapshot.version, buffer
+
+    def _check_request(
+        self,
+        snapshot: Snapshot | None,
+        table_name: str,
+        export_format: str,
+        columns: list[str] | None,
+        mrids: list[str] | None,
+    ):
+        """Raise an HTTP error if the requested export is not possible."""
+        if snapshot is None:
+            raise HTTPError(503, "No GIS data has been loaded yet.")
+        if table_name not in snapshot.tables:
+            raise HTTPError(404, f"No table named '{table_name}'.")
+        if export_format not in EXPORT_FORMATS:
+            raise HTTPError(400, f"Format must be one of: {', '.join(EXPORT_FORMATS)}.")
+        unknown = set(columns or []).difference(snapshot.tables[table_name].columns)
+        if unknown:
+            raise HTTPError(400, f"Unknown columns: {', '.join(sorted(unknown))}.")
+        if mrids is not None and self.mrid_column not in snapshot.tables[table_name]:
+            raise HTTPError(400, f"Table '{table_name}' can not be filtered by MRID.")
+
+    def _cached_export(
+        self, snapshot: Snapshot, key: tuple, use_cache: bool
+    ) -> tuple[pa.Table, pa.Buffer | None]:
+        """Get the arrow table of an export, and the cached serialized export (if any)."""
+        with self._lock:
+            table = self._arrow_table(snapshot, key[0])
+            if use_cache and key in self._exports:
+                self._exports.move_to_end(key)
+                return table, self._exports[key]
+        return table, None
+
+    def _select(
+        self, table: pa.Table, columns: list[str] | None, mrids: list[str] | None
+    ) -> pa.Table:
+        """Select the rows of the MRIDs and the columns of an export."""
+        if mrids is not None:
+            table = table.filter(
+                pc.is_in(
+                    table.column(self.mrid_column).cast(pa.string()),
+                    value_set=pa.array(mrids, pa.string()),
+                )
+            )
+        if columns:
+            table = table.select(columns)
+        return table
+
+    def _store_export(self, snapshot: Snapshot, key: tuple, buffer: pa.Buffer):
+        """Cache a serialized export, unless a newer snapshot has been exported meanwhile."""
+        with self._lock:
+            if self._version == snapshot.version:
+                self._exports[key] = buffer
+                while len(self._exports) > self.max_cached:
+                    self._exports.popitem(last=False)
+        log.debug(
+            'Exported table "%s" of snapshot version %d as %s (%d bytes).',
+            key[0],
+            snapshot.version,
+            key[1],
+            buffer.size,
+        )
+
+
+def add_export_endpoints(
+    server: RestServer, exporter: SnapshotExporter, default_table: str
+):
+    """
+    Add an endpoint exporting tables of the current snapshot as Arrow IPC stream or Parquet file.
+
+    - GET /export?format=arrow|parquet&table=..&columns=a,b&mrid=x,y
+
+    Parameters
+    ----------
+    server: RestServer
+        Server to add the endpoint to.
+    exporter: SnapshotExporter
+        Exporter of the current snapshot.
+    default_table: str
+        Table exported if no table is given.
+    """
+
+    def split(value: str | None) -> list[str] | None:
+        return [item for item in value.split(",") if item] if value else None
+
+    def export(request: Request) -> Response:
+        table_name = request.query.get("table", default_table)
+        export_format = request.query.get("format", "arrow")
+        version, buffer = exporter.export(
+            table_name,
+            export_format,
+            columns=split(request.query.get("columns")),
+            mrids=split(request.query.get("mrid")),
+        )
+        content_type, extension = EXPORT_FORMATS[export_format]
+        # The buffer is written to the client as it is (no copy)
+        return Response(
+            body=memoryview(buffer),
+            content_type=content_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="{table_name}-v{version}.{extension}"',
+                "X-Snapshot-Version": str(version),
+            },
+        )
+
+    server.route("/export", export)
+
+
+def read_export(data: bytes, export_format: str) -> pd.DataFrame:
+    """
+    Read an export into a dataframe (i.e. in clients or tests).
+    """
+    if export_format == "arrow":
+        return pa.ipc.open_stream(data).read_all().to_pandas()
+    import pyarrow.parquet as pq
+
+    return pq.read_table(pa.BufferReader(data)).to_pandas()
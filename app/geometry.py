@@ -0,0 +1,185 @@
+import logging
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from .compact import coordinate_values
+
+log = logging.getLogger(__name__)
+
+# Mean radius of the earth in metres
+EARTH_RADIUS = 6371008.8
+
+
+def haversine_distance(
+    lon1: np.ndarray, lat1: np.ndarray, lon2: np.ndarray, lat2: np.ndarray
+) -> np.ndarray:
+    """
+    Calculate the great circle distance (in metres) between points given in degrees.
+    """
+    lon1, lat1, lon2, lat2 = (np.radians(values) for values in (lon1, lat1, lon2, lat2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def initial_bearing(
+    lon1: np.ndarray, lat1: np.ndarray, lon2: np.ndarray, lat2: np.ndarray
+) -> np.ndarray:
+    """
+    Calculate the initial bearing (in degrees from north, 0-360) from the first to the second points.
+    """
+    lon1, lat1, lon2, lat2 = (np.radians(values) for values in (lon1, lat1, lon2, lat2))
+    x = np.sin(lon2 - lon1) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(lon2 - lon1)
+    return np.degrees(np.arctan2(x, y)) % 360
+
+
+@dataclass(frozen=True)
+class LineGeometry:
+    """
+    Polylines of all lines, stored as one contiguous coordinate array with an offsets index.
+
+    The points of line i are 'longitude[offsets[i]:offsets[i + 1]]' (and likewise for latitude and
+    objectid), and its spans are 'span_length[span_offsets[i]:span_offsets[i + 1]]' (and likewise for
+    span_bearing). A line with n points has n - 1 spans.
+    """
+
+    mrids: np.ndarray
+    offsets: np.ndarray
+    objectid: np.ndarray
+    longitude: np.ndarray
+    latitude: np.ndarray
+    span_offsets: np.ndarray
+    span_length: np.ndarray
+    span_bearing: np.ndarray
+    line_length: np.ndarray
+    bbox: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.mrids)
+
+    def span_line_index(self) -> np.ndarray:
+        """Index of the line each span belongs to."""
+        return np.repeat(np.arange(len(self)), np.diff(self.span_offsets))
+
+    def span_start_index(self) -> np.ndarray:
+        """Index (in the point arrays) of the first point of each span."""
+        return np.arange(len(self.span_length)) + self.span_line_index()
+
+    def lines_dataframe(self, mrid_column: str) -> pd.DataFrame:
+        """
+        Create a table with one row per line (number of points, length and bounding box).
+        """
+        return pd.DataFrame(
+            {
+                mrid_column: self.mrids,
+                "POINTS": np.diff(self.offsets),
+                "LENGTH_M": self.line_length,
+                "MIN_LONG_DD": self.bbox[:, 0],
+                "MIN_LAT_DD": self.bbox[:, 1],
+                "MAX_LONG_DD": self.bbox[:, 2],
+                "MAX_LAT_DD": self.bbox[:, 3],
+            }
+        )
+
+    def spans_dataframe(self, mrid_column: str, order_column: str) -> pd.DataFrame:
+        """
+        Create a table with one row per span (end points, length and bearing).
+        """
+        line_index = self.span_line_index()
+        start = self.span_start_index()
+        return pd.DataFrame(
+            {
+                mrid_column: self.mrids[line_index],
+                "SPAN": np.arange(len(start)) - self.span_offsets[line_index],
+                f"FROM_{order_column}": self.objectid[start],
+                f"TO_{order_column}": self.objectid[start + 1],
+                "LENGTH_M": self.span_length,
+                "BEARING_DEG": self.span_bearing,
+            }
+        )
+
+
+def build_line_geometry(
+    dataframe: pd.DataFrame,
+    mrid_column: str,
+    order_column: str,
+    coordinate_columns: list[str],
+) -> LineGeometry:
+    """
+    Build the polyline of each line (ACLINESEGMENT) from the enriched dataframe, and calculate the length
+    and bearing of each span as well as the total length and bounding box of each line.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Enriched dataframe with one row per point (may be compact).
+    mrid_column: str
+        Name of the column identifying the line.
+    order_column: str
+        Name of the column giving the order of the points on a line (i.e. OBJECTID).
+    coordinate_columns: list[str]
+        Names of the longitude and latitude columns (in degrees).
+
+    Returns
+    -------
+    LineGeometry
+        The geometry of all lines.
+    """
+    line_codes, mrids = pd.factorize(dataframe[mrid_column], sort=True)
+    order = dataframe[order_column].to_numpy()
+
+    # Sorting points by line and then by their order on the line. Points without an MRID (code -1, sorted
+    # first) are not part of any line and left out (they are reported by the validation).
+    without_mrid = np.count_nonzero(line_codes < 0)
+    if without_mrid:
+        log.warning(
+            "%d points without %s are left out of the geometry.",
+            without_mrid,
+            mrid_column,
+        )
+    sort_index = np.lexsort((order, line_codes))[without_mrid:]
+    line_codes = line_codes[sort_index]
+    longitude = coordinate_values(dataframe, coordinate_columns[0])[sort_index]
+    latitude = coordinate_values(dataframe, coordinate_columns[1])[sort_index]
+
+    # Every line has at least one point, so a line with n points has n - 1 spans
+    points_per_line = np.bincount(line_codes, minlength=len(mrids))
+    offsets = np.concatenate([[0], np.cumsum(points_per_line)])
+    span_offsets = offsets - np.arange(len(offsets))
+
+    # Calculating metrics between all consecutive points, and keeping those within the same line
+    within_line = line_codes[1:] == line_codes[:-1]
+    from_point = (longitude[:-1][within_line], latitude[:-1][within_line])
+    to_point = (longitude[1:][within_line], latitude[1:][within_line])
+    span_length = haversine_distance(*from_point, *to_point)
+    span_bearing = initial_bearing(*from_point, *to_point)
+
+    # Summing span lengths per line (cumulative sum, as lines with a single point have no spans)
+    cumulative_length = np.concatenate([[0.0], np.cumsum(span_length)])
+    line_length = np.diff(cumulative_length[span_offsets])
+
+    bbox = np.empty((len(mrids), 4))
+    if len(mrids):
+        starts = offsets[:-1]
+        bbox[:, 0] = np.minimum.reduceat(longitude, starts)
+        bbox[:, 1] = np.minimum.reduceat(latitude, starts)
+        bbox[:, 2] = np.maximum.reduceat(longitude, starts)
+        bbox[:, 3] = np.maximum.reduceat(latitude, starts)
+
+    log.debug("Geometry built for %d lines with %d points.", len(mrids), len(longitude))
+
+    return LineGeometry(
+        mrids=np.asarray(mrids, dtype=object),
+        offsets=offsets,
+        objectid=order[sort_index],
+        longitude=longitude,
+        latitude=latitude,
+        span_offsets=span_offsets,
+        span_length=span_length,
+        span_bearing=span_bearing,
+        line_length=line_length,
+        bbox=bbox,
+    )
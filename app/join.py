@@ -0,0 +1,81 @@
+import logging
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+
+class LineNameIndex:
+    """
+    Integer index of the rows of a dataframe (i.e. the ACLinesegment data) by line name, for joining other
+    dataframes on the line name without building a pandas index of the joined rows.
+
+    The line names are coded as integers (missing names are a name of their own, matching missing names as
+    in a pandas join), so a join only compares integer codes and takes each column once.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Dataframe to index (the left side of the joins).
+    name_column: str
+        Name of the column with the line names.
+    """
+
+    def __init__(self, dataframe: pd.DataFrame, name_column: str):
+        self.dataframe = dataframe
+        self.name_column = name_column
+        codes, names = pd.factorize(dataframe[name_column], use_na_sentinel=False)
+        self.codes = codes
+        self.names = pd.Index(names)
+
+    def get_codes(self, names) -> np.ndarray:
+        """
+        Get the codes of line names (-1 for names not in the index).
+        """
+        return self.names.get_indexer(names)
+
+    def inner_join(self, right: pd.DataFrame, right_codes: np.ndarray) -> pd.DataFrame:
+        """
+        Join the rows of another dataframe to the rows of the indexed dataframe with the same line name.
+
+        Rows are ordered as the rows of the indexed dataframe, and rows with the same line name as the rows
+        of the other dataframe, as in 'DataFrame.join(how="inner")'.
+
+        Parameters
+        ----------
+        right: pd.DataFrame
+            Dataframe to join.
+        right_codes: np.ndarray
+            Code of the line name of each row of 'right' (-1 for rows to leave out).
+
+        Returns
+        -------
+        pd.DataFrame
+            The columns of the indexed dataframe followed by the columns of 'right', with a new index.
+        """
+        overlap = self.dataframe.columns.intersection(right.columns)
+        if len(overlap):
+            raise ValueError("Columns overlap in the join: %s", list(overlap))
+
+        # Rows of 'right' grouped by line name (in the order of 'right' within each name)
+        joined = np.flatnonzero(right_codes >= 0)
+        joined = joined[np.argsort(right_codes[joined], kind="stable")]
+        counts = np.bincount(right_codes[joined], minlength=len(self.names))
+        starts = np.cumsum(counts) - counts
+
+        # Repeating each left row by the number of right rows with its name, next to those rows
+        left_counts = counts[self.codes]
+        left_rows = np.repeat(np.arange(len(self.codes)), left_counts)
+        within = np.arange(len(left_rows)) - np.repeat(
+            np.cumsum(left_counts) - left_counts, left_counts
+        )
+        right_rows = joined[np.repeat(starts[self.codes], left_counts) + within]
+
+        # Taking each column once, the new dataframes share the taken columns
+        return pd.concat(
+            [
+                self.dataframe.take(left_rows).reset_index(drop=True),
+                right.take(right_rows).reset_index(drop=True),
+            ],
+            axis=1,
+        )
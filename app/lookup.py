@@ -0,0 +1,263 @@
+import logging
+import json
+from typing import Callable
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from .geometry import LineGeometry
+from .rest import RestServer, Request, Response, HTTPError
+
+log = logging.getLogger(__name__)
+
+
+def json_values(series: pd.Series) -> pa.Array:
+    """
+    Serialize each value of a series as JSON, vectorized.
+
+    Numbers and booleans are converted by pyarrow (NaN and infinity become null). Other values (i.e. text
+    and categories) are serialized once per unique value.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        values = pa.array(series.to_numpy(), from_pandas=True)
+        text = pc.cast(values, pa.large_string())
+        if pa.types.is_floating(values.type):
+            text = pc.if_else(
+                pc.or_(pc.is_nan(values), pc.is_inf(values)), "null", text
+            )
+        return pc.fill_null(text, "null")
+
+    codes, uniques = pd.factorize(series)
+    serialized = pa.array(
+        [json.dumps(value, ensure_ascii=False, default=str) for value in uniques]
+        + ["null"],
+        type=pa.large_string(),
+    )
+    # Missing values have code -1, which is the last element ("null")
+    return pc.take(serialized, pa.array(np.where(codes < 0, len(uniques), codes)))
+
+
+def concatenated_slices(parts: list, offsets: np.ndarray) -> list[bytes]:
+    """
+    Concatenate string arrays element-wise, and cut the result into slices of elements.
+
+    Parameters
+    ----------
+    parts: list
+        String arrays (of the same length) and strings to concatenate, where each element should end
+        with a separator (i.e. ',') as the slices are the concatenated elements minus the last character.
+    offsets: np.ndarray
+        Start of each slice, and the end of the last slice.
+
+    Returns
+    -------
+    list[bytes]
+        The content of each slice (UTF-8).
+    """
+    elements = pc.binary_join_element_wise(
+        *(
+            pa.scalar(part, pa.large_string()) if isinstance(part, str) else part
+            for part in parts
+        ),
+        pa.scalar("", pa.large_string()),
+    )
+    if isinstance(elements, pa.ChunkedArray):
+        elements = elements.combine_chunks()
+    first_offset = elements.offset
+    last_offset = first_offset + len(elements) + 1
+    element_offsets = np.frombuffer(elements.buffers()[1], dtype=np.int64)[
+        first_offset:last_offset
+    ]
+    data = elements.buffers()[2]
+    byte_offsets = element_offsets[offsets]
+    # The end of each slice leaves out the separator of its last element
+    stops = np.maximum(byte_offsets[1:] - 1, byte_offsets[:-1])
+    return [
+        data[start:stop].to_pybytes() for start, stop in zip(byte_offsets[:-1], stops)
+    ]
+
+
+class LineLookup:
+    """
+    Hash indexes from MRID and ETS line name to the rows of a table, with pre-serialized responses.
+
+    The rows of the table are sorted (stably) by MRID, so the rows of each MRID are a range of the sorted
+    positions. For each MRID the rows are serialized as JSON (a list of records, as returned by the SQL
+    API) and the line as GeoJSON (a LineString feature, with the points in order), when the lookup is
+    built. Lookups are then a dictionary lookup, without any serialization.
+
+    A line name can have more than one MRID (ETS lines split into sections), so the responses for line
+    names are lists of the records (JSON) or a FeatureCollection of the features (GeoJSON) of its MRIDs.
+
+    Parameters
+    ----------
+    table: pd.DataFrame
+        The published table with one row per point.
+    geometry: LineGeometry
+        Geometry of the lines in the table.
+    mrid_column: str
+        Name of the column with the MRID.
+    line_name_column: str
+        Name of the column with the ETS line name.
+    """
+
+    def __init__(
+        self,
+        table: pd.DataFrame,
+        geometry: LineGeometry,
+        mrid_column: str,
+        line_name_column: str,
+    ):
+        codes, mrids = pd.factorize(table[mrid_column], sort=False)
+        # Rows without an MRID (code -1, sorted first) can not be looked up, and are left out
+        without_mrid = np.count_nonzero(codes < 0)
+        counts = np.bincount(codes[codes >= 0], minlength=len(mrids))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.positions = np.argsort(codes, kind="stable")[without_mrid:]
+        self.ranges: dict[str, tuple[int, int]] = {
+            mrid: (int(offsets[i]), int(offsets[i + 1])) for i, mrid in enumerate(mrids)
+        }
+
+        # Line name (of the first row) of each MRID
+        first_rows = self.positions[offsets[:-1]]
+        line_names = table[line_name_column].to_numpy()[first_rows]
+        self.line_mrids: dict[str, list[str]] = {}
+        for mrid, line_name in zip(mrids, line_names):
+            self.line_mrids.setdefault(line_name, []).append(mrid)
+
+        # Records of all rows serialized column by column, then cut into the rows of each MRID
+        parts = []
+        for i, column in enumerate(table.columns):
+            name = json.dumps(str(column), ensure_ascii=False)
+            parts += [("{" if i == 0 else ",") + f"{name}:", json_values(table[column])]
+        parts.append("},")
+        positions = pa.array(self.positions)
+        records = concatenated_slices(
+            [p.take(positions) if isinstance(p, pa.Array) else p for p in parts],
+            offsets,
+        )
+        self.mrid_json: dict[str, bytes] = {
+            mrid: b"[" + body + b"]" for mrid, body in zip(mrids, records)
+        }
+
+        # Coordinates of all points serialized at once (the points of each line are in order)
+        coordinates = concatenated_slices(
+            [
+                "[",
+                json_values(pd.Series(geometry.longitude)),
+                ",",
+                json_values(pd.Series(geometry.latitude)),
+                "],",
+            ],
+            geometry.offsets,
+        )
+        line_name_of = dict(zip(mrids, line_names))
+        self.mrid_geojson: dict[str, bytes] = {}
+        for i, mrid in enumerate(geometry.mrids):
+            properties = {
+                mrid_column: mrid,
+                line_name_column: line_name_of.get(mrid),
+                "POINTS": int(geometry.offsets[i + 1] - geometry.offsets[i]),
+                "LENGTH_M": (
+                    round(float(geometry.line_length[i]), 1)
+                    if np.isfinite(geometry.line_length[i])
+                    else None
+                ),
+            }
+            self.mrid_geojson[mrid] = (
+                b'{"type":"Feature","geometry":{"type":"LineString","coordinates":['
+                + coordinates[i]
+                + b']},"properties":'
+                + json.dumps(
+                    properties, ensure_ascii=False, default=str, separators=(",", ":")
+                ).encode("utf-8")
+                + b"}"
+            )
+
+        # Responses for line names, reusing the responses of the MRID for lines with one MRID
+        self.line_json: dict[str, bytes] = {}
+        self.line_geojson: dict[str, bytes] = {}
+        for line_name, line_mrids in self.line_mrids.items():
+            features = [
+                self.mrid_geojson[m] for m in line_mrids if m in self.mrid_geojson
+            ]
+            if len(line_mrids) == 1:
+                self.line_json[line_name] = self.mrid_json[line_mrids[0]]
+            else:
+                self.line_json[line_name] = (
+                    b"[" + b",".join(self.mrid_json[m][1:-1] for m in line_mrids) + b"]"
+                )
+            self.line_geojson[line_name] = (
+                b'{"type":"FeatureCollection","features":['
+                + b",".join(features)
+                + b"]}"
+            )
+
+        log.debug(
+            "Lookup built for %d MRIDs and %d line names.",
+            len(self.ranges),
+            len(self.line_mrids),
+        )
+
+    def rows(self, mrid: str) -> np.ndarray:
+        """
+        Get the positions of the rows of an MRID in the table (empty if the MRID is unknown).
+        """
+        start, stop = self.ranges.get(mrid, (0, 0))
+        return self.positions[start:stop]
+
+    def line_rows(self, line_name: str) -> np.ndarray:
+        """
+        Get the positions of the rows of all MRIDs of a line name in the table (empty if it is unknown).
+        """
+        mrids = self.line_mrids.get(line_name, [])
+        if not mrids:
+            return np.empty(0, dtype=self.positions.dtype)
+        return np.concatenate([self.rows(mrid) for mrid in mrids])
+
+
+def add_lookup_endpoints(
+    server: RestServer, get_lookup: Callable[[], LineLookup | None]
+):
+    """
+    Add endpoints for looking up the points of a line by MRID or ETS line name to the REST server.
+
+    - GET /lines/points?mrid=.. or ?line_name=.. - the rows of the line in the table (JSON)
+    - GET /lines/geojson?mrid=.. or ?line_name=.. - the line as a GeoJSON feature (or feature collection
+      for line names)
+
+    Parameters
+    ----------
+    server: RestServer
+        Server to add the endpoints to.
+    get_lookup: Callable
+        Function returning the current lookup (or None if no data is loaded yet).
+    """
+
+    def find(request: Request, geojson: bool) -> bytes:
+        lookup = get_lookup()
+        if lookup is None:
+            raise HTTPError(503, "No GIS data has been loaded yet.")
+        if "mrid" in request.query:
+            key = request.query["mrid"]
+            bodies = lookup.mrid_geojson if geojson else lookup.mrid_json
+        elif "line_name" in request.query:
+            key = request.query["line_name"]
+            bodies = lookup.line_geojson if geojson else lookup.line_json
+        else:
+            raise HTTPError(400, "Missing query parameter 'mrid' or 'line_name'.")
+        body = bodies.get(key)
+        if body is None:
+            raise HTTPError(404, f"No line found with '{key}'.")
+        return body
+
+    def points(request: Request) -> Response:
+        return Response(body=find(request, geojson=False))
+
+    def geojson(request: Request) -> Response:
+        return Response(
+            body=find(request, geojson=True), content_type="application/geo+json"
+        )
+
+    server.route("/lines/points", points)
+    server.route("/lines/geojson", geojson)
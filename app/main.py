@@ -1,19 +1,48 @@
 # Library import
-from os import path, environ, stat
-from time import sleep, time
+from os import path, environ, cpu_count
+from concurrent.futures import Executor
+from functools import partial
 from json import dumps
 import logging
+import math
 import re
-from singupy import conversion
+from time import time
 from singupy import api as singuapi
 import pandas as pd
+from .parse_cache import ParseCache, source_digest
+from .watcher import InputWatcher
+from .translation import get_translator
+from .join import LineNameIndex
+from .pipeline import Pipeline
+from .compact import compact_dataframe, restore_dataframe, memory_report
+from .geometry import build_line_geometry
+from .spatial import SpatialIndex, add_spatial_endpoints
+from .rest import RestServer
+from .lookup import LineLookup, add_lookup_endpoints
+from .delta import ChangeLog, line_state, add_change_endpoints
+from .export import SnapshotExporter, add_export_endpoints
+from .persist import SnapshotArchive
+from .sources import GisSource, parse_gis_sources
+from .projection import UTM32N, project_coordinates
+from .weather_grid import load_weather_grid, assign_spans_to_cells
+from .validation import ValidationLimits, validate_gis_data
+from .simplify import simplify_lines
+from .query_cache import QueryCache, forward_sql_query, add_query_endpoint
+from .metrics import MetricsRegistry, add_metrics_endpoint
+from .snapshot import (
+    Snapshot,
+    SnapshotStore,
+    SnapshotBuilder,
+    add_snapshot_endpoints,
+)
 
 # Initialize log
 log = logging.getLogger(__name__)
 if environ.get("DEBUG", "FALSE").upper() == "FALSE":
-    # __main__ will output INFO-level, everything else stays at WARNING
+    # __main__ and the other modules of this package will output INFO-level, everything else stays at WARNING
     logging.basicConfig(format="%(levelname)s:%(asctime)s:%(name)s - %(message)s")
     logging.getLogger(__name__).setLevel(logging.INFO)
+    logging.getLogger(__package__).setLevel(logging.INFO)
 elif environ["DEBUG"].upper() == "TRUE":
     # Set EVERYTHING to DEBUG level
     logging.basicConfig(
@@ -29,8 +58,25 @@ else:
 # Input from user
 # API variables
 API_DB_NAME = environ.get("API_DB_NAME", "GIS_DATA")
+# Tables with line geometry (one row per line) and spans (one row per span between two points)
+API_LINE_DB_NAME = environ.get("API_LINE_DB_NAME", "GIS_LINES")
+API_SPAN_DB_NAME = environ.get("API_SPAN_DB_NAME", "GIS_SPANS")
+# Table with the weather grid cells each span passes through (if WEATHER_GRID_FILENAME is set)
+API_SPAN_CELL_DB_NAME = environ.get("API_SPAN_CELL_DB_NAME", "GIS_SPAN_CELLS")
+# Table with the findings of the validation of the GIS data
+API_VALIDATION_DB_NAME = environ.get("API_VALIDATION_DB_NAME", "GIS_VALIDATION")
+# Start of the names of the tables with the simplified lines (followed by the tolerance, i.e. GIS_SIMPLIFIED_100M)
+API_SIMPLIFIED_DB_NAME = environ.get("API_SIMPLIFIED_DB_NAME", "GIS_SIMPLIFIED")
+# Tolerances (whole metres) of the simplified lines, separated by commas (empty string disables them)
+SIMPLIFY_TOLERANCES = environ.get("SIMPLIFY_TOLERANCES", "")
 API_PORT = int(environ.get("API_PORT", "5000"))
+# Port of the REST API (spatial queries etc.)
+REST_API_PORT = int(environ.get("REST_API_PORT", "5001"))
 MOCK_DATA = environ.get("MOCK_DATA", "False")
+# Keep the enriched dataframe in a compact representation (categoricals, downcast integers and scaled coordinates)
+COMPACT_DATAFRAME = environ.get("COMPACT_DATAFRAME", "False")
+# Add the coordinates projected to UTM zone 32N (ETRS89, metres) as columns to the published table
+PROJECT_COORDINATES = environ.get("PROJECT_COORDINATES", "False")
 # Variables for the data that should be enriched.
 GIS_FILENAME = environ.get("GIS_FILENAME", "GIS_Driftstr_luftledning_koordinater.xls")
 GIS_SHEET_NAME = environ.get("GIS_SHEET", "GIS_Driftstr_luftledning_koordi")
@@ -55,6 +101,27 @@ MAP_GIS_LINE_NAME_COLUMN = environ.get("MAP_GIS_LINE_NAME_COLUMN", "GIS LINE NAM
 MAP_ETS_LINE_NAME_COLUMN = environ.get("MAP_ETS_LINE_NAME_COLUMN", "ETS LINE NAME")
 GIS_TO_ETS_MAP_FILENAME = environ.get("GIS_TO_ETS_MAP_FILENAME", "Gis_map.xlsx")
 MAP_SHEET_NAME = environ.get("MAP_SHEET_NAME", "GisMapping")
+# JSON file with the weather forecast grid (origin, resolution and extent), empty string disables it
+WEATHER_GRID_FILENAME = environ.get("WEATHER_GRID_FILENAME", "")
+# Folder for caching parsed input files (set to empty string to disable caching)
+CACHE_FOLDER = environ.get("CACHE_FOLDER", "/data/.cache/")
+# Watching of input files ('INOTIFY' or 'POLL'), max. seconds between checks and seconds to wait for writes to settle
+FILE_WATCHER = environ.get("FILE_WATCHER", "INOTIFY")
+POLL_INTERVAL = float(environ.get("POLL_INTERVAL", "60"))
+WATCH_DEBOUNCE = float(environ.get("WATCH_DEBOUNCE", "0.5"))
+# Max. number of processes parsing the input files in parallel (1 parses them one by one in the main process)
+INGEST_WORKERS = int(environ.get("INGEST_WORKERS", "3"))
+# Number of snapshot versions consumers can get the changed lines since
+CHANGE_HISTORY = int(environ.get("CHANGE_HISTORY", "100"))
+# Max. number of serialized SQL query results cached for the current snapshot (0 disables the cache)
+QUERY_CACHE_ENTRIES = int(environ.get("QUERY_CACHE_ENTRIES", "128"))
+# GIS sources as JSON list (or name of a JSON file in the data folder), if unset the GIS variables define one source
+GIS_SOURCES = environ.get("GIS_SOURCES", "")
+# Limits of the validation: bounding box of all points (min. lon, min. lat, max. lon, max. lat) and max. span length (m)
+VALIDATION_BBOX = environ.get("VALIDATION_BBOX", "7.5,54.4,15.5,58.0")
+MAX_SPAN_LENGTH = float(environ.get("MAX_SPAN_LENGTH", "5000"))
+# Folder for storing the last published snapshot, served right after a restart (empty string disables it)
+SNAPSHOT_FOLDER = environ.get("SNAPSHOT_FOLDER", "/data/.snapshot/")
 
 # Docker folder (all new data is by configuration getting sent to the '/data/' folder)
 docker_folder = "/data/"
@@ -69,10 +136,54 @@ elif MOCK_DATA.upper() != "FALSE":
         MOCK_DATA,
     )
 
+if COMPACT_DATAFRAME.upper() not in ["TRUE", "FALSE"]:
+    raise ValueError(
+        "'COMPACT_DATAFRAME' env. variable is set to: '%s' but must be either: 'True', 'False' or unset.",
+        COMPACT_DATAFRAME,
+    )
+
+if PROJECT_COORDINATES.upper() not in ["TRUE", "FALSE"]:
+    raise ValueError(
+        "'PROJECT_COORDINATES' env. variable is set to: '%s' but must be either: 'True', 'False' or unset.",
+        PROJECT_COORDINATES,
+    )
+
+if len(VALIDATION_BBOX.split(",")) != 4:
+    raise ValueError(
+        "'VALIDATION_BBOX' env. variable is set to: '%s' but must be: 'min. longitude,min. latitude,"
+        "max. longitude,max. latitude'.",
+        VALIDATION_BBOX,
+    )
+VALIDATION_LIMITS = ValidationLimits(
+    bbox=tuple(float(value) for value in VALIDATION_BBOX.split(",")),
+    max_span_length=MAX_SPAN_LENGTH,
+)
+
+if not re.fullmatch(r"(\d+(,\d+)*)?", SIMPLIFY_TOLERANCES.replace(" ", "")):
+    raise ValueError(
+        "'SIMPLIFY_TOLERANCES' env. variable is set to: '%s' but must be whole metres separated by commas.",
+        SIMPLIFY_TOLERANCES,
+    )
+SIMPLIFY_TOLERANCE_LIST = sorted(
+    {int(value) for value in SIMPLIFY_TOLERANCES.split(",") if value.strip()}
+)
+
+# Columns in the GIS data containing coordinates and the order of points on a line
+GIS_COORDINATE_COLUMNS = ["Long_DD", "Lat_DD"]
+GIS_ORDER_COLUMN = "OBJECTID"
+# Columns with the projected coordinates (if PROJECT_COORDINATES is set)
+PROJECTED_COORDINATE_COLUMNS = ["UTM32N_X", "UTM32N_Y"]
+
+# Name of the translated GIS line names, joined with the ACLinesegment line names
+ETS_NAME_COLUMN = "ETS_NAME"
+
 # Chosen filepaths
 ACLINESEGMENT_FILEPATH = docker_folder + ACLINESEGMENT_FILENAME
 GIS_FILEPATH = docker_folder + GIS_FILENAME
 GIS_TO_ETS_MAP_FILEPATH = docker_folder + GIS_TO_ETS_MAP_FILENAME
+WEATHER_GRID_FILEPATH = (
+    docker_folder + WEATHER_GRID_FILENAME if WEATHER_GRID_FILENAME else ""
+)
 
 
 def load_mrid_csv_file(file_path: str) -> pd.DataFrame:
@@ -219,9 +330,6 @@ def map_gis_to_ets_line_name(
         A list of gis line names that could not be mapped with the regex.
     """
 
-    gis_line_name_to_ets_line_name = {}
-    non_translatable = []
-
     # Checking column constant from the user input to ensure that column is found in the dataframe.
     if gis_column not in gis_dataframe:
         raise ValueError(
@@ -231,21 +339,10 @@ def map_gis_to_ets_line_name(
     # Removing spaces from the names in the gis_names
     gis_dataframe[gis_column] = gis_dataframe[gis_column].str.replace(" ", "")
 
-    # Getting the list of unique names from GIS column
-    gis_names = list(gis_dataframe[gis_column].unique())
-
-    for name in gis_names:
-        match = re.match(regex, name)
-        if match:
-            # Converting the extracted voltage number to a letter with the function 'kv_to_letter'
-            volt = conversion.kv_to_letter(int(match.group("volt")))
-            # Constructing "ets_name" from domain known pattern
-            ets_name = f"{volt}_{match.group('STN1')}-{match.group('STN2')}"
-            if match.group("id") is not None:
-                ets_name += f'_{match.group("id")}'
-            gis_line_name_to_ets_line_name[name] = ets_name
-        else:
-            non_translatable.append(name)
+    # Translating the unique names from GIS column (names translated earlier are reused)
+    gis_line_name_to_ets_line_name, non_translatable = get_translator(regex).translate(
+        gis_dataframe[gis_column].unique()
+    )
     log.info(
         'The specified regex: "%s" expression have been run on the input list.', regex
     )
@@ -259,6 +356,45 @@ def map_gis_to_ets_line_name(
     return gis_line_name_to_ets_line_name, non_translatable
 
 
+def load_gis_sheet(
+    file_path: str, sheet: str, cache: ParseCache, slot: str = "gis_sheet"
+) -> pd.DataFrame:
+    """
+    Parse the sheet with GIS data from the GIS excel file, using the parse cache when possible.
+
+    The cache is keyed by the hash of the file content (the digest found by the pipeline, if the path is a
+    SourceFile) and the sheet, so a restart with the same inputs will not parse the excel file again.
+
+    Parameters
+    ----------
+    file_path: str
+        Full path of the GIS excel file.
+    sheet: str
+        Name of the sheet containing the GIS data.
+    cache: ParseCache
+        Cache to load parsed data from and store parsed data in.
+    slot: str
+        Cache slot of the sheet (each GIS source needs its own slot, as only one entry is kept per slot).
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with GIS data.
+    """
+    if not cache.enabled:
+        return parse_excel_sheets_to_dataframe(file_path, [sheet])[sheet]
+
+    sheet_key = cache.key(source_digest(file_path), sheet=sheet, header=0)
+    gis_dataframe = cache.load(slot, sheet_key)
+    if gis_dataframe is None:
+        gis_dataframe = parse_excel_sheets_to_dataframe(file_path, [sheet])[sheet]
+        cache.store(slot, sheet_key, gis_dataframe)
+    else:
+        log.info('GIS data from "%s" was loaded from cache.', file_path)
+
+    return gis_dataframe
+
+
 def enrich_dlr_dataframe(
     gis_dataframe: pd.DataFrame,
     aclinesegment_dataframe: pd.DataFrame,
@@ -266,10 +402,15 @@ def enrich_dlr_dataframe(
     bad_line_names: list[str],
     gis_column_name: str,
     ets_column_name: str,
+    aclinesegment_index: LineNameIndex | None = None,
 ) -> pd.DataFrame:
     """
     Enriches the MRID dataframe with gis data and remove untranslated lines.
 
+    The GIS line names are translated once per unique name (through the codes of the names), and joined
+    with the ACLinesegment rows by integer codes, so no translated name column or index is added to a copy
+    of the GIS data. The input dataframes are not changed.
+
     Parameters
     ----------
     gis_dataframe: pd.DataFrame
@@ -285,202 +426,609 @@ def enrich_dlr_dataframe(
         Name of the column in gis_dataframe which contains the gis line names.
     ets_name_column: str
         Name of the column in mrid_dataframe that contains the ets names.
+    aclinesegment_index: LineNameIndex
+        Index of aclinesegment_dataframe by ets name (built if not given, i.e. it can be reused between
+        reloads of the GIS data).
 
     Returns
     -------
     pd.DataFrame
         Clone of gis_dataframe enriched with MRID data, minus non-translated rows.
     """
-    # Variable to store temp column name to join the two DataFrames
-    TEMP_COLUMN = "ETS_NAME"
+    if aclinesegment_index is None:
+        aclinesegment_index = LineNameIndex(aclinesegment_dataframe, ets_column_name)
 
-    # Creating a column with the ETS name
-    gis_dataframe[TEMP_COLUMN] = gis_dataframe[gis_column_name].map(
-        gis_line_name_to_ets_line_name
+    # Translating each unique GIS line name to the code of its ETS name, where the names that could not be
+    # translated are removed
+    name_codes, gis_line_names = pd.factorize(
+        gis_dataframe[gis_column_name], use_na_sentinel=False
+    )
+    gis_line_names = pd.Series(gis_line_names)
+    ets_codes = aclinesegment_index.get_codes(
+        gis_line_names.map(gis_line_name_to_ets_line_name)
     )
+    ets_codes[gis_line_names.isin(bad_line_names).to_numpy()] = -1
 
-    # Removing any names that could not be translated to represent a clean dataframe that only contains
-    # information that can be looked up with MRID.
-    gis_dataframe = gis_dataframe[~gis_dataframe[gis_column_name].isin(bad_line_names)]
+    # The joined ETS names replace a GIS column of the same name, which is not part of the output (only
+    # dropped if present, as dropping a column copies the whole dataframe with pandas 2)
+    if ETS_NAME_COLUMN in gis_dataframe:
+        gis_dataframe = gis_dataframe.drop(columns=ETS_NAME_COLUMN)
+    return aclinesegment_index.inner_join(gis_dataframe, ets_codes[name_codes])
 
-    dlr_dataframe = aclinesegment_dataframe.join(
-        gis_dataframe.set_index(TEMP_COLUMN),
-        on=ets_column_name,
-        how="inner",
-    )
 
-    # Resetting index
-    dlr_dataframe.reset_index(inplace=True, drop=True)
+def load_forced_mapping(
+    file_path: str, sheet: str, gis_column: str, ets_column: str
+) -> dict[str, str]:
+    """
+    Parse the (optional) mapping file used to enforce specific translations of line names.
 
-    return dlr_dataframe
+    Parameters
+    ----------
+    file_path: str
+        Full path of the mapping excel file.
+    sheet: str
+        Name of the sheet containing the mapping.
+    gis_column: str
+        Name of the column containing the translated gis line names.
+    ets_column: str
+        Name of the column containing the ets line names to use instead.
 
+    Returns
+    -------
+    dict[str, str]
+        Mapping from translated gis line name to ets line name, empty if the file could not be parsed.
+    """
+    try:
+        # Creating mapping between GIS and ETS if the names are not in agreement.
+        map_gis_ets_dataframe = parse_excel_sheets_to_dataframe(file_path, [sheet])[
+            sheet
+        ]
+
+        # Creating a dict from the mapping dataframe
+        return parse_dataframe_columns_to_dictionary(
+            map_gis_ets_dataframe, gis_column, ets_column
+        )
+    except Exception as e:
+        log.warning(
+            """Creating dataframe from "%s" failed with message: %s.
+            Ensure that there is no need for forcing specific mapping names.""",
+            file_path,
+            e,
+        )
+        return {}
 
-def verify_translated_names_against_ets(
-    gis_to_ets_name: dict[str, str],
-    dataframe: pd.DataFrame,
-    ets_name_column: str,
-    dlr_enabled_column: str,
-):
+
+def configured_gis_sources() -> list[GisSource]:
+    """
+    Get the GIS sources configured by GIS_SOURCES, or the single source defined by the GIS environment
+    variables (publishing to API_DB_NAME, API_LINE_DB_NAME, API_SPAN_DB_NAME, API_SPAN_CELL_DB_NAME,
+    API_VALIDATION_DB_NAME and API_SIMPLIFIED_DB_NAME) if it is unset.
+    """
+    if GIS_SOURCES:
+        return parse_gis_sources(
+            GIS_SOURCES,
+            docker_folder,
+            sheet=GIS_SHEET_NAME,
+            column=GIS_LINE_NAME_COLUMN,
+            regex=LINE_NAME_REGEX,
+        )
+    return [
+        GisSource(
+            name="gis",
+            file_path=GIS_FILEPATH,
+            sheet=GIS_SHEET_NAME,
+            line_name_column=GIS_LINE_NAME_COLUMN,
+            regex=LINE_NAME_REGEX,
+            table=API_DB_NAME,
+            line_table=API_LINE_DB_NAME,
+            span_table=API_SPAN_DB_NAME,
+            span_cell_table=API_SPAN_CELL_DB_NAME,
+            validation_table=API_VALIDATION_DB_NAME,
+            simplified_table=API_SIMPLIFIED_DB_NAME,
+        )
+    ]
+
+
+def source_stage(name: str, index: int, source: GisSource) -> str:
+    """
+    Get the name of a stage (or artifact) of a GIS source, where the first source keeps the plain names.
+    """
+    return name if index == 0 else f"{name}:{source.name}"
+
+
+def build_reload_pipeline(
+    cache: ParseCache,
+    executor: Executor | None = None,
+    sources: list[GisSource] | None = None,
+) -> Pipeline:
     """
-    The function checks if there are lines in the ETS dataset which is not represented in the GIS dataset.
-    This is for logging and to be able to see when introducing a new dataset if the data quality stays the same.
+    Build the pipeline of stages used for (re)loading the input files into the enriched dataframes.
+
+    The forced mapping is always applied to the translation made by the regex, so a new mapping file
+    replaces the previous forced mapping instead of being applied on top of it.
+
+    The input files are parsed in the executor (if given) in parallel, while the translation of the GIS line
+    names is done in this process, so the translations of previous reloads are reused.
+
+    Each GIS source has its own stages, sharing the parsed ACLinesegment and mapping files. The stages of a
+    source are only recomputed when its file (or a shared file) changes.
 
     Parameters
     ----------
-    gis_to_ets_name_mapping : dict[str, str]
-        The dict containing the translated names from GIS.
-    dataframe : pd.DataFrame
-        Dataframe with all ETS information in.
-    ets_name_column : str
-        The specific column in the MRID dataframe that contains the names of lines.
-    dlr_enabled_column : str
-        Name of the column in mrid_dataframe which contains enabled state
+    cache: ParseCache
+        Cache used for the parsed GIS data.
+    executor: Executor
+        Executor for parsing the input files in parallel (i.e. a process pool).
+    sources: list[GisSource]
+        GIS sources to load (default is the configured sources).
+
     Returns
     -------
-    None
+    Pipeline
+        Pipeline where the stage "enriched" contains the enriched dataframe (and "table" the dataframe
+        as published), "geometry" the geometry of each line, "spatial_index" the spatial index of the
+        spans, "line_state" the hashes of the lines, "lookup" the lookup of lines by MRID and line name,
+        "validation" the report of the data validation, "simplified" the simplified lines (if
+        SIMPLIFY_TOLERANCES is set) and "span_cells" the weather grid cells of the spans (if
+        WEATHER_GRID_FILEPATH is set).
+        These are the stages of the first source, the stages of other sources are named by 'source_stage'.
     """
+    sources = sources or configured_gis_sources()
+    pipeline = Pipeline(executor)
+    pipeline.add_source("aclinesegment_file", ACLINESEGMENT_FILEPATH)
+    pipeline.add_source("gis_map_file", GIS_TO_ETS_MAP_FILEPATH)
+
+    # Parsing the shared input files (in parallel), the functions must be picklable for the process pool
+    pipeline.add_stage(
+        "aclinesegment",
+        load_mrid_csv_file,
+        ["aclinesegment_file"],
+        parallel=True,
+    )
+    pipeline.add_stage(
+        "forced_mapping",
+        partial(
+            load_forced_mapping,
+            sheet=MAP_SHEET_NAME,
+            gis_column=MAP_GIS_LINE_NAME_COLUMN,
+            ets_column=MAP_ETS_LINE_NAME_COLUMN,
+        ),
+        ["gis_map_file"],
+        compare=True,
+        parallel=True,
+    )
 
-    regex = r"^[CDE]_"
-
-    # Comparing the converted names from GIS to the list of names in ETS.
-    # omitting low voltages level
-    lines_not_in_gis = list(
-        line
-        for line in (
-            list(
-                set(dataframe[ets_name_column]).difference(
-                    list(gis_to_ets_name.values())
-                )
+    # Indexing the ACLinesegment rows by line name once, for enriching all sources
+    pipeline.add_stage(
+        "aclinesegment_index",
+        lambda aclinesegment: LineNameIndex(
+            aclinesegment, ACLINESEGMENT_LINE_NAME_COLUMN
+        ),
+        ["aclinesegment"],
+    )
+
+    # The weather grid is shared by all sources
+    if WEATHER_GRID_FILEPATH:
+        pipeline.add_source("weather_grid_file", WEATHER_GRID_FILEPATH)
+        pipeline.add_stage(
+            "weather_grid", load_weather_grid, ["weather_grid_file"], compare=True
+        )
+
+    # Sheets of the same file share the source (so the file is only hashed once)
+    file_sources = {}
+    for index, source in enumerate(sources):
+        file_source = file_sources.get(source.file_path)
+        if file_source is None:
+            file_source = file_sources[source.file_path] = source_stage(
+                "gis_file", index, source
             )
+            pipeline.add_source(file_source, source.file_path)
+        add_gis_source_stages(pipeline, cache, file_source, index, source)
+
+    return pipeline
+
+
+def add_gis_source_stages(
+    pipeline: Pipeline,
+    cache: ParseCache,
+    file_source: str,
+    index: int,
+    source: GisSource,
+):
+    """
+    Add the stages parsing, translating and enriching a GIS source to the reload pipeline.
+    """
+
+    def stage(name: str) -> str:
+        return source_stage(name, index, source)
+
+    pipeline.add_stage(
+        stage("gis_sheet"),
+        partial(
+            load_gis_sheet,
+            sheet=source.sheet,
+            cache=cache,
+            slot=stage("gis_sheet").replace(":", "_"),
+        ),
+        [file_source],
+        parallel=True,
+    )
+
+    # Translating the GIS line names, output is (dataframe, translation, non translatable names)
+    def translate(gis_dataframe):
+        return (
+            gis_dataframe,
+            *map_gis_to_ets_line_name(
+                gis_dataframe, source.line_name_column, source.regex
+            ),
         )
-        if re.match(regex, line)
+
+    pipeline.add_stage(stage("gis"), translate, [stage("gis_sheet")])
+
+    # Replacing the names in the translation with the forced mapping
+    pipeline.add_stage(
+        stage("mapping"),
+        lambda gis, forced_mapping: {
+            k: forced_mapping.get(v, v) for k, v in gis[1].items()
+        },
+        [stage("gis"), "forced_mapping"],
+        compare=True,
+    )
+
+    # Creating the dlr dataframe with ETS data enriched with gis data
+    def enrich(gis, aclinesegment_index, mapping):
+        enriched_gis_data = enrich_dlr_dataframe(
+            gis[0],
+            aclinesegment_index.dataframe,
+            mapping,
+            gis[2],
+            source.line_name_column,
+            ACLINESEGMENT_LINE_NAME_COLUMN,
+            aclinesegment_index,
+        )
+        if COMPACT_DATAFRAME.upper() == "TRUE":
+            enriched_gis_data = compact_dataframe(
+                enriched_gis_data, GIS_COORDINATE_COLUMNS
+            )
+        return enriched_gis_data
+
+    pipeline.add_stage(
+        stage("enriched"),
+        enrich,
+        [stage("gis"), "aclinesegment_index", stage("mapping")],
     )
 
-    lines_not_in_gis.sort()
-    log.info("List of lines not found in GIS data set: %s", lines_not_in_gis)
+    # Building polylines and span metrics for each line
+    pipeline.add_stage(
+        stage("geometry"),
+        lambda enriched: build_line_geometry(
+            enriched,
+            ACLINESEGMENT_MRID_NAME_COLUMN,
+            GIS_ORDER_COLUMN,
+            GIS_COORDINATE_COLUMNS,
+        ),
+        [stage("enriched")],
+    )
 
-    # Checking to see if there are lines in the MRID list with enabled DLR that
-    # can not be found in GIS data
-    lines_with_dlr_enabled = mrid_dataframe[
-        mrid_dataframe[dlr_enabled_column].str.upper() == "YES"
-    ][ets_name_column]
+    # Checking the quality of the enriched data (missing lines, OBJECTIDs, coordinates and spans)
+    pipeline.add_stage(
+        stage("validation"),
+        lambda aclinesegment, mapping, enriched, geometry: validate_gis_data(
+            aclinesegment,
+            mapping,
+            enriched,
+            geometry,
+            VALIDATION_LIMITS,
+            ACLINESEGMENT_MRID_NAME_COLUMN,
+            ACLINESEGMENT_LINE_NAME_COLUMN,
+            ACLINESEGMENT_DLR_ENABLED_COLUMN,
+            GIS_ORDER_COLUMN,
+        ),
+        ["aclinesegment", stage("mapping"), stage("enriched"), stage("geometry")],
+    )
 
-    missing_gis_data = list(set(lines_with_dlr_enabled) - set(gis_to_ets_name.values()))
+    # Simplifying the lines at all tolerances in one pass, for clients only needing a few points per line
+    if SIMPLIFY_TOLERANCE_LIST:
+        pipeline.add_stage(
+            stage("simplified"),
+            lambda geometry: simplify_lines(
+                geometry,
+                SIMPLIFY_TOLERANCE_LIST,
+                ACLINESEGMENT_MRID_NAME_COLUMN,
+                GIS_ORDER_COLUMN,
+                GIS_COORDINATE_COLUMNS,
+            ),
+            [stage("geometry")],
+        )
 
-    if missing_gis_data:
-        log.error(
-            "Some lines set up for DLR have no GIS data available, they are: %s",
-            missing_gis_data,
+    # Indexing the spans of all lines for spatial queries
+    pipeline.add_stage(stage("spatial_index"), SpatialIndex, [stage("geometry")])
+
+    # The enriched dataframe as published, with the original coordinates (categories are kept as they are
+    # queried like text)
+    table_inputs = [stage("enriched")]
+    if PROJECT_COORDINATES.upper() == "TRUE":
+        # Projecting the coordinates once per reload, instead of by every consumer
+        pipeline.add_stage(
+            stage("projection"),
+            lambda enriched: project_coordinates(
+                enriched, GIS_COORDINATE_COLUMNS, UTM32N, PROJECTED_COORDINATE_COLUMNS
+            ),
+            [stage("enriched")],
         )
-    else:
-        log.info("Gis data is found for all lines in the MRID file with DLR enabled.")
+        table_inputs.append(stage("projection"))
+
+    def build_table(enriched, *projection):
+        table = restore_dataframe(enriched, keep_categories=True)
+        return pd.concat([table, *projection], axis=1) if projection else table
+
+    pipeline.add_stage(stage("table"), build_table, table_inputs)
+
+    # Hashing the geometry and DLR enabled state of each line, to find changed lines between snapshots
+    pipeline.add_stage(
+        stage("line_state"),
+        lambda enriched, geometry: line_state(
+            enriched,
+            geometry,
+            ACLINESEGMENT_MRID_NAME_COLUMN,
+            ACLINESEGMENT_DLR_ENABLED_COLUMN,
+        ),
+        [stage("enriched"), stage("geometry")],
+    )
+
+    # Indexing the rows of each MRID and line name, with pre-serialized responses for lookups
+    pipeline.add_stage(
+        stage("lookup"),
+        lambda table, geometry: LineLookup(
+            table,
+            geometry,
+            ACLINESEGMENT_MRID_NAME_COLUMN,
+            ACLINESEGMENT_LINE_NAME_COLUMN,
+        ),
+        [stage("table"), stage("geometry")],
+    )
+
+    # Assigning the spans to the cells of the weather grid, once per reload of the source or the grid
+    if WEATHER_GRID_FILEPATH:
+        pipeline.add_stage(
+            stage("span_cells"),
+            lambda geometry, grid: assign_spans_to_cells(
+                geometry, grid, ACLINESEGMENT_MRID_NAME_COLUMN
+            ),
+            [stage("geometry"), "weather_grid"],
+        )
+
+
+def build_snapshot_content(
+    pipeline: Pipeline, sources: list[GisSource] | None = None
+) -> tuple[dict[str, pd.DataFrame], dict[str, object]] | None:
+    """
+    Run the reload pipeline and collect the tables and artifacts of a new snapshot.
+
+    Parameters
+    ----------
+    pipeline: Pipeline
+        Pipeline made by 'build_reload_pipeline'.
+    sources: list[GisSource]
+        GIS sources of the pipeline (default is the configured sources).
+
+    Returns
+    -------
+    tuple[dict[str, pd.DataFrame], dict[str, object]] | None
+        Tables to publish through the API (four per GIS source, plus the simplified lines and weather grid
+        cells if configured) and other artifacts (geometry, spatial
+        index, lookup, line state and the GIS line names that could not be translated, named as the stages
+        of each source), or None if no input file has changed.
+    """
+    sources = sources or configured_gis_sources()
+    # Recomputing the stages affected by changed files
+    updated = pipeline.run()
+
+    # Comparing with the versions of the last built snapshot rather than the stages updated by this run, as
+    # stages recomputed by a run that failed at a later stage are not recomputed by the retry
+    published_stages = [
+        source_stage(name, index, source)
+        for index, source in enumerate(sources)
+        for name in ["enriched", "span_cells"]
+    ]
+    published_stages = [name for name in published_stages if name in pipeline.nodes]
+    if not pipeline.changed_since_mark("snapshot", published_stages):
+        log.info(
+            'Files at: "%s" have not changed.',
+            '", "'.join(
+                [source.file_path for source in sources]
+                + [ACLINESEGMENT_FILEPATH, GIS_TO_ETS_MAP_FILEPATH]
+                + ([WEATHER_GRID_FILEPATH] if WEATHER_GRID_FILEPATH else [])
+            ),
+        )
+        return None
+
+    log.info("Data collection is done (updated: %s).", updated)
+    tables = {}
+    artifacts = {}
+    for index, source in enumerate(sources):
+
+        def stage(name: str) -> str:
+            return source_stage(name, index, source)
+
+        enriched_gis_data = pipeline[stage("enriched")]
+        log.debug('Dataframe of "%s" is: %s', source.name, enriched_gis_data)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                'Memory usage of dataframe of "%s":\n%s',
+                source.name,
+                memory_report(enriched_gis_data),
+            )
+
+        line_geometry = pipeline[stage("geometry")]
+        tables[source.table] = pipeline[stage("table")]
+        tables[source.line_table] = line_geometry.lines_dataframe(
+            ACLINESEGMENT_MRID_NAME_COLUMN
+        )
+        tables[source.span_table] = line_geometry.spans_dataframe(
+            ACLINESEGMENT_MRID_NAME_COLUMN, GIS_ORDER_COLUMN
+        )
+        tables[source.validation_table] = pipeline[stage("validation")]
+        if SIMPLIFY_TOLERANCE_LIST:
+            for tolerance, table in pipeline[stage("simplified")].items():
+                tables[f"{source.simplified_table}_{tolerance}M"] = table
+        if WEATHER_GRID_FILEPATH:
+            tables[source.span_cell_table] = pipeline[stage("span_cells")]
+        for name in ["enriched", "geometry", "spatial_index", "lookup", "line_state"]:
+            artifacts[stage(name)] = pipeline[stage(name)]
+        artifacts[stage("non_translatable")] = pipeline[stage("gis")][2]
+
+    pipeline.set_mark("snapshot", published_stages)
+    return tables, artifacts
 
 
 if __name__ == "__main__":
-    # Initialize of variables and API.
-    gis_time_init = mrid_time_init = gis_map_time_init = 0
+    gis_sources = configured_gis_sources()
 
-    gis_data_api = singuapi.DataFrameAPI(dbname=API_DB_NAME, port=API_PORT)
+    # Initialize of API and snapshot store.
+    gis_data_api = singuapi.DataFrameAPI(dbname=gis_sources[0].table, port=API_PORT)
     log.info("Started API on port %d", gis_data_api.web.port)
 
-    while True:
-        start_time = time()
-        if path.isfile(GIS_FILEPATH) and path.isfile(ACLINESEGMENT_FILEPATH):
-            if (
-                stat(GIS_FILEPATH).st_mtime > gis_time_init
-                or stat(ACLINESEGMENT_FILEPATH).st_mtime > mrid_time_init
-                or stat(GIS_TO_ETS_MAP_FILEPATH).st_mtime > gis_map_time_init
-            ):
-                if stat(GIS_FILEPATH).st_mtime > gis_time_init:
-                    gis_time_init = stat(GIS_FILEPATH).st_mtime
-
-                    # Parsing data from GIS excel file
-                    log.info("New GIS file, importing new file.")
-                    gis_dataframe = parse_excel_sheets_to_dataframe(
-                        GIS_FILEPATH, [GIS_SHEET_NAME]
-                    )[GIS_SHEET_NAME]
-                    (
-                        gis_to_ets_name_mapping,
-                        non_translatable,
-                    ) = map_gis_to_ets_line_name(
-                        gis_dataframe, GIS_LINE_NAME_COLUMN, LINE_NAME_REGEX
-                    )
-
-                if stat(ACLINESEGMENT_FILEPATH).st_mtime > mrid_time_init:
-                    mrid_time_init = stat(ACLINESEGMENT_FILEPATH).st_mtime
-
-                    # Parsing data from MRID csv file
-                    log.info("New MRID file, importing new file.")
-                    mrid_dataframe = load_mrid_csv_file(ACLINESEGMENT_FILEPATH)
-
-                if stat(GIS_TO_ETS_MAP_FILEPATH).st_mtime > gis_map_time_init:
-                    gis_map_time_init = stat(GIS_TO_ETS_MAP_FILEPATH).st_mtime
-                    try:
-                        # Creating mapping between GIS and ETS if the names are not in agreement.
-                        map_gis_ets_dataframe = parse_excel_sheets_to_dataframe(
-                            GIS_TO_ETS_MAP_FILEPATH, [MAP_SHEET_NAME]
-                        )[MAP_SHEET_NAME]
-
-                        # Creating a dict from the mapping dataframe
-                        map_gis_to_ets_name = parse_dataframe_columns_to_dictionary(
-                            map_gis_ets_dataframe,
-                            MAP_GIS_LINE_NAME_COLUMN,
-                            MAP_ETS_LINE_NAME_COLUMN,
-                        )
-
-                        # Replacing the names in the original 'translate_gis_name_to_ets'
-                        # with the mapping dict
-                        gis_to_ets_name_mapping = {
-                            k: map_gis_to_ets_name.get(v, v)
-                            for k, v in gis_to_ets_name_mapping.items()
-                        }
-
-                    except Exception as e:
-                        log.warning(
-                            """Creating dataframe from "%s" failed with message: %s.
-                            Ensure that there is no need for forcing specific mapping names.""",
-                            GIS_TO_ETS_MAP_FILEPATH,
-                            e,
-                        )
-
-                # Logging difference between GIS and ETS names.
-                verify_translated_names_against_ets(
-                    gis_to_ets_name_mapping,
-                    mrid_dataframe,
-                    ACLINESEGMENT_LINE_NAME_COLUMN,
-                    ACLINESEGMENT_DLR_ENABLED_COLUMN,
-                )
-
-                # Creating the dlr dataframe with ETS data enriched with gis data
-                enriched_gis_data = enrich_dlr_dataframe(
-                    gis_dataframe,
-                    mrid_dataframe,
-                    gis_to_ets_name_mapping,
-                    non_translatable,
-                    GIS_LINE_NAME_COLUMN,
-                    ACLINESEGMENT_LINE_NAME_COLUMN,
-                )
-
-                log.info("Data collection is done.")
-                log.debug("Dataframe is: %s", enriched_gis_data)
-
-                # Passing the new dataframe to the API
-                gis_data_api[API_DB_NAME] = enriched_gis_data
-
-            else:
-                log.info(
-                    'Files at: "%s", "%s" and "%s" have not changed.',
-                    GIS_FILEPATH,
-                    ACLINESEGMENT_FILEPATH,
-                    GIS_TO_ETS_MAP_FILEPATH,
-                )
+    snapshot_store = SnapshotStore()
+    metrics = MetricsRegistry()
 
-        else:
-            log.error(
-                'Files not found at: "%s" and "%s"',
-                GIS_FILEPATH,
-                ACLINESEGMENT_FILEPATH,
+    # Recording the changed lines of each snapshot (before the API table is replaced)
+    change_log = ChangeLog(ACLINESEGMENT_DLR_ENABLED_COLUMN, CHANGE_HISTORY)
+    snapshot_store.subscribe(
+        lambda snapshot: change_log.record(
+            snapshot.version, snapshot.artifacts["line_state"]
+        )
+    )
+
+    def publish_to_api(snapshot: Snapshot):
+        # Passing the tables of the new snapshot to the API
+        finish = metrics.observe_stage("api_publish", snapshot.tables.values())
+        for table_name, table in snapshot.tables.items():
+            gis_data_api[table_name] = table
+        finish(None)
+
+    snapshot_store.subscribe(publish_to_api)
+
+    # Results of SQL queries cached until the API has the tables of a new snapshot
+    query_cache = QueryCache(
+        forward_sql_query(f"http://localhost:{API_PORT}/"), QUERY_CACHE_ENTRIES
+    )
+    snapshot_store.subscribe(query_cache.invalidate)
+
+    rest_server = RestServer(REST_API_PORT)
+    add_snapshot_endpoints(rest_server, snapshot_store)
+    add_metrics_endpoint(rest_server, metrics)
+    add_lookup_endpoints(rest_server, lambda: snapshot_store.artifact("lookup"))
+    add_change_endpoints(rest_server, change_log)
+    add_export_endpoints(
+        rest_server,
+        SnapshotExporter(snapshot_store, ACLINESEGMENT_MRID_NAME_COLUMN),
+        gis_sources[0].table,
+    )
+    add_spatial_endpoints(
+        rest_server,
+        lambda: snapshot_store.artifact("spatial_index"),
+        ACLINESEGMENT_MRID_NAME_COLUMN,
+    )
+    add_query_endpoint(rest_server, query_cache)
+    rest_server.start()
+
+    # Serving the snapshot stored before the restart (if any) until the input files have been parsed
+    snapshot_archive = SnapshotArchive(
+        SNAPSHOT_FOLDER, ["line_state", "non_translatable"]
+    )
+    stored_snapshot = snapshot_archive.load()
+    if stored_snapshot is not None:
+        snapshot_store.publish(*stored_snapshot)
+    snapshot_store.subscribe(snapshot_archive.save)
+
+    # Snapshots are built in the background, and the pipeline is only used by the builder
+    # Parsing the input files in processes started with 'spawn', as forking a process with threads is unsafe.
+    # With a single CPU the processes only add overhead, so the files are parsed in this process instead.
+    ingest_workers = min(INGEST_WORKERS, cpu_count() or 1)
+    ingest_executor = None
+    if ingest_workers > 1:
+        # Imported here, as the process pool is not needed with a single worker
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        ingest_executor = ProcessPoolExecutor(
+            max_workers=ingest_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    pipeline = build_reload_pipeline(
+        ParseCache(CACHE_FOLDER), ingest_executor, gis_sources
+    )
+    pipeline.add_observer(metrics.observe_stage)
+    snapshot_builder = SnapshotBuilder(
+        lambda: build_snapshot_content(pipeline, gis_sources), snapshot_store
+    )
+
+    def snapshot_value(function):
+        # Value of the current snapshot, or NaN if there is no snapshot yet
+        snapshot = snapshot_store.current
+        return function(snapshot) if snapshot is not None else math.nan
+
+    metrics.gauge(
+        "snapshot_version",
+        "Version of the current snapshot.",
+        lambda: snapshot_value(lambda snapshot: snapshot.version),
+    )
+    metrics.gauge(
+        "snapshot_age_seconds",
+        "Seconds since the current snapshot was built.",
+        lambda: snapshot_value(lambda snapshot: time() - snapshot.built_at),
+    )
+    metrics.gauge(
+        "untranslatable_line_names",
+        "Number of GIS line names in the current snapshot that could not be translated (of all sources).",
+        lambda: snapshot_value(
+            lambda snapshot: sum(
+                len(names)
+                for name, names in snapshot.artifacts.items()
+                if name.split(":")[0] == "non_translatable"
             )
+        ),
+    )
+    metrics.gauge(
+        "query_cache_hits",
+        "Number of SQL queries answered from the query cache.",
+        lambda: query_cache.hits,
+    )
+    metrics.gauge(
+        "query_cache_misses",
+        "Number of SQL queries not in the query cache (run on the SQL API or waiting for it).",
+        lambda: query_cache.misses,
+    )
+    metrics.gauge(
+        "snapshot_build_failed",
+        "1 if the last build of a snapshot failed (the previous snapshot is kept), else 0.",
+        lambda: int(snapshot_builder.last_error is not None),
+    )
+    snapshot_builder.start()
+
+    gis_filepaths = list(dict.fromkeys(source.file_path for source in gis_sources))
+    if WEATHER_GRID_FILEPATH:
+        # The weather grid file is required when configured
+        gis_filepaths.append(WEATHER_GRID_FILEPATH)
+    watcher = InputWatcher(
+        gis_filepaths + [ACLINESEGMENT_FILEPATH, GIS_TO_ETS_MAP_FILEPATH],
+        poll_interval=POLL_INTERVAL,
+        debounce=WATCH_DEBOUNCE,
+        mode=FILE_WATCHER,
+    )
+
+    while True:
+        missing_files = [
+            file_path
+            for file_path in gis_filepaths + [ACLINESEGMENT_FILEPATH]
+            if not path.isfile(file_path)
+        ]
+        if not missing_files:
+            # Requesting a new snapshot, which is only built if any of the files have changed
+            snapshot_builder.trigger()
+        else:
+            log.error('Files not found at: "%s"', '", "'.join(missing_files))
 
-        log.debug("Data collection took: %f seconds", round(time() - start_time, 4))
-        sleep(60)
+        # Waiting for new input files (or the poll interval to pass)
+        watcher.wait()
@@ -0,0 +1,247 @@
+import logging
+import math
+import resource
+import threading
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Iterable
+import pandas as pd
+from .rest import RestServer, Request, Response
+
+log = logging.getLogger(__name__)
+
+# Prefix of the names of all metrics
+METRIC_PREFIX = "gis_provider_"
+
+
+def peak_rss() -> int:
+    """
+    Get the peak resident set size of this process in bytes.
+    """
+    # On Linux ru_maxrss is in kilobytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def count_rows(value: Any) -> int | None:
+    """
+    Get the number of rows in the output of a stage, or None if the output has no rows (i.e. a file path).
+
+    For tuples, the rows of the first element with rows are counted (i.e. the dataframe of the GIS stage).
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, dict, list)):
+        return len(value)
+    if isinstance(value, tuple):
+        for element in value:
+            rows = count_rows(element)
+            if rows is not None:
+                return rows
+    return None
+
+
+def frame_memory(value: Any) -> int:
+    """
+    Get the memory (in bytes) used by the dataframes in the output of a stage (in tuples, dicts and lists).
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (tuple, list)):
+        return sum(frame_memory(element) for element in value)
+    if isinstance(value, dict):
+        return sum(frame_memory(element) for element in value.values())
+    return 0
+
+
+@dataclass
+class StageMetrics:
+    """
+    Metrics of the runs of a stage, where the values other than the counters are from the last run.
+    """
+
+    runs: int = 0
+    total_seconds: float = 0.0
+    seconds: float = 0.0
+    input_rows: int = 0
+    output_rows: int = 0
+    peak_rss_delta: int = 0
+    frame_bytes: int = 0
+
+
+class MetricsRegistry:
+    """
+    Collects metrics of the reload stages and other values, and renders them in the Prometheus text format.
+
+    Stages are measured with 'observe_stage', which can be added as an observer to a pipeline. Other values
+    are gauges, set with 'set_gauge' or computed when the metrics are rendered (registered with 'gauge').
+    """
+
+    def __init__(self):
+        self.stages: dict[str, StageMetrics] = {}
+        self._gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe_stage(
+        self, stage: str, inputs: Iterable[Any] = ()
+    ) -> Callable[[Any], None]:
+        """
+        Start measuring a run of a stage.
+
+        The peak RSS delta is the growth of the peak memory of this process during the run, so it is zero
+        for runs that stay below an earlier peak (and does not include memory used in worker processes).
+
+        Parameters
+        ----------
+        stage: str
+            Name of the stage.
+        inputs: Iterable
+            Inputs of the stage (the rows of dataframes, dictionaries and lists are counted).
+
+        Returns
+        -------
+        Callable
+            Function to call with the output of the stage when the run is done.
+        """
+        input_rows = sum(count_rows(value) or 0 for value in inputs)
+        start_rss = peak_rss()
+        start_time = perf_counter()
+
+        def finish(output: Any):
+            seconds = perf_counter() - start_time
+            rss_delta = peak_rss() - start_rss
+            output_rows = count_rows(output) or 0
+            frame_bytes = frame_memory(output)
+            with self._lock:
+                metrics = self.stages.setdefault(stage, StageMetrics())
+                metrics.runs += 1
+                metrics.total_seconds += seconds
+                metrics.seconds = seconds
+                metrics.input_rows = input_rows
+                metrics.output_rows = output_rows
+                metrics.peak_rss_delta = rss_delta
+                metrics.frame_bytes = frame_bytes
+
+        return finish
+
+    def gauge(self, name: str, description: str, function: Callable[[], float]):
+        """
+        Register a gauge computed by a function when the metrics are rendered.
+
+        Parameters
+        ----------
+        name: str
+            Name of the metric (without prefix).
+        description: str
+            Description of the metric.
+        function: Callable
+            Function returning the value (NaN if it is unknown).
+        """
+        self._gauges[name] = (description, function)
+
+    def set_gauge(self, name: str, description: str, value: float):
+        """
+        Set a gauge to a value.
+        """
+        self.gauge(name, description, lambda: value)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+        """
+        with self._lock:
+            stages = {
+                stage: StageMetrics(**vars(metrics))
+                for stage, metrics in self.stages.items()
+            }
+
+        lines = []
+
+        def add(name: str, kind: str, description: str, samples: list[tuple[str, Any]]):
+            lines.append(f"# HELP {METRIC_PREFIX}{name} {description}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{METRIC_PREFIX}{name}{labels} {format_value(value)}")
+
+        for name, kind, attribute, description in [
+            ("stage_runs_total", "counter", "runs", "Number of runs of the stage."),
+            (
+                "stage_duration_seconds_total",
+                "counter",
+                "total_seconds",
+                "Total duration of all runs of the stage.",
+            ),
+            (
+                "stage_duration_seconds",
+                "gauge",
+                "seconds",
+                "Duration of the last run of the stage.",
+            ),
+            (
+                "stage_input_rows",
+                "gauge",
+                "input_rows",
+                "Rows in the inputs of the last run of the stage.",
+            ),
+            (
+                "stage_output_rows",
+                "gauge",
+                "output_rows",
+                "Rows in the output of the last run of the stage.",
+            ),
+            (
+                "stage_peak_rss_delta_bytes",
+                "gauge",
+                "peak_rss_delta",
+                "Growth of the peak resident memory of the process during the last run of the stage.",
+            ),
+            (
+                "stage_frame_memory_bytes",
+                "gauge",
+                "frame_bytes",
+                "Memory used by the dataframes in the output of the last run of the stage.",
+            ),
+        ]:
+            add(
+                name,
+                kind,
+                description,
+                [
+                    (f'{{stage="{stage}"}}', getattr(metrics, attribute))
+                    for stage, metrics in stages.items()
+                ],
+            )
+
+        for name, (description, function) in list(self._gauges.items()):
+            try:
+                value = function()
+            except Exception as e:
+                log.warning('Computing metric "%s" failed with message: %s', name, e)
+                value = math.nan
+            add(name, "gauge", description, [("", value)])
+
+        return "\n".join(lines) + "\n"
+
+
+def format_value(value: float) -> str:
+    """
+    Format a value as in the Prometheus text format.
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value) if isinstance(value, float) else str(int(value))
+
+
+def add_metrics_endpoint(server: RestServer, registry: MetricsRegistry):
+    """
+    Add an endpoint with the metrics in the Prometheus text format to the REST server.
+
+    - GET /metrics
+    """
+
+    def metrics(request: Request) -> Response:
+        return Response(
+            body=registry.render().encode("utf-8"),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+    server.route("/metrics", metrics)
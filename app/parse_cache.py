@@ -0,0 +1,201 @@
+import logging
+import hashlib
+import json
+import mmap
+from os import path, makedirs, listdir, remove, replace, getpid, fstat
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# Size of the blocks read when hashing the content of an input file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: str) -> str:
+    """
+    Calculate a hash of the content of a file.
+
+    The file is memory mapped and hashed block by block, so it is not read into memory as a whole.
+
+    Parameters
+    ----------
+    file_path: str
+        Full path of the file.
+
+    Returns
+    -------
+    str
+        Hex-digest (sha256) of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        # Empty files can not be memory mapped
+        if fstat(file.fileno()).st_size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    for start in range(0, len(view), HASH_BLOCK_SIZE):
+                        end = start + HASH_BLOCK_SIZE
+                        digest.update(view[start:end])
+
+    return digest.hexdigest()
+
+
+class SourceFile(str):
+    """
+    Path of an input file, with the hash of its content when it was last checked (see 'file_digest').
+
+    Behaves as the path, so it can be passed to any function taking a path, while parse functions can use
+    the digest as cache key instead of hashing the file again.
+    """
+
+    digest: str | None
+
+    def __new__(cls, file_path: str, digest: str | None = None):
+        source_file = super().__new__(cls, file_path)
+        source_file.digest = digest
+        return source_file
+
+    def __reduce__(self):
+        return SourceFile, (str(self), self.digest)
+
+
+def source_digest(file_path: str) -> str:
+    """
+    Get the hash of the content of a file, reusing the digest of a SourceFile.
+    """
+    if isinstance(file_path, SourceFile) and file_path.digest is not None:
+        return file_path.digest
+    return file_digest(file_path)
+
+
+class ParseCache:
+    """
+    Persistent cache of parsed input data, stored as feather (Arrow IPC) files.
+
+    Each entry is stored in a 'slot' (i.e. 'gis_sheet') under a key built from the hash of the input
+    file content and the settings used for parsing it. Only the newest entry of each slot is kept on disk,
+    so the cache does not grow when new files arrive.
+
+    Parameters
+    ----------
+    folder: str
+        Folder to store the cache in. If empty, the cache is disabled.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.enabled = bool(folder)
+
+        if self.enabled:
+            try:
+                makedirs(folder, exist_ok=True)
+            except OSError as e:
+                log.warning(
+                    'Cache folder "%s" could not be created, caching is disabled: %s',
+                    folder,
+                    e,
+                )
+                self.enabled = False
+
+    @staticmethod
+    def key(digest: str, **settings) -> str:
+        """
+        Build a cache key from a file digest (or another key) and the settings used for parsing.
+
+        Parameters
+        ----------
+        digest: str
+            Hash of the file content, or key of the entry the new entry is derived from.
+        **settings
+            Settings that affect the parsed result (i.e. sheet name, regex and column name).
+
+        Returns
+        -------
+        str
+            The cache key.
+        """
+        settings_text = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha256(f"{digest}|{settings_text}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, slot: str, key: str) -> str:
+        return path.join(self.folder, f"{slot}-{key}.feather")
+
+    def load(self, slot: str, key: str) -> pd.DataFrame | None:
+        """
+        Load a dataframe from the cache.
+
+        Parameters
+        ----------
+        slot: str
+            Name of the slot the entry is stored in.
+        key: str
+            Key of the entry.
+
+        Returns
+        -------
+        pd.DataFrame | None
+            The cached dataframe, or None if it is not found in the cache.
+        """
+        if not self.enabled:
+            return None
+
+        entry_path = self._entry_path(slot, key)
+        if not path.isfile(entry_path):
+            return None
+
+        try:
+            dataframe = pd.read_feather(entry_path)
+            log.info('Loaded "%s" from cache.', slot)
+        except Exception as e:
+            log.warning(
+                'Cached "%s" in "%s" could not be read: %s', slot, entry_path, e
+            )
+            return None
+
+        return dataframe
+
+    def store(self, slot: str, key: str, dataframe: pd.DataFrame):
+        """
+        Store a dataframe in the cache, replacing any older entry in the same slot.
+
+        Failing to store an entry is logged but otherwise ignored, as the cache is only an optimization.
+
+        Parameters
+        ----------
+        slot: str
+            Name of the slot the entry is stored in.
+        key: str
+            Key of the entry.
+        dataframe: pd.DataFrame
+            Dataframe to store (must have a default index).
+        """
+        if not self.enabled:
+            return
+
+        entry_path = self._entry_path(slot, key)
+        temp_path = f"{entry_path}.{getpid()}.tmp"
+        try:
+            # Writing to a temporary file first, so a half written entry is never read
+            dataframe.to_feather(temp_path)
+            replace(temp_path, entry_path)
+        except Exception as e:
+            log.warning('Storing "%s" in cache failed with message: %s', slot, e)
+            if path.isfile(temp_path):
+                remove(temp_path)
+            return
+
+        # Removing older entries in the same slot
+        for file_name in listdir(self.folder):
+            if (
+                file_name.startswith(f"{slot}-")
+                and path.join(self.folder, file_name) != entry_path
+            ):
+                try:
+                    remove(path.join(self.folder, file_name))
+                except OSError as e:
+                    log.warning(
+                        'Removing old cache entry "%s" failed: %s', file_name, e
+                    )
+
+        log.debug('Stored "%s" in cache as "%s".', slot, entry_path)
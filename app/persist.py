@@ -0,0 +1,182 @@
+import logging
+import json
+from os import path, makedirs, listdir, remove, replace, getpid
+from typing import Callable
+import pandas as pd
+import pyarrow.feather as feather
+from .snapshot import Snapshot
+
+log = logging.getLogger(__name__)
+
+# Name of the file with the metadata of the stored snapshot
+METADATA_FILE = "snapshot.json"
+
+
+class SnapshotArchive:
+    """
+    Stores the last published snapshot on disk, so it can be served right after a restart.
+
+    The tables (and the dataframe artifacts listed in 'artifacts') are stored as feather (Arrow IPC) files
+    named by the snapshot version, and the version, build time and file names in a metadata file. The
+    metadata file is replaced last, so a snapshot is only loaded once all of its files are written. Other
+    artifacts listed in 'artifacts' must be JSON serializable (i.e. lists of names), and are stored in the
+    metadata file. Artifacts not listed are not stored, and must be rebuilt from the input files.
+
+    Parameters
+    ----------
+    folder: str
+        Folder to store the snapshot in. If empty, storing is disabled.
+    artifacts: list[str]
+        Names of the artifacts to store with the tables.
+    """
+
+    def __init__(self, folder: str, artifacts: list[str] = ()):
+        self.folder = folder
+        self.artifacts = list(artifacts)
+        self.enabled = bool(folder)
+
+        if self.enabled:
+            try:
+                makedirs(folder, exist_ok=True)
+            except OSError as e:
+                log.warning(
+                    'Snapshot folder "%s" could not be created, storing snapshots is disabled: %s',
+                    folder,
+                    e,
+                )
+                self.enabled = False
+
+    def _write(self, file_name: str, write: Callable[[str], None]):
+        # Writing to a temporary file first, so a half written file is never read
+        file_path = path.join(self.folder, file_name)
+        temp_path = f"{file_path}.{getpid()}.tmp"
+        try:
+            write(temp_path)
+            replace(temp_path, file_path)
+        finally:
+            if path.isfile(temp_path):
+                remove(temp_path)
+
+    def save(self, snapshot: Snapshot):
+        """
+        Store a snapshot, replacing the stored snapshot.
+
+        Failing to store the snapshot is logged but otherwise ignored, as the stored snapshot is only used
+        until the input files are parsed after a restart.
+        """
+        if not self.enabled:
+            return
+
+        metadata = {
+            "version": snapshot.version,
+            "built_at": snapshot.built_at,
+            "tables": {},
+            "frames": {},
+            "artifacts": {},
+        }
+        try:
+            for name, table in snapshot.tables.items():
+                file_name = f"{snapshot.version}-table-{name}.feather"
+                self._write(file_name, table.reset_index(drop=True).to_feather)
+                metadata["tables"][name] = file_name
+            for name in self.artifacts:
+                artifact = snapshot.artifacts.get(name)
+                if isinstance(artifact, pd.DataFrame):
+                    # Feather only stores columns, so the index is stored as columns
+                    file_name = f"{snapshot.version}-artifact-{name}.feather"
+                    frame = artifact.reset_index()
+                    self._write(file_name, frame.to_feather)
+                    metadata["frames"][name] = {
+                        "file": file_name,
+                        "index": list(frame.columns[: artifact.index.nlevels]),
+                        "names": list(artifact.index.names),
+                    }
+                elif artifact is not None:
+                    metadata["artifacts"][name] = artifact
+
+            def write_metadata(file_path: str):
+                with open(file_path, "w") as file:
+                    json.dump(metadata, file)
+
+            self._write(METADATA_FILE, write_metadata)
+        except Exception as e:
+            log.warning(
+                "Storing snapshot version %d failed with message: %s",
+                snapshot.version,
+                e,
+            )
+            return
+        finally:
+            self._remove_old_files()
+
+        log.info('Stored snapshot version %d in "%s".', snapshot.version, self.folder)
+
+    def _remove_old_files(self):
+        # Removing the files of other versions (and of this version, if it was not stored completely)
+        stored_version = self.stored_version()
+        for file_name in listdir(self.folder):
+            prefix = file_name.split("-", 1)[0]
+            if file_name.endswith(".feather") and prefix != str(stored_version):
+                try:
+                    remove(path.join(self.folder, file_name))
+                except OSError as e:
+                    log.warning(
+                        'Removing old snapshot file "%s" failed: %s', file_name, e
+                    )
+
+    def _metadata(self) -> dict | None:
+        metadata_path = path.join(self.folder, METADATA_FILE)
+        if not self.enabled or not path.isfile(metadata_path):
+            return None
+        with open(metadata_path) as file:
+            return json.load(file)
+
+    def stored_version(self) -> int | None:
+        """
+        Get the version of the stored snapshot (None if there is none).
+        """
+        try:
+            metadata = self._metadata()
+        except (OSError, ValueError):
+            return None
+        return metadata["version"] if metadata is not None else None
+
+    def load(self) -> tuple[dict[str, pd.DataFrame], dict, float, int] | None:
+        """
+        Load the stored snapshot.
+
+        Returns
+        -------
+        tuple[dict[str, pd.DataFrame], dict, float, int] | None
+            Tables, stored artifacts, build time and version of the snapshot (as arguments for
+            'SnapshotStore.publish'), or None if no snapshot is stored or it could not be read.
+        """
+        try:
+            metadata = self._metadata()
+            if metadata is None:
+                return None
+
+            def read(file_name: str) -> pd.DataFrame:
+                # Memory mapping the files instead of reading them into buffers first
+                return feather.read_table(
+                    path.join(self.folder, file_name), memory_map=True
+                ).to_pandas()
+
+            tables = {
+                name: read(file_name) for name, file_name in metadata["tables"].items()
+            }
+            artifacts = dict(metadata["artifacts"])
+            for name, frame in metadata["frames"].items():
+                artifacts[name] = (
+                    read(frame["file"])
+                    .set_index(frame["index"])
+                    .rename_axis(frame["names"])
+                )
+        except Exception as e:
+            log.warning('Stored snapshot in "%s" could not be read: %s', self.folder, e)
+            return None
+
+        log.info(
+            'Loaded snapshot version %d from "%s".', metadata["version"], self.folder
+        )
+        return tables, artifacts, metadata["built_at"], metadata["version"]
@@ -0,0 +1,312 @@
+import logging
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from os import stat
+from time import perf_counter
+from typing import Any, Callable
+from .parse_cache import SourceFile, file_digest
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Node:
+    """
+    A node in the pipeline graph, either a source (input file) or a stage.
+
+    The version of a node is increased every time its output changes. Stages are recomputed when the
+    versions of their inputs differ from the versions their cached output was computed from.
+    """
+
+    name: str
+    inputs: list[str] = field(default_factory=list)
+    function: Callable[..., Any] | None = None
+    # Stages with compare set will not bump their version if the new output is equal to the old output
+    compare: bool = False
+    # Stages with parallel set are run in the executor of the pipeline (if it has one)
+    parallel: bool = False
+    version: int = 0
+    fingerprint: Any = None
+    output: Any = None
+
+
+class Pipeline:
+    """
+    Dependency graph of reload stages, where the output of each stage is cached together with the
+    versions of its inputs. Running the pipeline only recomputes the stages downstream of changed sources.
+
+    Sources are files fingerprinted by the hash of their content, so a file that is touched or rewritten
+    with the same content does not cause any recomputation, while changed content is found regardless of
+    the modification time. Files are only hashed when their modification time or size has changed since
+    the last run. The output of a source is its file path (as a SourceFile with the digest of the content),
+    so stages depending on a source receive the path as argument.
+
+    Parameters
+    ----------
+    executor: Executor
+        Executor for running the parallel stages that only depend on sources (i.e. parsing input files)
+        concurrently. If None, all stages are run one by one in the calling thread. The functions and
+        arguments of parallel stages must be picklable if the executor is a process pool.
+    """
+
+    def __init__(self, executor: Executor | None = None):
+        self.nodes: dict[str, Node] = {}
+        self.order: list[str] = []
+        self.executor = executor
+        self.observers: list[Callable[[str, list], Callable[[Any], None]]] = []
+        self.marks: dict[str, dict[str, int]] = {}
+
+    def add_source(self, name: str, file_path: str):
+        """
+        Add an input file to the pipeline.
+
+        Parameters
+        ----------
+        name: str
+            Name of the source.
+        file_path: str
+            Full path of the file.
+        """
+        self._add_node(Node(name=name, output=file_path))
+
+    def add_stage(
+        self,
+        name: str,
+        function: Callable[..., Any],
+        inputs: list[str],
+        compare: bool = False,
+        parallel: bool = False,
+    ):
+        """
+        Add a stage to the pipeline.
+
+        Parameters
+        ----------
+        name: str
+            Name of the stage.
+        function: Callable
+            Function computing the output of the stage, called with the outputs of the inputs as arguments.
+        inputs: list[str]
+            Names of the sources and stages the stage depends on (must be added before the stage).
+        compare: bool
+            If True, downstream stages are not recomputed when the new output equals the previous output.
+            Only use this for outputs that are cheap to compare (i.e. dictionaries of names).
+        parallel: bool
+            If True, and all inputs are sources, the stage is run in the executor of the pipeline
+            concurrently with the other parallel stages.
+        """
+        for input_name in inputs:
+            if input_name not in self.nodes:
+                raise ValueError(
+                    'Input "%s" of stage "%s" is not in the pipeline.', input_name, name
+                )
+        self._add_node(
+            Node(
+                name=name,
+                inputs=inputs,
+                function=function,
+                compare=compare,
+                parallel=parallel,
+            )
+        )
+
+    def _add_node(self, node: Node):
+        if node.name in self.nodes:
+            raise ValueError('"%s" is already in the pipeline.', node.name)
+        # Inputs must be added before the node, so the order of adding is a topological order
+        self.nodes[node.name] = node
+        self.order.append(node.name)
+
+    def add_observer(self, observer: Callable[[str, list], Callable[[Any], None]]):
+        """
+        Add an observer of the stage runs (i.e. for collecting metrics).
+
+        The observer is called with the name and the inputs of a stage when it starts, and must return a
+        function which is called with the output of the stage when it is done (not if the stage fails).
+        Parallel stages start when they are submitted to the executor.
+        """
+        self.observers.append(observer)
+
+    def _observe(self, node: Node, inputs: list) -> list[Callable[[Any], None]]:
+        return [observer(node.name, inputs) for observer in self.observers]
+
+    def __getitem__(self, name: str) -> Any:
+        return self.nodes[name].output
+
+    def set_mark(self, mark: str, names: list[str]):
+        """
+        Record the versions of the outputs of stages (i.e. the outputs that have been published).
+
+        Parameters
+        ----------
+        mark: str
+            Name of the mark.
+        names: list[str]
+            Names of the sources and stages.
+        """
+        self.marks[mark] = {name: self.nodes[name].version for name in names}
+
+    def changed_since_mark(self, mark: str, names: list[str]) -> list[str]:
+        """
+        Get the stages whose output has changed since their versions were recorded with 'set_mark'.
+
+        Unlike the list returned by 'run', this includes stages recomputed by earlier runs that failed
+        before the outputs were used.
+
+        Parameters
+        ----------
+        mark: str
+            Name of the mark.
+        names: list[str]
+            Names of the sources and stages.
+
+        Returns
+        -------
+        list[str]
+            Names of the changed sources and stages (all of them if the mark has not been set).
+        """
+        versions = self.marks.get(mark, {})
+        return [
+            name for name in names if versions.get(name) != self.nodes[name].version
+        ]
+
+    def downstream(self, name: str) -> list[str]:
+        """
+        Get the stages depending (directly or indirectly) on a source or stage.
+
+        Parameters
+        ----------
+        name: str
+            Name of the source or stage.
+
+        Returns
+        -------
+        list[str]
+            Names of the depending stages, in the order they are computed.
+        """
+        affected = {name}
+        for node_name in self.order:
+            if affected.intersection(self.nodes[node_name].inputs):
+                affected.add(node_name)
+        affected.discard(name)
+        return [node_name for node_name in self.order if node_name in affected]
+
+    @staticmethod
+    def _source_fingerprint(file_path: str, fingerprint: tuple | None) -> tuple | None:
+        """Get the modification time, size and content hash of a file (None if it does not exist)."""
+        try:
+            file_stat = stat(file_path)
+            file_key = (file_stat.st_mtime_ns, file_stat.st_size)
+            # Only hashing the content if the modification time or size has changed
+            if fingerprint is not None and fingerprint[:2] == file_key:
+                return fingerprint
+            return (*file_key, file_digest(file_path))
+        except FileNotFoundError:
+            return None
+
+    def _submit_parallel_stages(
+        self,
+    ) -> dict[str, tuple[Future, list[Callable[[Any], None]]]]:
+        """Submit the parallel stages with changed sources as inputs to the executor."""
+        futures = {}
+        if self.executor is None:
+            return futures
+        for node in (self.nodes[node_name] for node_name in self.order):
+            if not node.parallel or any(
+                self.nodes[name].function is not None for name in node.inputs
+            ):
+                continue
+            fingerprint = tuple(self.nodes[name].version for name in node.inputs)
+            if fingerprint != node.fingerprint:
+                inputs = [self.nodes[name].output for name in node.inputs]
+                futures[node.name] = (
+                    self.executor.submit(node.function, *inputs),
+                    self._observe(node, inputs),
+                )
+        return futures
+
+    def _fingerprint_sources(self) -> set[str]:
+        """Fingerprint the source files, and increase the version of the sources with changed content."""
+        changed_sources = set()
+        for node in self.nodes.values():
+            if node.function is not None:
+                continue
+            fingerprint = self._source_fingerprint(node.output, node.fingerprint)
+            digest = fingerprint[2] if fingerprint is not None else None
+            old_fingerprint, node.fingerprint = node.fingerprint, fingerprint
+            old_digest = old_fingerprint[2] if old_fingerprint is not None else None
+            if node.version > 0 and digest == old_digest:
+                if fingerprint != old_fingerprint:
+                    log.info(
+                        '"%s" was modified, but its content did not change.',
+                        node.output,
+                    )
+                continue
+            node.output = SourceFile(node.output, digest)
+            node.version += 1
+            changed_sources.add(node.name)
+        return changed_sources
+
+    def _run_stage(
+        self,
+        node: Node,
+        fingerprint: tuple,
+        futures: dict[str, tuple[Future, list[Callable[[Any], None]]]],
+    ):
+        """Compute the output of a stage (or get it from its submitted future), and update its version."""
+        start_time = perf_counter()
+        if node.name in futures:
+            future, finishers = futures.pop(node.name)
+            output = future.result()
+        else:
+            inputs = [self.nodes[name].output for name in node.inputs]
+            finishers = self._observe(node, inputs)
+            output = node.function(*inputs)
+        log.debug(
+            'Stage "%s" took: %f seconds',
+            node.name,
+            perf_counter() - start_time,
+        )
+        for finish in finishers:
+            finish(output)
+
+        node.fingerprint = fingerprint
+        if node.compare and node.version > 0 and output == node.output:
+            log.debug('Output of stage "%s" did not change.', node.name)
+            return
+        node.output = output
+        node.version += 1
+
+    def run(self) -> list[str]:
+        """
+        Recompute the stages affected by changed sources.
+
+        If a stage fails, the exception is raised and the stages depending on it are not computed.
+        Stages computed before the failure keep their new output, and the failed stage is retried on the
+        next run.
+
+        Returns
+        -------
+        list[str]
+            Names of the sources that changed and the stages that were recomputed, in order.
+        """
+        changed_sources = self._fingerprint_sources()
+        futures = self._submit_parallel_stages()
+        updated = []
+        try:
+            for node in (self.nodes[node_name] for node_name in self.order):
+                if node.function is None:
+                    if node.name in changed_sources:
+                        updated.append(node.name)
+                    continue
+
+                fingerprint = tuple(self.nodes[name].version for name in node.inputs)
+                if fingerprint != node.fingerprint:
+                    self._run_stage(node, fingerprint, futures)
+                    updated.append(node.name)
+        finally:
+            # Parallel stages not reached because of a failure are run again on the next run
+            for future, _ in futures.values():
+                future.cancel()
+
+        return updated
@@ -0,0 +1,276 @@
+import logging
+import gzip
+import hashlib
+import json
+import re
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable
+from .rest import RestServer, Request, Response, HTTPError
+from .snapshot import Snapshot
+
+log = logging.getLogger(__name__)
+
+# Quoted strings and identifiers and comments (kept as they are, line comments with the line break ending
+# them) or runs of whitespace in a query
+QUERY_TOKEN_REGEX = re.compile(
+    r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*(?:\n|$)|/\*.*?\*/)|\s+""", re.DOTALL
+)
+# Responses smaller than this (bytes) are not compressed, as the saving is less than the header overhead
+MIN_GZIP_SIZE = 1024
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize the text of an SQL query, so queries only differing by whitespace (outside quotes and
+    comments) and a trailing semicolon are the same. Only used as cache key, the query is run as given.
+    """
+    query = QUERY_TOKEN_REGEX.sub(lambda match: match.group(1) or " ", query)
+    return query.strip().rstrip(";").rstrip()
+
+
+@dataclass
+class QueryResult:
+    """
+    Serialized result of a query.
+
+    Parameters
+    ----------
+    status: int
+        HTTP status of the result.
+    content_type: str
+        Content type of the body.
+    body: bytes
+        The serialized result.
+    """
+
+    status: int
+    content_type: str
+    body: bytes
+
+
+class CachedResult:
+    """
+    A cached query result, with its ETag and (once requested) its gzip compressed body.
+    """
+
+    def __init__(self, version: int, result: QueryResult):
+        self.version = version
+        self.result = result
+        self.etag = f'"{hashlib.blake2b(result.body, digest_size=16).hexdigest()}"'
+        self._gzip_body = None
+
+    def gzip_body(self) -> bytes:
+        # Compressed once, on the first request accepting gzip (assigning the same bytes twice is harmless)
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.result.body, mtime=0)
+        return self._gzip_body
+
+
+def forward_sql_query(url: str, timeout: float = 60) -> Callable[[str], QueryResult]:
+    """
+    Create a function running SQL queries on the SQL API (DataFrameAPI) at a URL.
+    """
+
+    def execute(query: str) -> QueryResult:
+        request = urllib.request.Request(
+            url,
+            data=json.dumps({"sql-query": query}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                status, headers, body = (
+                    response.status,
+                    response.headers,
+                    response.read(),
+                )
+        except urllib.error.HTTPError as e:
+            status, headers, body = e.code, e.headers, e.read()
+        except OSError as e:
+            raise HTTPError(502, f"The SQL API could not be reached: {e}")
+        return QueryResult(
+            status, headers.get("Content-Type", "application/json"), body
+        )
+
+    return execute
+
+
+class QueryCache:
+    """
+    LRU cache of serialized SQL query results, keyed by the normalized query and the snapshot version.
+
+    The cache is cleared when a new snapshot is published (subscribe 'invalidate' to the snapshot store after
+    the tables are passed to the SQL API), so the results of a version are only computed once. Concurrent
+    requests for a query that is not cached wait for the first of them, instead of all running the query.
+    Only successful results are cached.
+
+    Parameters
+    ----------
+    execute: Callable[[str], QueryResult]
+        Function running a query, i.e. made by 'forward_sql_query'.
+    max_entries: int
+        Max. number of cached results (0 disables caching).
+    """
+
+    def __init__(self, execute: Callable[[str], QueryResult], max_entries: int = 128):
+        self.execute = execute
+        self.max_entries = max_entries
+        self.version: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[str, CachedResult] = OrderedDict()
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, snapshot: Snapshot):
+        """
+        Drop the cached results, as the SQL API now serves the tables of the snapshot.
+        """
+        with self._lock:
+            self.version = snapshot.version
+            self._results.clear()
+
+    def get(self, query: str) -> CachedResult:
+        """
+        Get the result of a query from the cache, or run it and cache the result.
+
+        Parameters
+        ----------
+        query: str
+            The SQL query.
+
+        Returns
+        -------
+        CachedResult
+            The result, with the snapshot version it was computed from.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            version = self.version
+            if version is None:
+                raise HTTPError(503, "No GIS data has been loaded yet.")
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+            future = self._pending.get(key)
+            first = future is None
+            if first:
+                future = self._pending[key] = Future()
+
+        if not first:
+            return future.result()
+
+        try:
+            cached = CachedResult(version, self.execute(query))
+            future.set_result(cached)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+                # Results of an older version (published while the query ran) are not cached
+                if (
+                    future.exception() is None
+                    and cached.result.status == 200
+                    and self.version == version
+                    and self.max_entries > 0
+                ):
+                    self._results[key] = cached
+                    while len(self._results) > self.max_entries:
+                        self._results.popitem(last=False)
+        log.debug(
+            "Query of snapshot version %d was run (%d bytes): %s",
+            version,
+            len(cached.result.body),
+            query,
+        )
+        return cached
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Check if the Accept-Encoding header of a request accepts gzip.
+    """
+    for coding in accept_encoding.split(","):
+        name, _, parameters = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = parameters.strip().lower().removeprefix("q=")
+            try:
+                return not parameters.strip() or float(quality) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def add_query_endpoint(server: RestServer, cache: QueryCache):
+    """
+    Add an endpoint running SQL queries on the tables of the SQL API through the query cache.
+
+    - GET /query?sql=..
+    - POST /query with the body {"sql-query": ".."} (as the SQL API)
+
+    Responses carry an ETag (of the result), and requests with the ETag in If-None-Match get an empty
+    304 response while the result is unchanged. Results are gzip compressed for clients accepting it.
+
+    Parameters
+    ----------
+    server: RestServer
+        Server to add the endpoint to.
+    cache: QueryCache
+        Cache of the query results.
+    """
+
+    def respond(request: Request, query: str) -> Response:
+        cached = cache.get(query)
+        result = cached.result
+        if result.status != 200:
+            return Response(result.body, result.status, result.content_type)
+
+        compress = len(result.body) >= MIN_GZIP_SIZE and accepts_gzip(
+            request.headers.get("accept-encoding", "")
+        )
+        # The compressed body is another representation, so it has its own ETag
+        etag = f'{cached.etag[:-1]}-gzip"' if compress else cached.etag
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+            "X-Snapshot-Version": str(cached.version),
+        }
+        if_none_match = request.headers.get("if-none-match", "")
+        matches = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if etag in matches or "*" in matches:
+            return Response(
+                status=304, content_type=result.content_type, headers=headers
+            )
+
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+            return Response(cached.gzip_body(), 200, result.content_type, headers)
+        return Response(result.body, 200, result.content_type, headers)
+
+    def get_query(request: Request) -> Response:
+        return respond(request, request.parameter("sql"))
+
+    def post_query(request: Request) -> Response:
+        try:
+            query = json.loads(request.body)["sql-query"]
+        except (ValueError, KeyError, TypeError):
+            raise HTTPError(400, 'Body must be JSON with the query as "sql-query".')
+        return respond(request, str(query))
+
+    server.route("/query", get_query)
+    server.route("/query", post_query, method="POST")
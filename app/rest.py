@@ -0,0 +1,164 @@
+import logging
+import json
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import urlsplit, parse_qs
+
+log = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    """
+    Raised by endpoints to return an error response.
+
+    Parameters
+    ----------
+    status: int
+        HTTP status code.
+    message: str
+        Error message returned to the client.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: bytes = b""
+
+    def parameter(self, name: str, type_: type = str, default=None):
+        """
+        Get a query parameter converted to a type, raising a 400 error if it is missing or invalid.
+        """
+        if name not in self.query:
+            if default is None:
+                raise HTTPError(400, f"Missing query parameter '{name}'.")
+            return default
+        try:
+            return type_(self.query[name])
+        except ValueError:
+            raise HTTPError(
+                400, f"Query parameter '{name}' must be of type {type_.__name__}."
+            )
+
+
+@dataclass
+class Response:
+    body: bytes | memoryview = b""
+    status: int = 200
+    content_type: str = "application/json"
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def json_response(data, status: int = 200) -> Response:
+    """
+    Create a response with data serialized as JSON.
+    """
+    return Response(
+        body=json.dumps(data, ensure_ascii=False, default=str).encode("utf-8"),
+        status=status,
+    )
+
+
+class RestServer:
+    """
+    Small HTTP server (running in a background thread) for the REST endpoints of the application.
+
+    Endpoints are functions taking a Request and returning a Response, registered on a path with 'route'.
+
+    Parameters
+    ----------
+    port: int
+        Port to listen on.
+    """
+
+    def __init__(self, port: int):
+        self.port = port
+        self.routes: dict[tuple[str, str], Callable[[Request], Response]] = {}
+        self._server = None
+
+    def route(
+        self, path: str, endpoint: Callable[[Request], Response], method: str = "GET"
+    ):
+        """
+        Register an endpoint on a path.
+        """
+        self.routes[(method, path)] = endpoint
+
+    def handle(self, request: Request) -> Response:
+        """
+        Call the endpoint registered for a request, and convert errors to error responses.
+        """
+        endpoint = self.routes.get((request.method, request.path))
+        if endpoint is None:
+            return json_response({"error": f"No endpoint at '{request.path}'."}, 404)
+        try:
+            return endpoint(request)
+        except HTTPError as e:
+            return json_response({"error": e.message}, e.status)
+        except Exception as e:
+            log.exception('Request to "%s" failed with message: %s', request.path, e)
+            return json_response({"error": "Internal server error."}, 500)
+
+    def start(self):
+        """
+        Start serving requests in a background thread.
+        """
+        rest_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self, method: str, send_body: bool = True):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                request = Request(
+                    method=method,
+                    path=url.path,
+                    query={k: v[-1] for k, v in parse_qs(url.query).items()},
+                    headers={k.lower(): v for k, v in self.headers.items()},
+                    body=self.rfile.read(length) if length else b"",
+                )
+                response = rest_server.handle(request)
+
+                self.send_response(response.status)
+                self.send_header("Content-Type", response.content_type)
+                self.send_header("Content-Length", str(len(response.body)))
+                for name, value in response.headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(response.body)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_HEAD(self):
+                self._handle("GET", send_body=False)
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def log_message(self, format, *args):
+                log.debug("%s - %s", self.address_string(), format % args)
+
+        self._server = ThreadingHTTPServer(("", self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        log.info("Started REST API on port %d", self.port)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
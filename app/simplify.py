@@ -0,0 +1,161 @@
+import logging
+import numpy as np
+import pandas as pd
+from .geometry import LineGeometry
+from .projection import UTM32N
+
+log = logging.getLogger(__name__)
+
+
+def point_significance(
+    x: np.ndarray, y: np.ndarray, offsets: np.ndarray, min_tolerance: float
+) -> np.ndarray:
+    """
+    Find the largest Douglas-Peucker tolerance each point of the lines is kept at.
+
+    The Douglas-Peucker algorithm keeps the end points of a line, and splits it at the point farthest from
+    the segment between them if that point is farther than the tolerance, continuing with both parts. The
+    point splitting a part does not depend on the tolerance, so a point is kept if its distance and the
+    distances of the points splitting the parts it is in are all above the tolerance. The smallest of these
+    distances is the significance of the point, and the simplification at any tolerance is the points with
+    a significance above it.
+
+    The parts of all lines are split at the same time, each round taking the distances of all points in
+    all parts at once. Parts are not split further once no point is farther than 'min_tolerance'.
+
+    Parameters
+    ----------
+    x: np.ndarray
+        Planar x coordinates of the points (i.e. metres), line after line.
+    y: np.ndarray
+        Planar y coordinates of the points.
+    offsets: np.ndarray
+        Index of the first point of each line, and the number of points at the end.
+    min_tolerance: float
+        Smallest tolerance the significance is needed for.
+
+    Returns
+    -------
+    np.ndarray
+        Significance of each point (infinite for end points of lines, 0 for points not kept at
+        'min_tolerance').
+    """
+    significance = np.zeros(len(x))
+    lengths = np.diff(offsets)
+    significance[offsets[:-1][lengths > 0]] = np.inf
+    significance[offsets[1:][lengths > 0] - 1] = np.inf
+
+    # Parts of the lines as the index of their first and last point, and the significance of the parts
+    # they were split from
+    start = offsets[:-1][lengths > 2]
+    end = offsets[1:][lengths > 2] - 1
+    bound = np.full(len(start), np.inf)
+    while len(start):
+        # Distances of all points within the parts from the segment between the end points of their part
+        counts = end - start - 1
+        part = np.repeat(np.arange(len(start)), counts)
+        part_offsets = np.cumsum(counts) - counts
+        point = start[part] + 1 + np.arange(len(part)) - part_offsets[part]
+        distance = segment_distance(
+            x[point],
+            y[point],
+            x[start][part],
+            y[start][part],
+            x[end][part],
+            y[end][part],
+        )
+
+        # Splitting the parts at the first of their farthest points
+        max_distance = np.maximum.reduceat(distance, part_offsets)
+        farthest = np.flatnonzero(
+            (distance == max_distance[part]) & (max_distance[part] > min_tolerance)
+        )
+        split_parts, first = np.unique(part[farthest], return_index=True)
+        split_point = point[farthest[first]]
+        split_significance = np.minimum(max_distance[split_parts], bound[split_parts])
+        significance[split_point] = split_significance
+
+        # Continuing with the parts on both sides of the split points that have points within them
+        start = np.concatenate([start[split_parts], split_point])
+        end = np.concatenate([split_point, end[split_parts]])
+        bound = np.concatenate([split_significance, split_significance])
+        within = end - start > 1
+        start, end, bound = start[within], end[within], bound[within]
+
+    return significance
+
+
+def segment_distance(
+    px: np.ndarray,
+    py: np.ndarray,
+    ax: np.ndarray,
+    ay: np.ndarray,
+    bx: np.ndarray,
+    by: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculate the distance of points p from the segments a-b (0 for points without coordinates).
+    """
+    dx, dy = bx - ax, by - ay
+    squared_length = dx**2 + dy**2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.clip(((px - ax) * dx + (py - ay) * dy) / squared_length, 0, 1)
+    # Segments of a single point (a line returning to its start) have the distance to that point
+    t = np.where(squared_length > 0, t, 0)
+    return np.nan_to_num(np.hypot(px - ax - t * dx, py - ay - t * dy))
+
+
+def simplify_lines(
+    geometry: LineGeometry,
+    tolerances: list[int],
+    mrid_column: str,
+    order_column: str,
+    coordinate_columns: list[str],
+) -> dict[int, pd.DataFrame]:
+    """
+    Simplify the polylines of all lines with the Douglas-Peucker algorithm at several tolerances.
+
+    Distances are measured in metres in UTM zone 32N, and the significance of the points is found once for
+    all tolerances.
+
+    Parameters
+    ----------
+    geometry: LineGeometry
+        Geometry of the lines.
+    tolerances: list[int]
+        Tolerances (metres) to simplify the lines at.
+    mrid_column: str
+        Name of the MRID column of the tables.
+    order_column: str
+        Name of the column with the order of the points (i.e. OBJECTID).
+    coordinate_columns: list[str]
+        Names of the longitude and latitude columns of the tables.
+
+    Returns
+    -------
+    dict[int, pd.DataFrame]
+        Table of the points kept at each tolerance (MRID, order and coordinates), ordered by line and
+        order of the points.
+    """
+    x, y = UTM32N.project(geometry.longitude, geometry.latitude)
+    significance = point_significance(x, y, geometry.offsets, min(tolerances))
+    point_line = np.repeat(np.arange(len(geometry)), np.diff(geometry.offsets))
+
+    tables = {}
+    for tolerance in tolerances:
+        kept = significance > tolerance
+        tables[tolerance] = pd.DataFrame(
+            {
+                mrid_column: geometry.mrids[point_line[kept]],
+                order_column: geometry.objectid[kept],
+                coordinate_columns[0]: geometry.longitude[kept],
+                coordinate_columns[1]: geometry.latitude[kept],
+            }
+        )
+        log.debug(
+            "Simplified lines at %d m keep %d of %d points.",
+            tolerance,
+            kept.sum(),
+            len(kept),
+        )
+    return tables
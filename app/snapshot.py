@@ -0,0 +1,213 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from time import time, perf_counter
+from typing import Any, Callable
+import pandas as pd
+from .rest import RestServer, Request, Response, HTTPError, json_response
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    A complete, immutable set of published data.
+
+    Parameters
+    ----------
+    version: int
+        Version number, increased by one for every published snapshot.
+    built_at: float
+        Time (unix timestamp) the snapshot was built.
+    tables: dict[str, pd.DataFrame]
+        Tables published through the API, by table name.
+    artifacts: dict[str, Any]
+        Other data built with the tables (i.e. geometry and indexes), by name.
+    """
+
+    version: int
+    built_at: float
+    tables: dict[str, pd.DataFrame] = field(default_factory=dict)
+    artifacts: dict[str, Any] = field(default_factory=dict)
+
+
+class SnapshotStore:
+    """
+    Holds the current snapshot.
+
+    A new snapshot replaces the current one with a single reference assignment, so readers always see either
+    the old or the new snapshot as a whole. Readers should get 'current' once per request and use that
+    snapshot throughout.
+    """
+
+    def __init__(self):
+        self.current: Snapshot | None = None
+        self._listeners: list[Callable[[Snapshot], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: Callable[[Snapshot], None]):
+        """
+        Add a function to be called with every new snapshot (after it has become current).
+        """
+        self._listeners.append(listener)
+
+    def publish(
+        self,
+        tables: dict[str, pd.DataFrame],
+        artifacts: dict[str, Any],
+        built_at: float | None = None,
+        version: int | None = None,
+    ) -> Snapshot:
+        """
+        Make a new snapshot current and notify the listeners.
+
+        Parameters
+        ----------
+        tables: dict[str, pd.DataFrame]
+            Tables published through the API.
+        artifacts: dict[str, Any]
+            Other data built with the tables.
+        built_at: float
+            Time the snapshot was built (default is now).
+        version: int
+            Version of the snapshot, i.e. when restoring a stored snapshot (default is the current version
+            plus one).
+
+        Returns
+        -------
+        Snapshot
+            The new snapshot.
+        """
+        with self._lock:
+            if version is None:
+                version = self.current.version + 1 if self.current is not None else 1
+            snapshot = Snapshot(
+                version=version,
+                built_at=time() if built_at is None else built_at,
+                tables=tables,
+                artifacts=artifacts,
+            )
+            self.current = snapshot
+
+        log.info("Published snapshot version %d.", snapshot.version)
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                log.exception(
+                    "Notifying about snapshot version %d failed with message: %s",
+                    snapshot.version,
+                    e,
+                )
+        return snapshot
+
+    def artifact(self, name: str) -> Any:
+        """
+        Get an artifact of the current snapshot, or None if there is no snapshot yet.
+        """
+        snapshot = self.current
+        return snapshot.artifacts.get(name) if snapshot is not None else None
+
+
+class SnapshotBuilder:
+    """
+    Builds new snapshots in a background thread, so queries keep using the current snapshot meanwhile.
+
+    Builds are requested with 'trigger'. Requests made while a build is running result in one more build
+    when it is done. If a build fails, the error is logged and the current snapshot is kept.
+
+    Parameters
+    ----------
+    build: Callable
+        Function building the content of a new snapshot, returning a tuple of (tables, artifacts), or None
+        if nothing has changed since the last build.
+    store: SnapshotStore
+        Store to publish new snapshots in.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[], tuple[dict[str, pd.DataFrame], dict[str, Any]] | None],
+        store: SnapshotStore,
+    ):
+        self.build = build
+        self.store = store
+        self.last_error: Exception | None = None
+        self._requested = threading.Event()
+        self._thread = None
+
+    def build_once(self) -> Snapshot | None:
+        """
+        Build (in the calling thread) and publish a new snapshot if anything has changed.
+
+        Returns
+        -------
+        Snapshot | None
+            The new snapshot, or None if nothing changed or the build failed.
+        """
+        start_time = perf_counter()
+        try:
+            content = self.build()
+        except Exception as e:
+            self.last_error = e
+            log.exception(
+                "Building new snapshot failed, keeping the current snapshot: %s", e
+            )
+            return None
+        self.last_error = None
+
+        if content is None:
+            return None
+
+        built_at = time()
+        snapshot = self.store.publish(*content, built_at=built_at)
+        log.debug(
+            "Building snapshot version %d took: %f seconds",
+            snapshot.version,
+            perf_counter() - start_time,
+        )
+        return snapshot
+
+    def _run(self):
+        while True:
+            self._requested.wait()
+            self._requested.clear()
+            self.build_once()
+
+    def start(self):
+        """
+        Start the background thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="snapshot-builder", daemon=True
+        )
+        self._thread.start()
+
+    def trigger(self):
+        """
+        Request a new build (returns immediately).
+        """
+        self._requested.set()
+
+
+def add_snapshot_endpoints(server: RestServer, store: SnapshotStore):
+    """
+    Add an endpoint describing the current snapshot to the REST server.
+
+    - GET /snapshot - version, build time and number of rows in each table
+    """
+
+    def snapshot_info(request: Request) -> Response:
+        snapshot = store.current
+        if snapshot is None:
+            raise HTTPError(503, "No GIS data has been loaded yet.")
+        return json_response(
+            {
+                "version": snapshot.version,
+                "built_at": snapshot.built_at,
+                "tables": {name: len(table) for name, table in snapshot.tables.items()},
+            }
+        )
+
+    server.route("/snapshot", snapshot_info)
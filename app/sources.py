@@ -0,0 +1,149 @@
+import logging
+import json
+import re
+from dataclasses import dataclass
+from os import path
+
+log = logging.getLogger(__name__)
+
+# Source names are used in the names of pipeline stages and cache slots
+SOURCE_NAME_REGEX = r"\w+"
+
+
+@dataclass(frozen=True)
+class GisSource:
+    """
+    A GIS excel sheet enriched with the ACLinesegment data and published as its own tables.
+
+    Parameters
+    ----------
+    name: str
+        Name of the source (letters, digits and underscores).
+    file_path: str
+        Full path of the GIS excel file.
+    sheet: str
+        Name of the sheet containing the GIS data.
+    line_name_column: str
+        Name of the column containing the GIS line names.
+    regex: str
+        Regex translating the GIS line names to ETS line names.
+    table: str
+        Name of the API table with the enriched data.
+    line_table: str
+        Name of the API table with one row per line.
+    span_table: str
+        Name of the API table with one row per span.
+    span_cell_table: str
+        Name of the API table with the weather grid cells of each span (if a weather grid is configured).
+    validation_table: str
+        Name of the API table with the findings of the validation of the data.
+    simplified_table: str
+        Name of the API tables with the simplified lines, followed by the tolerance (i.e. "_100M").
+    """
+
+    name: str
+    file_path: str
+    sheet: str
+    line_name_column: str
+    regex: str
+    table: str
+    line_table: str
+    span_table: str
+    span_cell_table: str
+    validation_table: str
+    simplified_table: str
+
+
+def parse_gis_sources(config: str, folder: str, **defaults) -> list[GisSource]:
+    """
+    Parse the configuration of the GIS sources.
+
+    The configuration is a JSON list of sources (or the path of a file containing it), where each source
+    is an object with the keys:
+
+    - "name": name of the source (required)
+    - "file": name of the GIS excel file in the data folder (required)
+    - "table": name of the API table with the enriched data (required)
+    - "sheet", "column" and "regex": sheet, line name column and regex (default from 'defaults')
+    - "line_table", "span_table", "span_cell_table" and "validation_table": names of the API tables of
+      lines, spans, weather grid cells of the spans and validation findings (default is the table name
+      followed by "_LINES", "_SPANS", "_SPAN_CELLS" and "_VALIDATION")
+    - "simplified_table": start of the names of the API tables with the simplified lines (default is the
+      table name followed by "_SIMPLIFIED")
+
+    Parameters
+    ----------
+    config: str
+        JSON list of sources, or path of a JSON file with the list (relative to the data folder).
+    folder: str
+        Data folder containing the GIS files.
+    **defaults
+        Default values of "sheet", "column" and "regex".
+
+    Returns
+    -------
+    list[GisSource]
+        The sources, in the order of the configuration.
+    """
+    if not config.lstrip().startswith("["):
+        with open(path.join(folder, config), encoding="utf-8") as file:
+            config = file.read()
+    try:
+        items = json.loads(config)
+    except ValueError as e:
+        raise ValueError("GIS sources are not valid JSON: %s", e)
+    if not isinstance(items, list) or not items:
+        raise ValueError("GIS sources must be a non-empty list, but is: '%s'.", items)
+
+    sources = []
+    for item in items:
+        missing = {"name", "file", "table"}.difference(item)
+        if missing:
+            raise ValueError("GIS source '%s' is missing: %s", item, sorted(missing))
+        if not re.fullmatch(SOURCE_NAME_REGEX, str(item["name"])):
+            raise ValueError(
+                "GIS source name '%s' may only contain letters, digits and underscores.",
+                item["name"],
+            )
+        sources.append(
+            GisSource(
+                name=item["name"],
+                file_path=path.join(folder, item["file"]),
+                sheet=item.get("sheet", defaults["sheet"]),
+                line_name_column=item.get("column", defaults["column"]),
+                regex=item.get("regex", defaults["regex"]),
+                table=item["table"],
+                line_table=item.get("line_table", f"{item['table']}_LINES"),
+                span_table=item.get("span_table", f"{item['table']}_SPANS"),
+                span_cell_table=item.get(
+                    "span_cell_table", f"{item['table']}_SPAN_CELLS"
+                ),
+                validation_table=item.get(
+                    "validation_table", f"{item['table']}_VALIDATION"
+                ),
+                simplified_table=item.get(
+                    "simplified_table", f"{item['table']}_SIMPLIFIED"
+                ),
+            )
+        )
+
+    names = [source.name for source in sources]
+    if len(set(names)) < len(names):
+        raise ValueError("GIS sources must have unique names: %s", names)
+    tables = [
+        table
+        for source in sources
+        for table in [
+            source.table,
+            source.line_table,
+            source.span_table,
+            source.span_cell_table,
+            source.validation_table,
+            source.simplified_table,
+        ]
+    ]
+    if len(set(tables)) < len(tables):
+        raise ValueError("GIS sources must publish to unique tables: %s", tables)
+
+    log.info("GIS sources: %s", names)
+    return sources
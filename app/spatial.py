@@ -0,0 +1,323 @@
+import logging
+from typing import Callable
+import numpy as np
+from .geometry import LineGeometry, EARTH_RADIUS
+from .rest import RestServer, Request, Response, HTTPError, json_response
+
+log = logging.getLogger(__name__)
+
+# Length (in metres) of one degree of latitude
+METRES_PER_DEGREE = EARTH_RADIUS * np.pi / 180
+
+
+class SpatialIndex:
+    """
+    Grid index over the spans (line segments between two consecutive points) of all lines.
+
+    Each span is registered in all grid cells its bounding box overlaps. The cells are stored as a sorted
+    array of cell keys with offsets into an array of span indices (like a CSR matrix), so looking up the
+    spans of a range of cells is a few binary searches.
+
+    Distances are calculated in a local equirectangular projection around the queried point, which is
+    accurate to well within 1% for distances up to a few hundred kilometres.
+
+    Parameters
+    ----------
+    geometry: LineGeometry
+        Geometry of the lines to index.
+    cell_size: float
+        Size of the grid cells in degrees.
+    """
+
+    def __init__(self, geometry: LineGeometry, cell_size: float = 0.02):
+        self.geometry = geometry
+        self.cell_size = cell_size
+
+        start = geometry.span_start_index()
+        self.span_line = geometry.span_line_index()
+        self.x0, self.y0 = geometry.longitude[start], geometry.latitude[start]
+        self.x1, self.y1 = geometry.longitude[start + 1], geometry.latitude[start + 1]
+
+        # Spans with a point without coordinates are not indexed, so they are never found by queries
+        indexed = np.flatnonzero(np.isfinite(self.x0 + self.y0 + self.x1 + self.y1))
+        if len(indexed) < len(start):
+            log.warning(
+                "%d spans without valid coordinates are left out of the spatial index.",
+                len(start) - len(indexed),
+            )
+        x0, y0 = self.x0[indexed], self.y0[indexed]
+        x1, y1 = self.x1[indexed], self.y1[indexed]
+
+        if len(indexed):
+            self.origin = (min(x0.min(), x1.min()), min(y0.min(), y1.min()))
+            self.extent = (max(x0.max(), x1.max()), max(y0.max(), y1.max()))
+        else:
+            self.origin = self.extent = (0.0, 0.0)
+        self.columns = self._cell(self.extent[0], 0) + 1
+        self.rows = self._cell(self.extent[1], 1) + 1
+
+        # Cell ranges covered by the bounding box of each span
+        ix0 = self._cell(np.minimum(x0, x1), 0)
+        ix1 = self._cell(np.maximum(x0, x1), 0)
+        iy0 = self._cell(np.minimum(y0, y1), 1)
+        iy1 = self._cell(np.maximum(y0, y1), 1)
+        widths = ix1 - ix0 + 1
+        counts = widths * (iy1 - iy0 + 1)
+
+        # One entry per (span, cell), numbering the cells of each span row by row
+        entry = np.repeat(np.arange(len(indexed)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        keys = (iy0[entry] + within // widths[entry]) * self.columns + (
+            ix0[entry] + within % widths[entry]
+        )
+
+        order = np.argsort(keys, kind="stable")
+        self.cell_keys, cell_starts = np.unique(keys[order], return_index=True)
+        self.cell_offsets = np.append(cell_starts, len(order))
+        self.cell_spans = indexed[entry[order]]
+
+        log.debug(
+            "Spatial index built with %d spans in %d cells.",
+            len(indexed),
+            len(self.cell_keys),
+        )
+
+    def _cell(self, values, axis: int) -> np.ndarray:
+        return np.floor(
+            (np.asarray(values) - self.origin[axis]) / self.cell_size
+        ).astype(np.int64)
+
+    def _candidates(
+        self, min_lon: float, min_lat: float, max_lon: float, max_lat: float
+    ) -> np.ndarray:
+        """Spans registered in the cells overlapping a bounding box (a superset of the matching spans)."""
+        if (
+            max_lon < self.origin[0]
+            or max_lat < self.origin[1]
+            or min_lon > self.extent[0]
+            or min_lat > self.extent[1]
+        ):
+            return np.empty(0, dtype=np.int64)
+        # Clipping to the cells of the extent, so large boxes do not cost more than the whole grid
+        ix0, ix1 = np.clip(self._cell([min_lon, max_lon], 0), 0, self.columns - 1)
+        iy0, iy1 = np.clip(self._cell([min_lat, max_lat], 1), 0, self.rows - 1)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype=np.int64)
+
+        # The keys of each row of cells are consecutive, so each row is one range in the sorted keys
+        rows = np.arange(iy0, iy1 + 1) * self.columns
+        first = np.searchsorted(self.cell_keys, rows + ix0, side="left")
+        last = np.searchsorted(self.cell_keys, rows + ix1, side="right")
+        starts, stops = self.cell_offsets[first], self.cell_offsets[last]
+
+        lengths = stops - starts
+        positions = np.repeat(
+            starts - np.cumsum(lengths) + lengths, lengths
+        ) + np.arange(lengths.sum())
+        return np.unique(self.cell_spans[positions])
+
+    def _distances(self, spans: np.ndarray, lon: float, lat: float) -> np.ndarray:
+        """Distance (in metres) from a point to each of the spans."""
+        kx = METRES_PER_DEGREE * np.cos(np.radians(lat))
+        ax, ay = (self.x0[spans] - lon) * kx, (self.y0[spans] - lat) * METRES_PER_DEGREE
+        dx = (self.x1[spans] - self.x0[spans]) * kx
+        dy = (self.y1[spans] - self.y0[spans]) * METRES_PER_DEGREE
+        squared_length = dx**2 + dy**2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.clip(-(ax * dx + ay * dy) / squared_length, 0, 1)
+        t[squared_length == 0] = 0
+        return np.hypot(ax + t * dx, ay + t * dy)
+
+    def bbox(
+        self, min_lon: float, min_lat: float, max_lon: float, max_lat: float
+    ) -> np.ndarray:
+        """
+        Find the spans intersecting a bounding box.
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the spans (sorted).
+        """
+        spans = self._candidates(min_lon, min_lat, max_lon, max_lat)
+        x0, y0 = self.x0[spans], self.y0[spans]
+        dx, dy = self.x1[spans] - x0, self.y1[spans] - y0
+
+        # Clipping each span to the box (Liang-Barsky), the span intersects if anything is left
+        t_enter = np.zeros(len(spans))
+        t_exit = np.ones(len(spans))
+        inside = np.ones(len(spans), dtype=bool)
+        for p, q in [
+            (-dx, x0 - min_lon),
+            (dx, max_lon - x0),
+            (-dy, y0 - min_lat),
+            (dy, max_lat - y0),
+        ]:
+            parallel = p == 0
+            inside &= ~(parallel & (q < 0))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                t = np.where(parallel, 0, q / np.where(parallel, 1, p))
+            t_enter = np.where(~parallel & (p < 0), np.maximum(t_enter, t), t_enter)
+            t_exit = np.where(~parallel & (p > 0), np.minimum(t_exit, t), t_exit)
+
+        return spans[inside & (t_enter <= t_exit)]
+
+    def radius(
+        self, lon: float, lat: float, radius: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the spans within a distance of a point.
+
+        Parameters
+        ----------
+        lon, lat: float
+            The point in degrees.
+        radius: float
+            Distance in metres.
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the spans, sorted by distance.
+        np.ndarray
+            Distance (in metres) from the point to each span.
+        """
+        lat_delta = radius / METRES_PER_DEGREE
+        lon_delta = lat_delta / max(np.cos(np.radians(lat)), 1e-6)
+        spans = self._candidates(
+            lon - lon_delta, lat - lat_delta, lon + lon_delta, lat + lat_delta
+        )
+        distances = self._distances(spans, lon, lat)
+
+        within = distances <= radius
+        spans, distances = spans[within], distances[within]
+        order = np.argsort(distances, kind="stable")
+        return spans[order], distances[order]
+
+    def nearest_lines(
+        self, lon: float, lat: float, k: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find the k lines nearest to a point.
+
+        The search radius is doubled until k lines are found within it, or all of the index is covered (the
+        loop stops if the distance to the index can not be calculated).
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the lines, sorted by distance.
+        np.ndarray
+            Distance (in metres) from the point to each line.
+        np.ndarray
+            Index of the span of each line nearest to the point.
+        """
+        radius = self.cell_size * METRES_PER_DEGREE
+        max_radius = (
+            np.hypot(
+                max(abs(lon - self.origin[0]), abs(lon - self.extent[0])),
+                max(abs(lat - self.origin[1]), abs(lat - self.extent[1])),
+            )
+            * METRES_PER_DEGREE
+            + radius
+        )
+        spans, distances = self.radius(lon, lat, radius)
+        # Spans are sorted by distance, so the first span of each line is the nearest
+        lines, first = np.unique(self.span_line[spans], return_index=True)
+        # Comparisons with a NaN max. radius are false, so the loop always ends
+        while len(lines) < k and radius < max_radius:
+            radius *= 2
+            spans, distances = self.radius(lon, lat, radius)
+            lines, first = np.unique(self.span_line[spans], return_index=True)
+
+        order = np.argsort(distances[first], kind="stable")[:k]
+        return lines[order], distances[first][order], spans[first][order]
+
+    def span_records(self, spans: np.ndarray, mrid_column: str) -> list[dict]:
+        """
+        Describe spans by the MRID of their line and their number on the line (as in the span table).
+        """
+        lines = self.span_line[spans]
+        span_numbers = spans - self.geometry.span_offsets[lines]
+        return [
+            {mrid_column: mrid, "SPAN": int(span)}
+            for mrid, span in zip(self.geometry.mrids[lines], span_numbers)
+        ]
+
+
+def finite_parameter(request: Request, name: str) -> float:
+    """
+    Get a query parameter as a float, raising a 400 error if it is not a finite number.
+    """
+    value = request.parameter(name, float)
+    if not np.isfinite(value):
+        raise HTTPError(400, f"Query parameter '{name}' must be a finite number.")
+    return value
+
+
+def add_spatial_endpoints(
+    server: RestServer,
+    get_index: Callable[[], SpatialIndex | None],
+    mrid_column: str,
+):
+    """
+    Add endpoints for nearest line, bounding box and radius queries to the REST server.
+
+    - GET /lines/nearest?lat=..&lon=..&k=.. - the k lines nearest to a point
+    - GET /spans/bbox?min_lon=..&min_lat=..&max_lon=..&max_lat=.. - spans intersecting a bounding box
+    - GET /spans/radius?lat=..&lon=..&radius_km=.. - spans within a distance of a point
+
+    Parameters
+    ----------
+    server: RestServer
+        Server to add the endpoints to.
+    get_index: Callable
+        Function returning the current spatial index (or None if no data is loaded yet).
+    mrid_column: str
+        Name used for the MRID in the responses.
+    """
+
+    def current_index() -> SpatialIndex:
+        index = get_index()
+        if index is None:
+            raise HTTPError(503, "No GIS data has been loaded yet.")
+        return index
+
+    def nearest_lines(request: Request) -> Response:
+        index = current_index()
+        k = request.parameter("k", int, 1)
+        if k <= 0:
+            raise HTTPError(400, "Query parameter 'k' must be positive.")
+        lines, distances, spans = index.nearest_lines(
+            finite_parameter(request, "lon"), finite_parameter(request, "lat"), k
+        )
+        records = index.span_records(spans, mrid_column)
+        for record, distance in zip(records, distances):
+            record["DISTANCE_M"] = round(float(distance), 1)
+        return json_response(records)
+
+    def spans_in_bbox(request: Request) -> Response:
+        index = current_index()
+        spans = index.bbox(
+            finite_parameter(request, "min_lon"),
+            finite_parameter(request, "min_lat"),
+            finite_parameter(request, "max_lon"),
+            finite_parameter(request, "max_lat"),
+        )
+        return json_response(index.span_records(spans, mrid_column))
+
+    def spans_in_radius(request: Request) -> Response:
+        index = current_index()
+        spans, distances = index.radius(
+            finite_parameter(request, "lon"),
+            finite_parameter(request, "lat"),
+            finite_parameter(request, "radius_km") * 1000,
+        )
+        records = index.span_records(spans, mrid_column)
+        for record, distance in zip(records, distances):
+            record["DISTANCE_M"] = round(float(distance), 1)
+        return json_response(records)
+
+    server.route("/lines/nearest", nearest_lines)
+    server.route("/spans/bbox", spans_in_bbox)
+    server.route("/spans/radius", spans_in_radius)
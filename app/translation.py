@@ -0,0 +1,101 @@
+import logging
+import re
+from functools import lru_cache
+from singupy import conversion
+
+log = logging.getLogger(__name__)
+
+
+class LineNameTranslator:
+    """
+    Translates GIS line names to ETS line names with a regex.
+
+    The regex is compiled once, voltages are converted to letters through a lookup table and translated
+    names are memoized, so repeated translations (i.e. on reload) only handle names not seen before.
+
+    Parameters
+    ----------
+    regex: str
+        Regex with the named groups 'STN1', 'volt', 'STN2' and 'id'.
+    """
+
+    def __init__(self, regex: str):
+        self.regex = regex
+        self.pattern = re.compile(regex)
+        # Lookup table from voltage (as text) to voltage letter
+        self._volt_to_letter = {}
+        # Memo of translated names, None if the name could not be translated
+        self._memo = {}
+
+    def _volt_letter(self, volt: str) -> str:
+        letter = self._volt_to_letter.get(volt)
+        if letter is None:
+            letter = self._volt_to_letter[volt] = conversion.kv_to_letter(int(volt))
+        return letter
+
+    def _translate_new_names(self, names: list[str]):
+        for name in names:
+            match = self.pattern.match(name)
+            if match is None:
+                self._memo[name] = None
+                continue
+
+            # Constructing the ets name from domain known pattern
+            stn1, volt, stn2, line_id = match.group("STN1", "volt", "STN2", "id")
+            ets_name = f"{self._volt_letter(volt)}_{stn1}-{stn2}"
+            if line_id is not None:
+                ets_name += f"_{line_id}"
+            self._memo[name] = ets_name
+
+    def translate(self, names) -> tuple[dict[str, str], list[str]]:
+        """
+        Translate GIS line names to ETS line names.
+
+        Parameters
+        ----------
+        names: iterable
+            Unique GIS line names.
+
+        Returns
+        -------
+        dict[str, str]
+            A dictionary mapping gis line name to expected ETS line name.
+        list[str]
+            A list of gis line names that could not be mapped with the regex.
+        """
+        names = list(names)
+        memo = self._memo
+
+        new_names = [name for name in names if name not in memo]
+        if new_names:
+            log.debug("Translating %d new line names.", len(new_names))
+            self._translate_new_names(new_names)
+
+        gis_line_name_to_ets_line_name = {}
+        non_translatable = []
+        for name in names:
+            ets_name = memo[name]
+            if ets_name is None:
+                non_translatable.append(name)
+            else:
+                gis_line_name_to_ets_line_name[name] = ets_name
+
+        return gis_line_name_to_ets_line_name, non_translatable
+
+
+@lru_cache(maxsize=8)
+def get_translator(regex: str) -> LineNameTranslator:
+    """
+    Get the translator for a regex, reusing the translator (and its memo) across calls.
+
+    Parameters
+    ----------
+    regex: str
+        Regex with the named groups 'STN1', 'volt', 'STN2' and 'id'.
+
+    Returns
+    -------
+    LineNameTranslator
+        Translator for the regex.
+    """
+    return LineNameTranslator(regex)
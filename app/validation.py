@@ -0,0 +1,275 @@
+import logging
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from .geometry import LineGeometry
+
+log = logging.getLogger(__name__)
+
+# Names of the checks in the validation report
+LINE_NOT_IN_GIS = "LINE_NOT_IN_GIS"
+DLR_LINE_WITHOUT_GEOMETRY = "DLR_LINE_WITHOUT_GEOMETRY"
+MISSING_MRID = "MISSING_MRID"
+DUPLICATE_OBJECTID = "DUPLICATE_OBJECTID"
+OBJECTID_OUT_OF_ORDER = "OBJECTID_OUT_OF_ORDER"
+OUTSIDE_BBOX = "OUTSIDE_BBOX"
+LONG_SPAN = "LONG_SPAN"
+# Severity of each check
+SEVERITY = {
+    LINE_NOT_IN_GIS: "INFO",
+    DLR_LINE_WITHOUT_GEOMETRY: "ERROR",
+    MISSING_MRID: "ERROR",
+    DUPLICATE_OBJECTID: "ERROR",
+    OBJECTID_OUT_OF_ORDER: "WARNING",
+    OUTSIDE_BBOX: "WARNING",
+    LONG_SPAN: "WARNING",
+}
+# ETS lines (by name) expected to be in the GIS data, i.e. omitting the low voltage levels
+GIS_LINE_REGEX = r"^[CDE]_"
+
+
+@dataclass(frozen=True)
+class ValidationLimits:
+    """
+    Limits of the checks of the GIS data.
+
+    Parameters
+    ----------
+    bbox: tuple[float, float, float, float]
+        Min. longitude, min. latitude, max. longitude and max. latitude (degrees) of all points.
+    max_span_length: float
+        Max. length (metres) of a span between two consecutive points of a line.
+    """
+
+    bbox: tuple[float, float, float, float] = (7.5, 54.4, 15.5, 58.0)
+    max_span_length: float = 5000.0
+
+
+def validate_gis_data(
+    aclinesegment: pd.DataFrame,
+    mapping: dict[str, str],
+    enriched: pd.DataFrame,
+    geometry: LineGeometry,
+    limits: ValidationLimits,
+    mrid_column: str,
+    ets_name_column: str,
+    dlr_enabled_column: str,
+    order_column: str,
+) -> pd.DataFrame:
+    """
+    Check the quality of the enriched GIS data, and report every finding as a row of a table.
+
+    The checks are:
+
+    - LINE_NOT_IN_GIS: ETS line (C, D or E level) that none of the GIS line names are translated to
+    - DLR_LINE_WITHOUT_GEOMETRY: line with DLR enabled that has less than two points (VALUE is the number
+      of points)
+    - MISSING_MRID: point without an MRID, which is left out of the line geometry
+    - DUPLICATE_OBJECTID: OBJECTID found more than once on a line (VALUE is the number of points)
+    - OBJECTID_OUT_OF_ORDER: line where the points are not in the order of their OBJECTID in the GIS file
+      (OBJECTID is the first point after a point with a higher OBJECTID, VALUE the number of such points)
+    - OUTSIDE_BBOX: point outside the bounding box of the limits (or without coordinates)
+    - LONG_SPAN: span longer than the max. span length of the limits (OBJECTID is the end point of the
+      span, VALUE the length in metres)
+
+    Each check is done on whole columns at once, on the arrays of the line geometry where possible.
+
+    Parameters
+    ----------
+    aclinesegment: pd.DataFrame
+        Dataframe with the ETS lines.
+    mapping: dict[str, str]
+        Translation of GIS line names to ETS line names.
+    enriched: pd.DataFrame
+        The enriched dataframe.
+    geometry: LineGeometry
+        Geometry of the lines in the enriched dataframe.
+    limits: ValidationLimits
+        Limits of the checks.
+    mrid_column: str
+        Name of the column with the MRID.
+    ets_name_column: str
+        Name of the column with the ETS line name.
+    dlr_enabled_column: str
+        Name of the column with the DLR enabled state ("YES" or "NO").
+    order_column: str
+        Name of the column with the order of the points on a line (i.e. OBJECTID).
+
+    Returns
+    -------
+    pd.DataFrame
+        Report with the columns CHECK, SEVERITY, MRID, ETS line name, OBJECTID and VALUE, with one row per
+        finding, ordered by check.
+    """
+    findings = []
+
+    def report(check: str, line_index: np.ndarray, objectid=None, value=None):
+        # Findings of a check, for the lines given by their index in the geometry
+        findings.append(
+            pd.DataFrame(
+                {
+                    "CHECK": check,
+                    "LINE_INDEX": line_index,
+                    order_column: (objectid if objectid is not None else np.nan),
+                    "VALUE": value if value is not None else np.nan,
+                }
+            )
+        )
+
+    ets_lines = aclinesegment.drop_duplicates(mrid_column)
+    ets_mrids = ets_lines[mrid_column].to_numpy()
+    ets_line_index = pd.Index(geometry.mrids).get_indexer(ets_mrids)
+
+    # ETS lines without any GIS line name translated to them
+    ets_names = ets_lines[ets_name_column]
+    not_in_gis = ets_names.str.match(GIS_LINE_REGEX, na=False) & ~ets_names.isin(
+        pd.unique(pd.Series(list(mapping.values()), dtype=object))
+    )
+    not_in_gis_mrids = ets_mrids[not_in_gis.to_numpy()]
+
+    # Lines with DLR enabled that have no spans
+    points = np.diff(geometry.offsets)
+    # Lines not in the geometry (index -1) get the appended count of 0
+    point_count = np.append(points, 0)[ets_line_index]
+    dlr_enabled = (
+        ets_lines[dlr_enabled_column].str.upper().eq("YES").fillna(False).to_numpy()
+    )
+    without_geometry = dlr_enabled & (point_count < 2)
+
+    # Points of the same line with the same OBJECTID (the geometry is sorted by line and OBJECTID)
+    point_line = np.repeat(np.arange(len(geometry)), points)
+    objectid = geometry.objectid
+    duplicate = (point_line[1:] == point_line[:-1]) & (objectid[1:] == objectid[:-1])
+    duplicates = (
+        pd.DataFrame(
+            {"line": point_line[1:][duplicate], "objectid": objectid[1:][duplicate]}
+        )
+        .value_counts(sort=False)
+        .sort_index()
+    )
+    report(
+        DUPLICATE_OBJECTID,
+        duplicates.index.get_level_values("line"),
+        duplicates.index.get_level_values("objectid"),
+        duplicates.to_numpy() + 1,
+    )
+
+    # Points with a lower OBJECTID than the point before them on the line, in the order of the GIS file
+    # (points without an MRID have code -1, and are not part of a line)
+    line_codes = pd.Index(geometry.mrids).get_indexer(enriched[mrid_column])
+    row_order = np.argsort(line_codes, kind="stable")
+    row_order = row_order[line_codes[row_order] >= 0]
+    row_line = line_codes[row_order]
+    row_objectid = enriched[order_column].to_numpy()[row_order]
+    decreasing = (row_line[1:] == row_line[:-1]) & (
+        row_objectid[1:] < row_objectid[:-1]
+    )
+    out_of_order_lines, first, count = np.unique(
+        row_line[1:][decreasing], return_index=True, return_counts=True
+    )
+    report(
+        OBJECTID_OUT_OF_ORDER,
+        out_of_order_lines,
+        row_objectid[1:][decreasing][first],
+        count,
+    )
+
+    # Points outside the bounding box (comparisons with missing coordinates are false)
+    min_lon, min_lat, max_lon, max_lat = limits.bbox
+    inside = (
+        (geometry.longitude >= min_lon)
+        & (geometry.longitude <= max_lon)
+        & (geometry.latitude >= min_lat)
+        & (geometry.latitude <= max_lat)
+    )
+    report(OUTSIDE_BBOX, point_line[~inside], objectid[~inside])
+
+    # Spans longer than the max. span length
+    long_span = np.flatnonzero(geometry.span_length > limits.max_span_length)
+    report(
+        LONG_SPAN,
+        geometry.span_line_index()[long_span],
+        objectid[geometry.span_start_index()[long_span] + 1],
+        geometry.span_length[long_span],
+    )
+
+    # Findings of lines which may have no geometry, by MRID
+    findings_by_mrid = pd.DataFrame(
+        {
+            "CHECK": np.concatenate(
+                [
+                    np.full(len(not_in_gis_mrids), LINE_NOT_IN_GIS, dtype=object),
+                    np.full(
+                        without_geometry.sum(), DLR_LINE_WITHOUT_GEOMETRY, dtype=object
+                    ),
+                ]
+            ),
+            mrid_column: np.concatenate(
+                [not_in_gis_mrids, ets_mrids[without_geometry]]
+            ),
+            "VALUE": np.concatenate(
+                [np.full(len(not_in_gis_mrids), np.nan), point_count[without_geometry]]
+            ),
+        }
+    )
+
+    # Points without an MRID, reported with the ETS line name of the point
+    without_mrid = enriched[mrid_column].isna().to_numpy()
+    findings_without_mrid = pd.DataFrame(
+        {
+            "CHECK": MISSING_MRID,
+            ets_name_column: pd.Series(
+                enriched[ets_name_column].to_numpy()[without_mrid], dtype=object
+            ),
+            order_column: enriched[order_column].to_numpy()[without_mrid],
+        }
+    )
+
+    findings_by_line = pd.concat(findings, ignore_index=True)
+    findings_by_line[mrid_column] = geometry.mrids[
+        findings_by_line["LINE_INDEX"].to_numpy(dtype=np.int64)
+    ]
+    report_table = pd.concat(
+        [findings_by_mrid, findings_by_line.drop(columns="LINE_INDEX")],
+        ignore_index=True,
+    )
+
+    # Adding the severity and ETS line name, and ordering the rows by check
+    report_table[ets_name_column] = ets_names.to_numpy()[
+        pd.Index(ets_mrids).get_indexer(report_table[mrid_column])
+    ]
+    report_table = pd.concat([report_table, findings_without_mrid], ignore_index=True)
+    report_table["SEVERITY"] = report_table["CHECK"].map(SEVERITY)
+    report_table[order_column] = report_table[order_column].astype("Int64")
+    report_table = report_table[
+        ["CHECK", "SEVERITY", mrid_column, ets_name_column, order_column, "VALUE"]
+    ].sort_values(
+        "CHECK",
+        key=lambda checks: checks.map(list(SEVERITY).index),
+        kind="stable",
+        ignore_index=True,
+    )
+
+    log_validation_report(report_table, ets_name_column)
+    return report_table
+
+
+def log_validation_report(report_table: pd.DataFrame, ets_name_column: str):
+    """
+    Log the number of findings of each check, and the lines with DLR enabled that have no GIS data.
+    """
+    counts = report_table["CHECK"].value_counts()
+    log.info(
+        "Validation of the GIS data found: %s",
+        {check: int(counts.get(check, 0)) for check in SEVERITY},
+    )
+    missing_gis_data = report_table.loc[
+        report_table["CHECK"] == DLR_LINE_WITHOUT_GEOMETRY, ets_name_column
+    ].tolist()
+    if missing_gis_data:
+        log.error(
+            "Some lines set up for DLR have no GIS data available, they are: %s",
+            missing_gis_data,
+        )
+    else:
+        log.info("Gis data is found for all lines in the MRID file with DLR enabled.")
@@ -0,0 +1,195 @@
+import logging
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from os import path
+from time import monotonic, sleep
+
+log = logging.getLogger(__name__)
+
+# inotify event flags (see 'man inotify')
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+
+# Events that mean a file is completely written (closed after writing or moved into place)
+COMPLETED_EVENTS = IN_CLOSE_WRITE | IN_MOVED_TO
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InputWatcher:
+    """
+    Wait for changes to a set of input files.
+
+    With inotify (Linux) the folders of the files are watched, and a change is reported when a watched file has
+    been completely written, i.e. it has been closed or moved into place and no further events have been seen
+    for 'debounce' seconds. Files that are still being copied are not reported until the copy is done, and
+    no file is reported while another watched file is being written (as the caller reads all files). The
+    events of files not reported yet are kept for the next call.
+    If inotify is not available (or mode is 'POLL') the watcher simply sleeps for the poll interval.
+
+    Parameters
+    ----------
+    file_paths: list[str]
+        Full paths of the files to watch.
+    poll_interval: float
+        Maximum time (in seconds) to wait before returning, also when nothing has changed.
+    debounce: float
+        Time (in seconds) without events on a file before it is reported as changed.
+    mode: str
+        Either 'INOTIFY' (fall back to polling if inotify is not available) or 'POLL'.
+    """
+
+    def __init__(
+        self,
+        file_paths: list[str],
+        poll_interval: float = 60,
+        debounce: float = 0.5,
+        mode: str = "INOTIFY",
+    ):
+        if mode.upper() not in ["INOTIFY", "POLL"]:
+            raise ValueError(
+                "Watch mode is '%s', but must be either 'INOTIFY' or 'POLL'.", mode
+            )
+
+        self.file_paths = [path.abspath(file_path) for file_path in file_paths]
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._fd = None
+        self._watched_folders = {}
+        # Per file not reported yet: combined event mask and time of the last event
+        self._pending: dict[str, tuple[int, float]] = {}
+
+        if mode.upper() == "INOTIFY":
+            try:
+                self._start_inotify()
+                log.info("Watching input files with inotify.")
+            except OSError as e:
+                log.warning(
+                    "Watching files with inotify failed, falling back to polling every %s seconds: %s",
+                    poll_interval,
+                    e,
+                )
+                self.close()
+        if self._fd is None:
+            log.info("Polling input files every %s seconds.", poll_interval)
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def _start_inotify(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+
+        # Folders are watched (instead of the files) so files that are replaced or created are also seen
+        for folder in {path.dirname(file_path) for file_path in self.file_paths}:
+            wd = libc.inotify_add_watch(fd, folder.encode(), WATCH_MASK)
+            if wd < 0:
+                raise OSError(
+                    ctypes.get_errno(), f'Adding inotify watch on "{folder}" failed'
+                )
+            self._watched_folders[wd] = folder
+
+    def _read_events(self) -> dict[str, int]:
+        """Read all pending inotify events and return the combined event mask per watched file."""
+        events = {}
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return events
+
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name_end = offset + name_length
+            # Decoded as the os module does, so file names that are not UTF-8 do not fail the watcher
+            name = os.fsdecode(buffer[offset:name_end].rstrip(b"\0"))
+            offset = name_end
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, so consider all files as (completely) changed
+                for file_path in self.file_paths:
+                    events[file_path] = events.get(file_path, 0) | COMPLETED_EVENTS
+                continue
+
+            file_path = path.join(self._watched_folders.get(wd, ""), name)
+            if file_path in self.file_paths:
+                events[file_path] = events.get(file_path, 0) | mask
+
+        return events
+
+    def wait(self) -> set[str]:
+        """
+        Wait until one or more of the watched files have changed, or the poll interval has passed.
+
+        Returns
+        -------
+        set[str]
+            Paths of the files that have changed (empty if the poll interval passed, or when polling).
+        """
+        if self._fd is None:
+            sleep(self.poll_interval)
+            return set()
+
+        deadline = monotonic() + self.poll_interval
+        pending = self._pending
+
+        while True:
+            now = monotonic()
+            busy = any(
+                now - last_event < self.debounce for _, last_event in pending.values()
+            )
+            ready = {
+                file_path
+                for file_path, (mask, _) in pending.items()
+                if mask & COMPLETED_EVENTS
+            }
+            if ready and not busy:
+                for file_path in ready:
+                    del pending[file_path]
+                log.debug("Input files changed: %s", ready)
+                return ready
+            if now >= deadline:
+                return set()
+
+            # Wait for the next event, or until a pending file has been quiet for the debounce time
+            timeout = deadline - now
+            if pending:
+                timeout = min(timeout, self.debounce)
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+
+            if readable:
+                now = monotonic()
+                for file_path, mask in self._read_events().items():
+                    pending_mask = pending.get(file_path, (0, now))[0]
+                    if mask & (IN_MODIFY | IN_CREATE | IN_MOVED_FROM | IN_DELETE):
+                        # The file is (again) being written, so wait for it to be completed
+                        pending_mask = 0
+                    pending[file_path] = (pending_mask | mask, now)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
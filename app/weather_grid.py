@@ -0,0 +1,213 @@
+import logging
+import json
+import math
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from .geometry import LineGeometry
+from .projection import UTM32N
+
+log = logging.getLogger(__name__)
+
+# Coordinate systems a grid can be defined in: degrees (WGS84/ETRS89) or metres (UTM zone 32N)
+GRID_CRS = ["EPSG:4326", "EPSG:25832"]
+# Pieces of a span shorter than this fraction of the span (i.e. where it crosses a cell corner) are dropped
+MIN_PIECE_FRACTION = 1e-9
+
+
+@dataclass(frozen=True)
+class WeatherGrid:
+    """
+    Regular grid of weather forecast cells.
+
+    Cell (row, column) covers x from 'origin_x + column * resolution_x' to 'origin_x + (column + 1) *
+    resolution_x', and y likewise from the row, so row 0 is the southernmost row.
+
+    Parameters
+    ----------
+    origin_x: float
+        Longitude (or easting) of the west edge of the grid.
+    origin_y: float
+        Latitude (or northing) of the south edge of the grid.
+    resolution_x: float
+        Width of a cell (degrees or metres).
+    resolution_y: float
+        Height of a cell (degrees or metres).
+    columns: int
+        Number of cells from west to east.
+    rows: int
+        Number of cells from south to north.
+    crs: str
+        Coordinate system of the grid, "EPSG:4326" (degrees) or "EPSG:25832" (UTM zone 32N, metres).
+    """
+
+    origin_x: float
+    origin_y: float
+    resolution_x: float
+    resolution_y: float
+    columns: int
+    rows: int
+    crs: str = "EPSG:4326"
+
+    def grid_coordinates(
+        self, longitude: np.ndarray, latitude: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Convert points given in degrees to grid coordinates, where the integer part is the cell column (x)
+        and row (y).
+        """
+        x, y = longitude, latitude
+        if self.crs == "EPSG:25832":
+            x, y = UTM32N.project(longitude, latitude)
+        return (
+            (x - self.origin_x) / self.resolution_x,
+            (y - self.origin_y) / self.resolution_y,
+        )
+
+
+def load_weather_grid(file_path: str) -> WeatherGrid:
+    """
+    Parse the definition of the weather grid from a JSON file.
+
+    The file contains an object with the keys:
+
+    - "origin": [x, y] of the south-west corner of the grid
+    - "resolution": size of a cell, as one number or [x, y]
+    - "extent": [x, y] of the north-east corner of the grid (a partial cell at the edge is a whole cell)
+    - "crs": "EPSG:4326" for degrees (default) or "EPSG:25832" for UTM zone 32N
+
+    Parameters
+    ----------
+    file_path: str
+        Full path of the grid definition file.
+
+    Returns
+    -------
+    WeatherGrid
+        The grid.
+    """
+    with open(file_path, encoding="utf-8") as file:
+        try:
+            definition = json.load(file)
+        except ValueError as e:
+            raise ValueError("Weather grid '%s' is not valid JSON: %s", file_path, e)
+
+    missing = {"origin", "resolution", "extent"}.difference(definition)
+    if missing:
+        raise ValueError("Weather grid '%s' is missing: %s", file_path, sorted(missing))
+    crs = definition.get("crs", "EPSG:4326")
+    if crs not in GRID_CRS:
+        raise ValueError(
+            "Weather grid crs is '%s', but must be one of: %s", crs, GRID_CRS
+        )
+
+    origin = np.asarray(definition["origin"], dtype=np.float64)
+    resolution = np.broadcast_to(
+        np.asarray(definition["resolution"], dtype=np.float64), (2,)
+    )
+    extent = np.asarray(definition["extent"], dtype=np.float64)
+    if origin.shape != (2,) or extent.shape != (2,):
+        raise ValueError(
+            "Weather grid origin and extent must be [x, y], but are: %s and %s",
+            definition["origin"],
+            definition["extent"],
+        )
+    if (resolution <= 0).any() or (extent <= origin).any():
+        raise ValueError(
+            "Weather grid must have a positive resolution and extent, but has: %s and %s",
+            definition["resolution"],
+            definition["extent"],
+        )
+
+    # Rounding before taking the ceiling, so an extent of a whole number of cells gives no partial cell
+    columns, rows = (
+        math.ceil(round(cells, 6)) for cells in (extent - origin) / resolution
+    )
+    grid = WeatherGrid(*origin.tolist(), *resolution.tolist(), columns, rows, crs)
+    log.info('Weather grid loaded from "%s": %s', file_path, grid)
+    return grid
+
+
+def assign_spans_to_cells(
+    geometry: LineGeometry, grid: WeatherGrid, mrid_column: str
+) -> pd.DataFrame:
+    """
+    Find the grid cells each span passes through, and the length of the span inside each cell.
+
+    Spans are straight lines in grid coordinates, and are split where they cross the grid lines. All spans
+    are split at once: the crossings of every span are generated into one array, sorted along the spans,
+    and the pieces between consecutive crossings are assigned to the cell of their midpoint. The length
+    of a piece is its fraction of the span times the span length. Pieces outside the grid are left out.
+
+    Parameters
+    ----------
+    geometry: LineGeometry
+        Geometry of the lines.
+    grid: WeatherGrid
+        The weather grid.
+    mrid_column: str
+        Name of the MRID column of the table.
+
+    Returns
+    -------
+    pd.DataFrame
+        Table with one row per span and cell (MRID, span number, cell row and column and length in
+        metres), ordered by line and along the spans.
+    """
+    start = geometry.span_start_index()
+    x, y = grid.grid_coordinates(geometry.longitude, geometry.latitude)
+    x0, y0, x1, y1 = x[start], y[start], x[start + 1], y[start + 1]
+    spans = np.flatnonzero(np.isfinite(x0 + y0 + x1 + y1))
+    if len(spans) < len(start):
+        log.warning(
+            "%d spans without valid coordinates are not assigned to weather cells.",
+            len(start) - len(spans),
+        )
+
+    def crossings(c0: np.ndarray, c1: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Span and position along the span (0-1) of every crossing of a grid line between c0 and c1
+        low = np.floor(np.minimum(c0[spans], c1[spans]))
+        count = (np.floor(np.maximum(c0[spans], c1[spans])) - low).astype(np.int64)
+        span = np.repeat(spans, count)
+        # Number of the crossing within its span, i.e. the grid line low + 1, low + 2 ...
+        within = np.arange(len(span)) - np.repeat(np.cumsum(count) - count, count)
+        line = np.repeat(low, count) + 1 + within
+        return span, (line - c0[span]) / (c1 - c0)[span]
+
+    x_span, x_position = crossings(x0, x1)
+    y_span, y_position = crossings(y0, y1)
+    span = np.concatenate([spans, spans, x_span, y_span])
+    position = np.concatenate(
+        [np.zeros(len(spans)), np.ones(len(spans)), x_position, y_position]
+    )
+    order = np.lexsort((position, span))
+    span, position = span[order], position[order]
+
+    # Pieces between consecutive positions on the same span
+    fraction = np.diff(position)
+    piece = (span[1:] == span[:-1]) & (fraction > MIN_PIECE_FRACTION)
+    span, fraction = span[:-1][piece], fraction[piece]
+    middle = position[:-1][piece] + fraction / 2
+    column = np.floor(x0[span] + middle * (x1 - x0)[span]).astype(np.int64)
+    row = np.floor(y0[span] + middle * (y1 - y0)[span]).astype(np.int64)
+
+    inside = (column >= 0) & (column < grid.columns) & (row >= 0) & (row < grid.rows)
+    if not inside.all():
+        log.info(
+            "%d spans are partly or completely outside the weather grid.",
+            len(np.unique(span[~inside])),
+        )
+    span, fraction, column, row = (
+        values[inside] for values in (span, fraction, column, row)
+    )
+
+    line_index = geometry.span_line_index()[span]
+    return pd.DataFrame(
+        {
+            mrid_column: geometry.mrids[line_index],
+            "SPAN": (span - geometry.span_offsets[line_index]).astype(np.int32),
+            "CELL_ROW": row.astype(np.int32),
+            "CELL_COLUMN": column.astype(np.int32),
+            "LENGTH_M": fraction * geometry.span_length[span],
+        }
+    )
@@ -0,0 +1,82 @@
+"""
+Benchmark of the enrichment of the GIS data with the ACLinesegment data, joined by integer codes of the line
+names (as in the application) and with the pandas join used before, with time and peak allocated memory.
+
+Run from the root of the repository with: python -m benchmarks.bench_enrich [number of lines] [points per line]
+"""
+
+import logging
+import sys
+import pandas as pd
+import app.main as main
+from app.join import LineNameIndex
+from .suite import measure
+from .synthetic import generate_dataset
+
+
+def pandas_join(
+    gis_dataframe: pd.DataFrame,
+    aclinesegment_dataframe: pd.DataFrame,
+    mapping: dict[str, str],
+    bad_line_names: list[str],
+) -> pd.DataFrame:
+    # The enrichment before the join by codes (on a copy, as it adds the translated names column)
+    gis_dataframe = gis_dataframe.copy()
+    gis_dataframe["ETS_NAME"] = gis_dataframe[main.GIS_LINE_NAME_COLUMN].map(mapping)
+    gis_dataframe = gis_dataframe[
+        ~gis_dataframe[main.GIS_LINE_NAME_COLUMN].isin(bad_line_names)
+    ]
+    dlr_dataframe = aclinesegment_dataframe.join(
+        gis_dataframe.set_index("ETS_NAME"),
+        on=main.ACLINESEGMENT_LINE_NAME_COLUMN,
+        how="inner",
+    )
+    dlr_dataframe.reset_index(inplace=True, drop=True)
+    return dlr_dataframe
+
+
+if __name__ == "__main__":
+    logging.getLogger(main.__name__).setLevel(logging.CRITICAL)
+    logging.getLogger(main.__package__).setLevel(logging.CRITICAL)
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    points_per_line = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    data = generate_dataset(lines, points_per_line)
+    gis = data.gis
+    mapping, non_translatable = main.map_gis_to_ets_line_name(
+        gis, main.GIS_LINE_NAME_COLUMN, main.LINE_NAME_REGEX
+    )
+    aclinesegment_index = LineNameIndex(
+        data.aclinesegment, main.ACLINESEGMENT_LINE_NAME_COLUMN
+    )
+
+    def enrich(index=None):
+        return main.enrich_dlr_dataframe(
+            gis,
+            data.aclinesegment,
+            mapping,
+            non_translatable,
+            main.GIS_LINE_NAME_COLUMN,
+            main.ACLINESEGMENT_LINE_NAME_COLUMN,
+            index,
+        )
+
+    results = {
+        "pandas join": measure(
+            lambda: pandas_join(gis, data.aclinesegment, mapping, non_translatable)
+        ),
+        "join by codes": measure(enrich),
+        "join by codes, prebuilt index": measure(lambda: enrich(aclinesegment_index)),
+    }
+    enriched = enrich(aclinesegment_index)
+    pd.testing.assert_frame_equal(
+        enriched, pandas_join(gis, data.aclinesegment, mapping, non_translatable)
+    )
+
+    gis_mib = gis.memory_usage(deep=True).sum() / 2**20
+    print(
+        f"Enrichment of {len(gis)} GIS points ({gis_mib:.0f} MiB) into {len(enriched)} rows:"
+    )
+    for name, result in results.items():
+        print(
+            f"  {name:31s} {result['seconds']:8.3f} s {result['peak_mib']:9.1f} MiB peak"
+        )
@@ -0,0 +1,46 @@
+"""
+Benchmark of projecting coordinates to UTM zone 32N, chunked (as in the application) and on whole arrays,
+with the largest difference between the two.
+
+Run from the root of the repository with: python -m benchmarks.bench_projection [number of points]
+"""
+
+import sys
+from time import perf_counter
+import numpy as np
+import app.projection as projection
+from app.projection import UTM32N
+
+REPEATS = 3
+
+
+def time_projection(longitude, latitude) -> tuple[float, tuple[np.ndarray, np.ndarray]]:
+    # Best time of a number of repeats, and the projected points
+    times = []
+    for _ in range(REPEATS):
+        start_time = perf_counter()
+        result = UTM32N.project(longitude, latitude)
+        times.append(perf_counter() - start_time)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    rng = np.random.default_rng(1)
+    # Points within Denmark
+    longitude = rng.uniform(8.0, 15.2, points)
+    latitude = rng.uniform(54.5, 57.8, points)
+
+    chunked_time, chunked = time_projection(longitude, latitude)
+    projection.CHUNK_SIZE = points
+    whole_time, whole = time_projection(longitude, latitude)
+    difference = max(np.abs(a - b).max() for a, b in zip(chunked, whole))
+
+    print(f"Projection of {points} points to UTM 32N:")
+    print(
+        f"  chunked:       {chunked_time:8.3f} s ({points / chunked_time / 1e6:6.2f} million points/s)"
+    )
+    print(
+        f"  whole arrays:  {whole_time:8.3f} s ({points / whole_time / 1e6:6.2f} million points/s)"
+    )
+    print(f"  max. difference: {difference:.2e} m")
@@ -0,0 +1,123 @@
+"""
+Benchmark of the reload latency of the pipeline, when each of the three input files is changed on its own,
+and of the cold start latency when parsing the input files one by one and in parallel processes.
+
+The input files are generated with the synthetic data generator (see benchmarks/synthetic.py).
+
+Run from the root of the repository with: python -m benchmarks.bench_reload [number of GIS rows]
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import pandas as pd
+import app.main as main
+from .synthetic import SyntheticData, generate_dataset, write_dataset
+
+# Average number of points per line in the synthetic data
+POINTS_PER_LINE = 100
+
+
+def create_input_files(folder: str, rows: int) -> SyntheticData:
+    # Synthetic data with (roughly) the number of GIS rows
+    data = generate_dataset(
+        lines=max(rows // POINTS_PER_LINE, 1), points_per_line=POINTS_PER_LINE
+    )
+    (
+        main.GIS_FILEPATH,
+        main.ACLINESEGMENT_FILEPATH,
+        main.GIS_TO_ETS_MAP_FILEPATH,
+    ) = write_dataset(data, folder)
+    return data
+
+
+def write_changed_files(data: SyntheticData, folder: str) -> tuple[str, str, str]:
+    # Input files with one change each, as changes are detected by the content of the files: a point of the
+    # GIS data is moved, a line of the ACLinesegment data has DLR toggled and the mapping has a new name
+    gis = data.gis.copy()
+    gis.loc[gis.index[-1], "Lat_DD"] += 0.001
+    aclinesegment = data.aclinesegment.copy()
+    aclinesegment.loc[0, "DLR_ENABLED"] = (
+        "NO" if aclinesegment.loc[0, "DLR_ENABLED"] == "YES" else "YES"
+    )
+    # The forced mapping replaces names translated by the regex
+    translation, _ = main.map_gis_to_ets_line_name(
+        data.gis.copy(), main.GIS_LINE_NAME_COLUMN, main.LINE_NAME_REGEX
+    )
+    new_name = {
+        "GIS LINE NAME": next(iter(translation.values())),
+        "ETS LINE NAME": "E_CHANGED-NAME",
+        "COMMENT": "Benchmark",
+        "USER": "SYN",
+    }
+    mapping = pd.concat([data.mapping, pd.DataFrame([new_name])], ignore_index=True)
+    os.mkdir(folder)
+    return write_dataset(SyntheticData(gis, aclinesegment, mapping), folder)
+
+
+def quiet_logging():
+    logging.getLogger(main.__name__).setLevel(logging.CRITICAL)
+    logging.getLogger(main.__package__).setLevel(logging.CRITICAL)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    quiet_logging()
+
+    with tempfile.TemporaryDirectory() as folder:
+        data = create_input_files(folder, rows)
+        changed_files = write_changed_files(data, f"{folder}/changed")
+        print(f"Reload latency with {rows} GIS rows:")
+        with ProcessPoolExecutor(
+            max_workers=3,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=quiet_logging,
+        ) as executor:
+            # Starting the worker processes before timing, as in the running application
+            list(executor.map(abs, range(3)))
+
+            # The first run includes importing the excel readers in the worker processes
+            for run in ["first run", "next run"]:
+                start_time = perf_counter()
+                main.build_reload_pipeline(main.ParseCache(""), executor).run()
+                print(
+                    f"  cold start (parallel, {run}): {perf_counter() - start_time:8.3f} s"
+                )
+
+        pipeline = main.build_reload_pipeline(main.ParseCache(""))
+        start_time = perf_counter()
+        pipeline.run()
+        print(f"  cold start (sequential):      {perf_counter() - start_time:8.3f} s")
+
+        for name, file_path, changed_file, source, parse_stage in [
+            ("GIS file", main.GIS_FILEPATH, changed_files[0], "gis_file", "gis_sheet"),
+            (
+                "ACLinesegment file",
+                main.ACLINESEGMENT_FILEPATH,
+                changed_files[1],
+                "aclinesegment_file",
+                "aclinesegment",
+            ),
+            (
+                "mapping file",
+                main.GIS_TO_ETS_MAP_FILEPATH,
+                changed_files[2],
+                "gis_map_file",
+                "forced_mapping",
+            ),
+        ]:
+            shutil.copyfile(changed_file, file_path)
+            start_time = perf_counter()
+            updated = pipeline.run()
+            # The changed file is parsed, and the enriched data recomputed
+            missing = {source, parse_stage, "enriched"}.difference(updated)
+            assert not missing, f"Stages not updated by a changed {name}: {missing}"
+            print(
+                f"  {name + ' changed:':29} {perf_counter() - start_time:8.3f} s"
+                f"  (updated: {', '.join(updated)})"
+            )
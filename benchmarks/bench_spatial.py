@@ -0,0 +1,102 @@
+"""
+Benchmark of bounding box and radius queries with the spatial index, compared with a full scan of the
+coordinate table in SQL (sqlite, like the SQL interface of the API).
+
+Run from the root of the repository with: python -m benchmarks.bench_spatial [number of points]
+"""
+
+import sys
+import sqlite3
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from app.geometry import build_line_geometry, haversine_distance
+from app.spatial import SpatialIndex
+
+COORDINATE_COLUMNS = ["Long_DD", "Lat_DD"]
+POINTS_PER_LINE = 500
+QUERIES = 50
+
+
+def random_lines(points: int, seed: int = 1) -> pd.DataFrame:
+    # Random walks within Denmark, with roughly 100 metres between points
+    rng = np.random.default_rng(seed)
+    lines = max(points // POINTS_PER_LINE, 1)
+    start = np.column_stack(
+        [rng.uniform(8.1, 12.6, size=lines), rng.uniform(54.6, 57.7, size=lines)]
+    )[:, None, :]
+    steps = rng.normal(0.0006, 0.0006, size=(lines, POINTS_PER_LINE, 2))
+    coordinates = (start + np.cumsum(steps, axis=1)).reshape(-1, 2)
+    return pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": np.repeat(
+                [f"mrid-{i}" for i in range(lines)], POINTS_PER_LINE
+            ),
+            "OBJECTID": np.arange(lines * POINTS_PER_LINE),
+            "Long_DD": coordinates[:, 0],
+            "Lat_DD": coordinates[:, 1],
+        }
+    )
+
+
+def time_queries(function, queries) -> float:
+    start_time = perf_counter()
+    for query in queries:
+        function(*query)
+    return (perf_counter() - start_time) / len(queries)
+
+
+if __name__ == "__main__":
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    dataframe = random_lines(points)
+    rng = np.random.default_rng(2)
+    centres = np.column_stack(
+        [rng.uniform(8.5, 12.5, QUERIES), rng.uniform(54.8, 57.5, QUERIES)]
+    )
+
+    start_time = perf_counter()
+    geometry = build_line_geometry(
+        dataframe, "ACLINESEGMENT_MRID", "OBJECTID", COORDINATE_COLUMNS
+    )
+    index = SpatialIndex(geometry)
+    build_time = perf_counter() - start_time
+
+    connection = sqlite3.connect(":memory:")
+    dataframe.to_sql("GIS_DATA", connection, index=False)
+
+    def sql_bbox(min_lon, min_lat, max_lon, max_lat):
+        return connection.execute(
+            "SELECT DISTINCT ACLINESEGMENT_MRID FROM GIS_DATA"
+            " WHERE Long_DD BETWEEN ? AND ? AND Lat_DD BETWEEN ? AND ?;",
+            (min_lon, max_lon, min_lat, max_lat),
+        ).fetchall()
+
+    def sql_radius(lon, lat, radius):
+        # Full scan of all coordinates, with the distance calculated on the result
+        rows = pd.read_sql(
+            "SELECT ACLINESEGMENT_MRID, Long_DD, Lat_DD FROM GIS_DATA;", connection
+        )
+        distance = haversine_distance(rows["Long_DD"], rows["Lat_DD"], lon, lat)
+        return rows.loc[distance <= radius, "ACLINESEGMENT_MRID"].unique()
+
+    bbox_queries = [(x - 0.05, y - 0.05, x + 0.05, y + 0.05) for x, y in centres]
+    radius_queries = [(x, y, 5000) for x, y in centres]
+
+    print(f"Spatial queries on {len(dataframe)} points ({len(geometry)} lines):")
+    print(f"  building geometry and index:     {build_time:8.3f} s")
+    print(
+        f"  bbox query, SQL full scan:       {time_queries(sql_bbox, bbox_queries) * 1000:8.2f} ms"
+    )
+    print(
+        f"  bbox query, spatial index:       {time_queries(index.bbox, bbox_queries) * 1000:8.2f} ms"
+    )
+    print(
+        f"  radius query, SQL full scan:     {time_queries(sql_radius, radius_queries[:5]) * 1000:8.2f} ms"
+    )
+    print(
+        f"  radius query, spatial index:     {time_queries(index.radius, radius_queries) * 1000:8.2f} ms"
+    )
+    nearest_queries = [(x, y, 5) for x, y in centres]
+    print(
+        f"  5 nearest lines, spatial index:  {time_queries(index.nearest_lines, nearest_queries) * 1000:8.2f} ms"
+    )
@@ -0,0 +1,85 @@
+"""
+Benchmark of the GIS to ETS line name translation.
+
+Compares the original loop based translation (re.match per name) with the memoized translator, on a
+large set of distinct line names. The time of extracting the regex groups with 'Series.str.extract' is
+included for reference, as it is slower than matching the compiled regex name by name.
+
+Run from the root of the repository with: python -m benchmarks.bench_translation [number of names]
+"""
+
+import re
+import sys
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from singupy import conversion
+from app.main import LINE_NAME_REGEX
+from app.translation import LineNameTranslator
+
+
+def legacy_translation(
+    names: list[str], regex: str
+) -> tuple[dict[str, str], list[str]]:
+    # The translation loop as it was before the translator was introduced
+    gis_line_name_to_ets_line_name = {}
+    non_translatable = []
+    for name in names:
+        match = re.match(regex, name)
+        if match:
+            volt = conversion.kv_to_letter(int(match.group("volt")))
+            ets_name = f"{volt}_{match.group('STN1')}-{match.group('STN2')}"
+            if match.group("id") is not None:
+                ets_name += f'_{match.group("id")}'
+            gis_line_name_to_ets_line_name[name] = ets_name
+        else:
+            non_translatable.append(name)
+
+    return gis_line_name_to_ets_line_name, non_translatable
+
+
+def generate_line_names(count: int, seed: int = 1) -> list[str]:
+    # Random station codes, voltages and ids - and 1% names that can not be translated
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("ABCDEFGHIJKLMNOPRSTUVXYZÆØÅ"))
+    names = set()
+    while len(names) < count:
+        stations = ["".join(code) for code in rng.choice(letters, size=(count, 8))]
+        volts = rng.choice(["132", "150", "220", "400"], size=count)
+        ids = rng.choice(["", "1", "2", "3"], size=count)
+        for i in range(count):
+            if rng.random() < 0.01:
+                names.add(f"Kabel {stations[i][:4]} {i}")
+            else:
+                names.add(f"{stations[i][:4]}_{volts[i]}_{stations[i][4:]}{ids[i]}")
+    return list(names)[:count]
+
+
+def time_call(function, *args) -> tuple[float, object]:
+    start_time = perf_counter()
+    result = function(*args)
+    return perf_counter() - start_time, result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    names = generate_line_names(count)
+    translator = LineNameTranslator(LINE_NAME_REGEX)
+
+    extract_time, _ = time_call(
+        pd.Series(names, dtype=object).str.extract, re.compile(LINE_NAME_REGEX)
+    )
+    legacy_time, legacy_result = time_call(legacy_translation, names, LINE_NAME_REGEX)
+    cold_time, cold_result = time_call(translator.translate, names)
+    warm_time, warm_result = time_call(translator.translate, names)
+    new_names = generate_line_names(count // 100, seed=2)
+    reload_time, _ = time_call(translator.translate, names + new_names)
+
+    assert legacy_result == cold_result == warm_result
+
+    print(f"Translation of {count} distinct line names:")
+    print(f"  loop with re.match:             {legacy_time:8.3f} s")
+    print(f"  Series.str.extract (groups only): {extract_time:6.3f} s")
+    print(f"  translator (cold):              {cold_time:8.3f} s")
+    print(f"  translator (memoized):          {warm_time:8.3f} s")
+    print(f"  translator (+{len(new_names)} new names):   {reload_time:8.3f} s")
@@ -0,0 +1,348 @@
+"""
+Benchmark suite timing and memory profiling each step of the ingest pipeline at several data sizes.
+
+For each size, synthetic data is generated (see benchmarks/synthetic.py) and the steps are run on
+in-memory dataframes: translation of the GIS line names, validation of the data, enrichment, line
+geometry, the spatial index, the simplified lines, the projection to UTM 32N, the line state (hashes for
+the delta feed) and the lookup by MRID and line name. For sizes fitting in an excel sheet, the end-to-end
+reload from files is timed as well (cold start without cache, and restart with a warm parse cache).
+
+Time is the best of a number of repeats. Memory is the peak of memory allocated by the step (measured with
+tracemalloc in a separate run, as tracing slows down the step).
+
+Results are stored as JSON named by the current git commit, so runs of two commits can be compared:
+
+    python -m benchmarks.suite [--sizes small,medium] [--output benchmarks/results]
+    python -m benchmarks.suite --compare benchmarks/results/<old commit>.json benchmarks/results/<new>.json
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+from time import perf_counter
+import numpy as np
+import pandas as pd
+import app.main as main
+from app.geometry import build_line_geometry
+from app.lookup import LineLookup
+from app.projection import UTM32N, project_coordinates
+from app.simplify import simplify_lines
+from app.delta import line_state
+from app.spatial import SpatialIndex
+from app.translation import get_translator
+from app.validation import validate_gis_data
+from .synthetic import generate_dataset, write_dataset, EXCEL_MAX_ROWS
+
+# Number of lines and average points per line of each size
+SIZES = {
+    "small": (100, 50),
+    "medium": (1_000, 100),
+    "large": (10_000, 100),
+    "xlarge": (10_000, 300),
+}
+DEFAULT_SIZES = ["small", "medium", "large"]
+RESULTS_FOLDER = f"{os.path.dirname(__file__)}/results"
+# Relative change reported as a regression (or improvement) when comparing results
+THRESHOLD = 0.1
+
+
+def measure(function, setup=None, repeats: int = 3) -> dict[str, float]:
+    """
+    Measure the time (best of repeats) and peak allocated memory of a function.
+
+    Parameters
+    ----------
+    function: Callable
+        Function to measure, called with the output of setup as arguments.
+    setup: Callable
+        Function creating the arguments of each call (not measured), i.e. copies of dataframes that are
+        changed by the function.
+    repeats: int
+        Number of timed calls.
+
+    Returns
+    -------
+    dict[str, float]
+        Time in seconds and peak memory in MiB.
+    """
+    setup = setup or tuple
+    times = []
+    for _ in range(repeats):
+        args = setup()
+        gc.collect()
+        start_time = perf_counter()
+        function(*args)
+        times.append(perf_counter() - start_time)
+
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"seconds": min(times), "peak_mib": peak / 2**20}
+
+
+def benchmark_steps(data) -> dict[str, dict[str, float]]:
+    # The steps of the pipeline on in-memory dataframes, each given the output of the previous steps
+    gis = data.gis.copy()
+    mapping, non_translatable = main.map_gis_to_ets_line_name(
+        gis, main.GIS_LINE_NAME_COLUMN, main.LINE_NAME_REGEX
+    )
+    forced_mapping = dict(
+        zip(data.mapping["GIS LINE NAME"], data.mapping["ETS LINE NAME"])
+    )
+    mapping = {k: forced_mapping.get(v, v) for k, v in mapping.items()}
+    enriched = main.enrich_dlr_dataframe(
+        gis,
+        data.aclinesegment,
+        mapping,
+        non_translatable,
+        main.GIS_LINE_NAME_COLUMN,
+        main.ACLINESEGMENT_LINE_NAME_COLUMN,
+    )
+    geometry = build_line_geometry(
+        enriched,
+        main.ACLINESEGMENT_MRID_NAME_COLUMN,
+        main.GIS_ORDER_COLUMN,
+        main.GIS_COORDINATE_COLUMNS,
+    )
+
+    def translate(gis_dataframe):
+        # Translating without the memo of earlier translations (as on a cold start)
+        get_translator.cache_clear()
+        main.map_gis_to_ets_line_name(
+            gis_dataframe, main.GIS_LINE_NAME_COLUMN, main.LINE_NAME_REGEX
+        )
+
+    results = {
+        "translate": measure(translate, lambda: (data.gis.copy(),)),
+        "verify": measure(
+            lambda: validate_gis_data(
+                data.aclinesegment,
+                mapping,
+                enriched,
+                geometry,
+                main.VALIDATION_LIMITS,
+                main.ACLINESEGMENT_MRID_NAME_COLUMN,
+                main.ACLINESEGMENT_LINE_NAME_COLUMN,
+                main.ACLINESEGMENT_DLR_ENABLED_COLUMN,
+                main.GIS_ORDER_COLUMN,
+            )
+        ),
+        "enrich": measure(
+            lambda: main.enrich_dlr_dataframe(
+                gis,
+                data.aclinesegment,
+                mapping,
+                non_translatable,
+                main.GIS_LINE_NAME_COLUMN,
+                main.ACLINESEGMENT_LINE_NAME_COLUMN,
+            )
+        ),
+        "geometry": measure(
+            lambda: build_line_geometry(
+                enriched,
+                main.ACLINESEGMENT_MRID_NAME_COLUMN,
+                main.GIS_ORDER_COLUMN,
+                main.GIS_COORDINATE_COLUMNS,
+            )
+        ),
+        "spatial_index": measure(lambda: SpatialIndex(geometry)),
+        "simplify": measure(
+            lambda: simplify_lines(
+                geometry,
+                [10, 100, 1000],
+                main.ACLINESEGMENT_MRID_NAME_COLUMN,
+                main.GIS_ORDER_COLUMN,
+                main.GIS_COORDINATE_COLUMNS,
+            )
+        ),
+        "projection": measure(
+            lambda: project_coordinates(
+                enriched,
+                main.GIS_COORDINATE_COLUMNS,
+                UTM32N,
+                main.PROJECTED_COORDINATE_COLUMNS,
+            )
+        ),
+        "line_state": measure(
+            lambda: line_state(
+                enriched,
+                geometry,
+                main.ACLINESEGMENT_MRID_NAME_COLUMN,
+                main.ACLINESEGMENT_DLR_ENABLED_COLUMN,
+            )
+        ),
+        "lookup": measure(
+            lambda: LineLookup(
+                enriched,
+                geometry,
+                main.ACLINESEGMENT_MRID_NAME_COLUMN,
+                main.ACLINESEGMENT_LINE_NAME_COLUMN,
+            )
+        ),
+    }
+    results["enrich"]["rows"] = len(enriched)
+    return results
+
+
+def benchmark_reload(data) -> dict[str, dict[str, float]]:
+    # End-to-end reload from files, without and with the parse cache
+    with tempfile.TemporaryDirectory() as folder:
+        (
+            main.GIS_FILEPATH,
+            main.ACLINESEGMENT_FILEPATH,
+            main.GIS_TO_ETS_MAP_FILEPATH,
+        ) = write_dataset(data, folder)
+        cache = main.ParseCache(f"{folder}/cache")
+
+        def reload(cache):
+            get_translator.cache_clear()
+            main.build_reload_pipeline(cache).run()
+
+        return {
+            "reload_cold": measure(reload, lambda: (main.ParseCache(""),), repeats=1),
+            # The first call fills the cache
+            "reload_warm_cache": measure(reload, lambda: (cache,), repeats=2),
+        }
+
+
+def git_commit() -> tuple[str, bool]:
+    # Current commit and whether there are uncommitted changes to tracked files
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return git("rev-parse", "--short", "HEAD"), bool(
+            git("status", "--porcelain", "--untracked-files=no")
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def run_suite(sizes: list[str], reload: bool = True) -> dict:
+    """
+    Run the benchmarks at a number of sizes.
+
+    Parameters
+    ----------
+    sizes: list[str]
+        Names of the sizes (keys of SIZES).
+    reload: bool
+        If False, the end-to-end reload from files is skipped (writing large workbooks is slow).
+
+    Returns
+    -------
+    dict
+        Results, with the commit and environment the benchmarks were run in.
+    """
+    commit, dirty = git_commit()
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "sizes": {},
+    }
+    for size in sizes:
+        lines, points_per_line = SIZES[size]
+        data = generate_dataset(lines, points_per_line)
+        print(f"{size}: {lines} lines, {data.points} points", flush=True)
+
+        size_results = benchmark_steps(data)
+        if reload and data.points < EXCEL_MAX_ROWS:
+            size_results.update(benchmark_reload(data))
+
+        for step, result in size_results.items():
+            print(
+                f"  {step:18} {result['seconds']:9.3f} s {result['peak_mib']:9.1f} MiB",
+                flush=True,
+            )
+        results["sizes"][size] = {
+            "lines": lines,
+            "points": data.points,
+            "steps": size_results,
+        }
+    return results
+
+
+def compare(old: dict, new: dict, threshold: float = THRESHOLD) -> list[str]:
+    """
+    Compare two result files, step by step.
+
+    Returns
+    -------
+    list[str]
+        Lines of a report, where changes beyond the threshold are marked.
+    """
+    report = [f"{old['commit']} -> {new['commit']}"]
+    for size, new_size in new["sizes"].items():
+        old_size = old["sizes"].get(size)
+        if old_size is None:
+            continue
+        report.append(f"{size} ({new_size['points']} points):")
+        for step, new_step in new_size["steps"].items():
+            old_step = old_size["steps"].get(step)
+            if old_step is None:
+                continue
+            changes = []
+            for metric, unit in [("seconds", "s"), ("peak_mib", "MiB")]:
+                change = new_step[metric] / max(old_step[metric], 1e-9) - 1
+                mark = ""
+                if change > threshold:
+                    mark = " REGRESSION"
+                elif change < -threshold:
+                    mark = " improved"
+                changes.append(
+                    f"{old_step[metric]:8.3f} -> {new_step[metric]:8.3f} {unit:3} "
+                    f"({change:+6.1%}){mark}"
+                )
+            report.append(f"  {step:18} " + "  ".join(changes))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(DEFAULT_SIZES),
+        help=f"Comma separated sizes, of: {', '.join(SIZES)}",
+    )
+    parser.add_argument("--no-reload", action="store_true")
+    parser.add_argument("--output", default=RESULTS_FOLDER)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as old_file, open(args.compare[1]) as new_file:
+            print("\n".join(compare(json.load(old_file), json.load(new_file))))
+    else:
+        # The logs of the steps would drown the results
+        logging.getLogger(main.__name__).setLevel(logging.CRITICAL)
+        logging.getLogger(main.__package__).setLevel(logging.CRITICAL)
+
+        results = run_suite(args.sizes.split(","), reload=not args.no_reload)
+        os.makedirs(args.output, exist_ok=True)
+        name = results["commit"] + ("-dirty" if results["dirty"] else "")
+        file_path = f"{args.output}/{name}.json"
+        # Keeping the results of other sizes run on the same commit
+        if os.path.isfile(file_path):
+            with open(file_path) as file:
+                results["sizes"] = {**json.load(file)["sizes"], **results["sizes"]}
+        with open(file_path, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {file_path}")
@@ -0,0 +1,246 @@
+"""
+Seeded generator of synthetic input files (GIS workbook, ACLinesegment CSV and mapping workbook).
+
+The data is built to exercise the same paths as the production data:
+
+- Lines are random walks within Denmark with roughly 300 metres between points, and a varying number
+  of points per line.
+- GIS line names follow the '<STN1>_<volt>_<STN2><id>' pattern, with station codes containing Æ, Ø and Å
+  (the ACLinesegment CSV is written in cp1252, like the export from ETS). Some names have stray spaces.
+- A share of the GIS names can not be translated (i.e. cables named 'Kabel ...').
+- Some ETS lines are split into more sections (one MRID per section), some ETS lines are not in GIS and
+  some ETS names differ from the translated GIS name, which is fixed by the mapping workbook.
+
+Used by the benchmarks, i.e.: python -m benchmarks.synthetic <folder> [lines] [points per line]
+"""
+
+import sys
+import uuid
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from singupy import conversion
+
+GIS_SHEET_NAME = "GIS_Driftstr_luftledning_koordi"
+MAP_SHEET_NAME = "GisMapping"
+STATION_LETTERS = list("ABCDEFGHIJKLMNOPRSTUVXYZÆØÅ")
+VOLTAGES = [132, 150, 220, 400]
+# Max. number of rows in a sheet of an excel workbook (including the header)
+EXCEL_MAX_ROWS = 1_048_576
+
+
+@dataclass
+class SyntheticData:
+    """
+    Dataframes with the content of the three input files.
+
+    Parameters
+    ----------
+    gis: pd.DataFrame
+        Content of the GIS workbook (one row per point).
+    aclinesegment: pd.DataFrame
+        Content of the ACLinesegment CSV (without the row of hyphens below the header).
+    mapping: pd.DataFrame
+        Content of the mapping workbook.
+    """
+
+    gis: pd.DataFrame
+    aclinesegment: pd.DataFrame
+    mapping: pd.DataFrame
+
+    @property
+    def points(self) -> int:
+        return len(self.gis)
+
+
+def _station_codes(rng: np.random.Generator, count: int) -> list[str]:
+    # Unique three letter station codes (there are 27^3 of them, plenty for 10k lines)
+    codes = set()
+    while len(codes) < count:
+        codes.update(
+            "".join(code)
+            for code in rng.choice(STATION_LETTERS, size=(count - len(codes), 3))
+        )
+    return sorted(codes)[:count]
+
+
+def generate_dataset(
+    lines: int = 1000,
+    points_per_line: int = 100,
+    seed: int = 1,
+    untranslatable_ratio: float = 0.02,
+    split_ratio: float = 0.1,
+    renamed_ratio: float = 0.02,
+    ets_only_ratio: float = 0.05,
+) -> SyntheticData:
+    """
+    Generate the content of the input files.
+
+    Parameters
+    ----------
+    lines: int
+        Number of lines in the GIS data.
+    points_per_line: int
+        Average number of points per line.
+    seed: int
+        Seed of the random generator, the same arguments always give the same data.
+    untranslatable_ratio: float
+        Share of GIS lines with names that can not be translated.
+    split_ratio: float
+        Share of ETS lines split into two sections.
+    renamed_ratio: float
+        Share of ETS lines with a name different from the translated GIS name (listed in the mapping).
+    ets_only_ratio: float
+        Number of ETS lines without GIS data, relative to the number of GIS lines.
+
+    Returns
+    -------
+    SyntheticData
+        The generated data.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Line names, where station pairs are unique so each name is only used once
+    stations = _station_codes(rng, max(int(np.sqrt(lines)) * 2, 8))
+    pairs = set()
+    while len(pairs) < lines:
+        stn1, stn2 = rng.choice(len(stations), size=2, replace=False)
+        line_id = rng.choice(["", "", "1", "2"])
+        pairs.add((stations[stn1], stations[stn2], line_id))
+    pairs = sorted(pairs)
+    volts = rng.choice(VOLTAGES, size=lines)
+    untranslatable = rng.random(lines) < untranslatable_ratio
+
+    gis_names, ets_names = [], []
+    for i, ((stn1, stn2, line_id), volt) in enumerate(zip(pairs, volts)):
+        if untranslatable[i]:
+            gis_names.append(f"Kabel {stn1}-{stn2} {i}")
+            ets_names.append(None)
+        else:
+            gis_names.append(f"{stn1}_{volt}_{stn2}{line_id}")
+            ets_name = f"{conversion.kv_to_letter(int(volt))}_{stn1}-{stn2}"
+            ets_names.append(f"{ets_name}_{line_id}" if line_id else ets_name)
+
+    # A few names with spaces, which are removed before translation
+    spaced = rng.random(lines) < 0.05
+    gis_names = [
+        f" {name}" if space and not bad else name
+        for name, space, bad in zip(gis_names, spaced, untranslatable)
+    ]
+
+    # Points as random walks, with 1 to 2 times the average number of points per line
+    counts = rng.integers(
+        max(points_per_line // 2, 2), max(points_per_line * 3 // 2, 3), size=lines
+    )
+    starts = np.repeat(
+        np.column_stack(
+            [rng.uniform(8.1, 12.6, size=lines), rng.uniform(54.6, 57.7, size=lines)]
+        ),
+        counts,
+        axis=0,
+    )
+    steps = rng.normal(0.0, 0.002, size=(counts.sum(), 2))
+    # Restarting the cumulative sum of steps at the first point of each line
+    first = np.cumsum(counts) - counts
+    steps[first] = 0
+    walk = np.cumsum(steps, axis=0)
+    walk -= np.repeat(walk[first], counts, axis=0)
+    coordinates = np.round(starts + walk, 6)
+
+    line_numbers = np.repeat(np.arange(1, lines + 1), counts)
+    gis = pd.DataFrame(
+        {
+            "OBJECTID": np.arange(1, counts.sum() + 1),
+            "Name": np.repeat(np.array(gis_names, dtype=object), counts),
+            "ORIG_FID": line_numbers,
+            "Long_DD": coordinates[:, 0],
+            "Lat_DD": coordinates[:, 1],
+        }
+    )
+
+    # ETS lines, some with other names than the translated GIS name
+    translated = [name for name in ets_names if name is not None]
+    renamed = rng.random(len(translated)) < renamed_ratio
+    mapping = pd.DataFrame(
+        {
+            "GIS LINE NAME": [n for n, r in zip(translated, renamed) if r],
+            "ETS LINE NAME": [f"{n}X" for n, r in zip(translated, renamed) if r],
+            "COMMENT": "Andet navn i ETS",
+            "USER": "SYN",
+        }
+    )
+    ets_lines = [f"{n}X" if r else n for n, r in zip(translated, renamed)]
+    ets_only = _station_codes(rng, max(int(lines * ets_only_ratio), 1))
+    ets_lines += [f"E_{code}-ÆØÅ" for code in ets_only]
+
+    # Split lines have one row (MRID) per section
+    sections = np.where(rng.random(len(ets_lines)) < split_ratio, 2, 1)
+    ets_names = np.repeat(np.array(ets_lines, dtype=object), sections)
+    mrid_rng = np.random.default_rng(seed + 1)
+    aclinesegment = pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": [
+                str(uuid.UUID(bytes=mrid_rng.bytes(16), version=4))
+                for _ in range(len(ets_names))
+            ],
+            "LINE_EMSNAME": ets_names,
+            "DLR_ENABLED": rng.choice(["YES", "NO"], size=len(ets_names), p=[0.7, 0.3]),
+        }
+    )
+
+    return SyntheticData(gis=gis, aclinesegment=aclinesegment, mapping=mapping)
+
+
+def write_dataset(data: SyntheticData, folder: str) -> tuple[str, str, str]:
+    """
+    Write the input files to a folder.
+
+    Parameters
+    ----------
+    data: SyntheticData
+        The generated data.
+    folder: str
+        Folder to write the files in.
+
+    Returns
+    -------
+    tuple[str, str, str]
+        Paths of the GIS workbook, the ACLinesegment CSV and the mapping workbook.
+    """
+    if data.points >= EXCEL_MAX_ROWS:
+        raise ValueError(
+            "%d points do not fit in an excel sheet (max. %d rows).",
+            data.points,
+            EXCEL_MAX_ROWS - 1,
+        )
+
+    gis_filepath = f"{folder}/gis.xlsx"
+    data.gis.to_excel(gis_filepath, sheet_name=GIS_SHEET_NAME, index=False)
+
+    # The ETS export has a row of hyphens below the header
+    aclinesegment_filepath = f"{folder}/aclinesegment.csv"
+    hyphens = pd.DataFrame(
+        [["-" * len(column) for column in data.aclinesegment.columns]],
+        columns=data.aclinesegment.columns,
+    )
+    pd.concat([hyphens, data.aclinesegment]).to_csv(
+        aclinesegment_filepath, index=False, encoding="cp1252"
+    )
+
+    gis_map_filepath = f"{folder}/map.xlsx"
+    data.mapping.to_excel(gis_map_filepath, sheet_name=MAP_SHEET_NAME, index=False)
+
+    return gis_filepath, aclinesegment_filepath, gis_map_filepath
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1]
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    points_per_line = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+    data = generate_dataset(lines, points_per_line)
+    for file_path in write_dataset(data, folder):
+        print(file_path)
+    print(
+        f"{lines} lines, {data.points} points and {len(data.aclinesegment)} ACLinesegments"
+    )
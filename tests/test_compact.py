@@ -0,0 +1,66 @@
+import os
+import sqlite3
+import pandas as pd
+from app.compact import compact_dataframe, restore_dataframe, memory_report
+
+# Location of test files used in the different test
+TESTDATA_PATH = f"{os.path.dirname(__file__)}/../tests/valid-testdata/"
+TEST_DATA_FILEPATH = f"{TESTDATA_PATH}" + "test_dataframe.csv"
+COORDINATE_COLUMNS = ["Long_DD", "Lat_DD"]
+
+
+def test_compact_dataframe_dtypes_and_restore():
+
+    dataframe = pd.read_csv(TEST_DATA_FILEPATH, delimiter=";")
+    compact = compact_dataframe(dataframe, COORDINATE_COLUMNS)
+
+    assert isinstance(compact["ACLINESEGMENT_MRID"].dtype, pd.CategoricalDtype)
+    assert isinstance(compact["DLR_ENABLED"].dtype, pd.CategoricalDtype)
+    assert compact["OBJECTID"].dtype == "int8"
+    assert compact["Long_DD"].dtype == "int32"
+    assert (
+        compact.memory_usage(deep=True).sum()
+        < dataframe.memory_usage(deep=True).sum() / 2
+    )
+    assert (
+        pd.testing.assert_frame_equal(
+            dataframe, restore_dataframe(compact), check_dtype=True
+        )
+        is None
+    )
+
+
+def test_compact_dataframe_keeps_coordinates_that_can_not_be_scaled():
+
+    dataframe = pd.DataFrame({"Long_DD": [12.123456789], "Lat_DD": [55.1]})
+    compact = compact_dataframe(dataframe, COORDINATE_COLUMNS)
+
+    assert compact["Long_DD"].dtype == "float64"
+    assert compact["Lat_DD"].dtype == "int32"
+    assert pd.testing.assert_frame_equal(dataframe, restore_dataframe(compact)) is None
+
+
+def test_sql_results_are_unchanged():
+
+    dataframe = pd.read_csv(TEST_DATA_FILEPATH, delimiter=";")
+    published = restore_dataframe(
+        compact_dataframe(dataframe, COORDINATE_COLUMNS), keep_categories=True
+    )
+    query = "SELECT * FROM GIS_DATA WHERE DLR_ENABLED = 'YES' ORDER BY OBJECTID;"
+
+    results = []
+    for frame in [dataframe, published]:
+        with sqlite3.connect(":memory:") as connection:
+            frame.to_sql("GIS_DATA", connection, index=False)
+            results.append(connection.execute(query).fetchall())
+
+    assert results[0] == results[1]
+
+
+def test_memory_report():
+
+    report = memory_report(pd.DataFrame({"OBJECTID": [1, 2, 3]}))
+
+    assert "OBJECTID" in report
+    assert "int64" in report
+    assert "Total:" in report
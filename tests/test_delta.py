@@ -0,0 +1,121 @@
+import json
+import urllib.error
+import urllib.request
+import pandas as pd
+from app.delta import ChangeLog, line_state, diff_line_states, add_change_endpoints
+from app.geometry import build_line_geometry
+from app.rest import RestServer
+
+COORDINATE_COLUMNS = ["Long_DD", "Lat_DD"]
+
+
+def state(table: pd.DataFrame) -> pd.DataFrame:
+    geometry = build_line_geometry(
+        table, "ACLINESEGMENT_MRID", "OBJECTID", COORDINATE_COLUMNS
+    )
+    return line_state(table, geometry, "ACLINESEGMENT_MRID", "DLR_ENABLED")
+
+
+def lines(**changes) -> pd.DataFrame:
+    # Three lines with three points each, where keyword arguments replace columns
+    table = pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": ["a"] * 3 + ["b"] * 3 + ["c"] * 3,
+            "DLR_ENABLED": ["YES"] * 6 + ["NO"] * 3,
+            "OBJECTID": range(9),
+            "Long_DD": [10.0 + i / 100 for i in range(9)],
+            "Lat_DD": [55.0 + i / 100 for i in range(9)],
+        }
+    )
+    for column, values in changes.items():
+        table[column] = values
+    return table
+
+
+def test_unchanged_lines_have_equal_state():
+
+    # Rows in another order give the same geometry hash
+    assert state(lines()).equals(state(lines().iloc[::-1]))
+    assert diff_line_states(state(lines()), state(lines()), "DLR_ENABLED").empty
+
+
+def test_diff_finds_changed_lines():
+
+    old = lines()
+    new = lines(
+        Long_DD=old["Long_DD"].where(old.index != 1, 10.5),
+        DLR_ENABLED=["YES"] * 3 + ["NO"] * 3 + ["NO"] * 3,
+    )
+    new = pd.concat(
+        [
+            new[new["ACLINESEGMENT_MRID"] != "c"],
+            lines().head(3).assign(ACLINESEGMENT_MRID="d"),
+        ]
+    )
+
+    changes = diff_line_states(state(old), state(new), "DLR_ENABLED")
+
+    assert changes["CHANGES"].to_dict() == {
+        "a": ["geometry"],
+        "b": ["dlr_enabled"],
+        "c": ["removed"],
+        "d": ["added"],
+    }
+    assert changes.loc["b", "DLR_ENABLED"] == "NO"
+
+
+def test_reordered_points_change_geometry():
+
+    old = lines()
+    new = lines(OBJECTID=[1, 0, 2, 3, 4, 5, 6, 7, 8])
+
+    changes = diff_line_states(state(old), state(new), "DLR_ENABLED")
+
+    assert changes["CHANGES"].to_dict() == {"a": ["geometry"]}
+
+
+def test_change_log_keeps_latest_versions():
+
+    change_log = ChangeLog("DLR_ENABLED", max_versions=2)
+    change_log.record(1, state(lines()))
+    change_log.record(2, state(lines(DLR_ENABLED="NO")))
+    change_log.record(3, state(lines().head(6)))
+
+    version, since_2 = change_log.since(2)
+    _, since_0 = change_log.since(0)
+
+    assert version == 3
+    assert since_2["CHANGES"].to_dict() == {
+        "a": ["dlr_enabled"],
+        "b": ["dlr_enabled"],
+        "c": ["removed"],
+    }
+    assert since_0["CHANGES"].to_dict() == {"a": ["added"], "b": ["added"]}
+    assert change_log.since(1) is None
+
+
+def test_change_endpoint():
+
+    change_log = ChangeLog("DLR_ENABLED")
+    change_log.record(1, state(lines()))
+    server = RestServer(0)
+    add_change_endpoints(server, change_log)
+    server.start()
+
+    url = f"http://localhost:{server.port}"
+    with urllib.request.urlopen(f"{url}/changes?since=0") as response:
+        changes = json.loads(response.read())
+    try:
+        urllib.request.urlopen(f"{url}/changes?since=7")
+    except urllib.error.HTTPError as e:
+        unknown_version_status = e.code
+    server.stop()
+
+    assert changes["from_version"] == 0
+    assert changes["to_version"] == 1
+    assert changes["changes"][0] == {
+        "ACLINESEGMENT_MRID": "a",
+        "CHANGES": ["added"],
+        "DLR_ENABLED": "YES",
+    }
+    assert unknown_version_status == 410
@@ -0,0 +1,80 @@
+import urllib.error
+import urllib.request
+import pandas as pd
+from app.export import SnapshotExporter, add_export_endpoints, read_export
+from app.rest import RestServer
+from app.snapshot import SnapshotStore
+
+
+def build_table() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": pd.Categorical(["m1", "m1", "m2", "m3"]),
+            "LINE_EMSNAME": ["E_AAA-BBB", "E_AAA-BBB", "C_ÆØÅ-CCC", None],
+            "OBJECTID": pd.array([1, 2, 3, 4], dtype="int32"),
+            "Lat_DD": [55.1, 55.2, float("nan"), 57.0],
+            "DLR_ENABLED": [True, True, False, True],
+        }
+    )
+
+
+def test_export_round_trip_keeps_dtypes():
+
+    store = SnapshotStore()
+    store.publish({"GIS_DATA": build_table()}, {})
+    exporter = SnapshotExporter(store, "ACLINESEGMENT_MRID")
+
+    for export_format in ["arrow", "parquet"]:
+        version, buffer = exporter.export("GIS_DATA", export_format)
+        pd.testing.assert_frame_equal(read_export(buffer, export_format), build_table())
+        # The serialized table is reused by later requests
+        assert exporter.export("GIS_DATA", export_format)[1] is buffer
+        assert version == 1
+
+
+def test_export_projection_filter_and_new_version():
+
+    store = SnapshotStore()
+    store.publish({"GIS_DATA": build_table()}, {})
+    exporter = SnapshotExporter(store, "ACLINESEGMENT_MRID")
+
+    _, buffer = exporter.export(
+        "GIS_DATA", "arrow", columns=["OBJECTID", "Lat_DD"], mrids=["m1", "m3"]
+    )
+    _, full = exporter.export("GIS_DATA", "arrow")
+    store.publish({"GIS_DATA": build_table().iloc[:1]}, {})
+    version, new_full = exporter.export("GIS_DATA", "arrow")
+
+    exported = read_export(buffer, "arrow")
+    assert list(exported.columns) == ["OBJECTID", "Lat_DD"]
+    assert list(exported["OBJECTID"]) == [1, 2, 4]
+    assert version == 2
+    assert len(read_export(new_full, "arrow")) == 1
+    assert len(read_export(full, "arrow")) == 4
+
+
+def test_export_endpoint():
+
+    store = SnapshotStore()
+    server = RestServer(0)
+    add_export_endpoints(
+        server, SnapshotExporter(store, "ACLINESEGMENT_MRID"), "GIS_DATA"
+    )
+    server.start()
+
+    url = f"http://localhost:{server.port}"
+    statuses = []
+    for query in ["", "?format=csv", "?columns=UNKNOWN"]:
+        try:
+            urllib.request.urlopen(f"{url}/export{query}")
+        except urllib.error.HTTPError as e:
+            statuses.append(e.code)
+        store.publish({"GIS_DATA": build_table()}, {})
+    with urllib.request.urlopen(f"{url}/export?format=parquet&mrid=m2") as response:
+        content_type = response.headers["Content-Type"]
+        exported = read_export(response.read(), "parquet")
+    server.stop()
+
+    assert statuses == [503, 400, 400]
+    assert content_type == "application/vnd.apache.parquet"
+    assert list(exported["LINE_EMSNAME"]) == ["C_ÆØÅ-CCC"]
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from app.compact import compact_dataframe
+from app.geometry import build_line_geometry
+
+COORDINATE_COLUMNS = ["Long_DD", "Lat_DD"]
+# Length of one degree along a meridian in metres
+DEGREE_LENGTH = 111195.08
+
+# Line "B" goes north and then east (points out of order), line "A" is a single point
+TEST_DATAFRAME = pd.DataFrame(
+    {
+        "ACLINESEGMENT_MRID": ["B", "B", "A", "B"],
+        "OBJECTID": [3, 1, 7, 2],
+        "Long_DD": [1.0, 0.0, 5.0, 0.0],
+        "Lat_DD": [1.0, 0.0, 5.0, 1.0],
+    }
+)
+
+
+def check_geometry(geometry):
+    assert list(geometry.mrids) == ["A", "B"]
+    assert list(geometry.offsets) == [0, 1, 4]
+    assert list(geometry.objectid) == [7, 1, 2, 3]
+    assert list(geometry.span_offsets) == [0, 0, 2]
+    np.testing.assert_allclose(
+        geometry.span_length,
+        [DEGREE_LENGTH, DEGREE_LENGTH * np.cos(np.radians(1))],
+        rtol=1e-4,
+    )
+    np.testing.assert_allclose(geometry.span_bearing, [0, 90], atol=0.01)
+    np.testing.assert_allclose(geometry.line_length, [0, geometry.span_length.sum()])
+    np.testing.assert_allclose(geometry.bbox, [[5, 5, 5, 5], [0, 0, 1, 1]])
+
+
+def test_build_line_geometry():
+
+    check_geometry(
+        build_line_geometry(
+            TEST_DATAFRAME, "ACLINESEGMENT_MRID", "OBJECTID", COORDINATE_COLUMNS
+        )
+    )
+
+
+def test_build_line_geometry_from_compact_dataframe():
+
+    check_geometry(
+        build_line_geometry(
+            compact_dataframe(TEST_DATAFRAME, COORDINATE_COLUMNS),
+            "ACLINESEGMENT_MRID",
+            "OBJECTID",
+            COORDINATE_COLUMNS,
+        )
+    )
+
+
+def test_build_line_geometry_leaves_out_points_without_mrid():
+
+    dataframe = pd.concat(
+        [
+            TEST_DATAFRAME,
+            pd.DataFrame(
+                {
+                    "ACLINESEGMENT_MRID": [None, np.nan],
+                    "OBJECTID": [0, 9],
+                    "Long_DD": [2.0, 3.0],
+                    "Lat_DD": [2.0, 3.0],
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+
+    check_geometry(
+        build_line_geometry(
+            dataframe, "ACLINESEGMENT_MRID", "OBJECTID", COORDINATE_COLUMNS
+        )
+    )
+
+
+def test_geometry_tables():
+
+    geometry = build_line_geometry(
+        TEST_DATAFRAME, "ACLINESEGMENT_MRID", "OBJECTID", COORDINATE_COLUMNS
+    )
+    lines = geometry.lines_dataframe("ACLINESEGMENT_MRID")
+    spans = geometry.spans_dataframe("ACLINESEGMENT_MRID", "OBJECTID")
+
+    assert list(lines["POINTS"]) == [1, 3]
+    assert list(spans["ACLINESEGMENT_MRID"]) == ["B", "B"]
+    assert list(spans["SPAN"]) == [0, 1]
+    assert list(spans["FROM_OBJECTID"]) == [1, 2]
+    assert list(spans["TO_OBJECTID"]) == [2, 3]
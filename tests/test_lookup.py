@@ -0,0 +1,100 @@
+import json
+import urllib.error
+import urllib.request
+import pandas as pd
+from app.geometry import build_line_geometry
+from app.lookup import LineLookup, add_lookup_endpoints
+from app.rest import RestServer
+
+COORDINATE_COLUMNS = ["Long_DD", "Lat_DD"]
+
+
+def build_lookup() -> tuple[pd.DataFrame, LineLookup]:
+    # Line "E_AAA-BBB" is split into two MRIDs, and the rows of the MRIDs are not in order
+    table = pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": ["m1", "m2", "m1", "m3", "m2", "m1"],
+            "LINE_EMSNAME": ["E_AAA-BBB", "E_AAA-BBB", "E_AAA-BBB", "C_ÆØÅ-CCC"]
+            + ["E_AAA-BBB", "E_AAA-BBB"],
+            "OBJECTID": [3, 10, 1, 20, 11, 2],
+            "Long_DD": [10.3, 11.0, 10.1, 12.0, 11.1, 10.2],
+            "Lat_DD": [55.3, 56.0, 55.1, 57.0, 56.1, 55.2],
+        }
+    )
+    geometry = build_line_geometry(
+        table, "ACLINESEGMENT_MRID", "OBJECTID", COORDINATE_COLUMNS
+    )
+    return table, LineLookup(table, geometry, "ACLINESEGMENT_MRID", "LINE_EMSNAME")
+
+
+def test_lookup_finds_rows_of_mrid_and_line_name():
+
+    table, lookup = build_lookup()
+
+    assert list(lookup.rows("m1")) == [0, 2, 5]
+    assert list(lookup.rows("unknown")) == []
+    assert sorted(lookup.line_rows("E_AAA-BBB")) == [0, 1, 2, 4, 5]
+    assert json.loads(lookup.mrid_json["m2"]) == table.iloc[[1, 4]].to_dict("records")
+    assert len(json.loads(lookup.line_json["E_AAA-BBB"])) == 5
+    assert json.loads(lookup.line_json["C_ÆØÅ-CCC"])[0]["OBJECTID"] == 20
+
+
+def test_lookup_geojson_has_points_in_order():
+
+    _, lookup = build_lookup()
+
+    feature = json.loads(lookup.mrid_geojson["m1"])
+    collection = json.loads(lookup.line_geojson["E_AAA-BBB"])
+
+    assert feature["geometry"]["coordinates"] == [
+        [10.1, 55.1],
+        [10.2, 55.2],
+        [10.3, 55.3],
+    ]
+    assert feature["properties"]["LINE_EMSNAME"] == "E_AAA-BBB"
+    assert feature["properties"]["POINTS"] == 3
+    assert collection["type"] == "FeatureCollection"
+    assert [f["properties"]["ACLINESEGMENT_MRID"] for f in collection["features"]] == [
+        "m1",
+        "m2",
+    ]
+
+
+def test_lookup_endpoints():
+
+    _, lookup = build_lookup()
+    server = RestServer(0)
+    add_lookup_endpoints(server, lambda: lookup)
+    server.start()
+
+    url = f"http://localhost:{server.port}"
+    with urllib.request.urlopen(f"{url}/lines/points?mrid=m3") as response:
+        points = json.loads(response.read())
+    with urllib.request.urlopen(f"{url}/lines/geojson?line_name=E_AAA-BBB") as response:
+        content_type = response.headers["Content-Type"]
+        collection = json.loads(response.read())
+    try:
+        urllib.request.urlopen(f"{url}/lines/points?mrid=unknown")
+    except urllib.error.HTTPError as e:
+        unknown_status = e.code
+    server.stop()
+
+    assert points[0]["LINE_EMSNAME"] == "C_ÆØÅ-CCC"
+    assert content_type == "application/geo+json"
+    assert len(collection["features"]) == 2
+    assert unknown_status == 404
+
+
+def test_lookup_leaves_out_rows_without_mrid():
+
+    table, _ = build_lookup()
+    table.loc[len(table)] = [None, "E_AAA-BBB", 4, 10.4, 55.4]
+    geometry = build_line_geometry(
+        table, "ACLINESEGMENT_MRID", "OBJECTID", COORDINATE_COLUMNS
+    )
+    lookup = LineLookup(table, geometry, "ACLINESEGMENT_MRID", "LINE_EMSNAME")
+
+    assert list(lookup.rows("m1")) == [0, 2, 5]
+    assert sorted(lookup.line_rows("E_AAA-BBB")) == [0, 1, 2, 4, 5]
+    assert json.loads(lookup.mrid_json["m2"]) == table.iloc[[1, 4]].to_dict("records")
+    assert json.loads(lookup.mrid_geojson["m1"])["properties"]["POINTS"] == 3
@@ -0,0 +1,65 @@
+import math
+import urllib.request
+import pandas as pd
+from app.metrics import MetricsRegistry, add_metrics_endpoint, count_rows
+from app.pipeline import Pipeline
+from app.rest import RestServer
+
+
+def test_stage_metrics_are_recorded():
+
+    registry = MetricsRegistry()
+    dataframe = pd.DataFrame({"a": range(10)})
+
+    for _ in range(2):
+        finish = registry.observe_stage("join", [dataframe, {"x": 1, "y": 2}])
+        finish((dataframe.head(4), {"x": 1}, []))
+
+    metrics = registry.stages["join"]
+    assert metrics.runs == 2
+    assert metrics.input_rows == 12
+    assert metrics.output_rows == 4
+    assert metrics.frame_bytes == dataframe.head(4).memory_usage(deep=True).sum()
+    assert metrics.total_seconds >= metrics.seconds >= 0
+    assert count_rows("/data/file.xlsx") is None
+
+
+def test_pipeline_observer_measures_stages(tmp_path):
+
+    (tmp_path / "a").write_text("a")
+    registry = MetricsRegistry()
+    pipeline = Pipeline()
+    pipeline.add_observer(registry.observe_stage)
+    pipeline.add_source("a_file", str(tmp_path / "a"))
+    pipeline.add_stage(
+        "a", lambda p: pd.DataFrame({"a": list(open(p).read())}), ["a_file"]
+    )
+    pipeline.add_stage("b", lambda a: a.head(0), ["a"])
+    pipeline.run()
+
+    assert set(registry.stages) == {"a", "b"}
+    assert registry.stages["b"].input_rows == 1
+    assert registry.stages["b"].output_rows == 0
+
+
+def test_metrics_endpoint_renders_prometheus_text():
+
+    registry = MetricsRegistry()
+    registry.observe_stage("gis_sheet")(pd.DataFrame({"a": range(3)}))
+    registry.set_gauge("untranslatable_line_names", "Names not translated.", 2)
+    registry.gauge("snapshot_age_seconds", "Age of the snapshot.", lambda: math.nan)
+    server = RestServer(0)
+    add_metrics_endpoint(server, registry)
+    server.start()
+
+    with urllib.request.urlopen(f"http://localhost:{server.port}/metrics") as response:
+        content_type = response.headers["Content-Type"]
+        lines = response.read().decode("utf-8").splitlines()
+    server.stop()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert 'gis_provider_stage_runs_total{stage="gis_sheet"} 1' in lines
+    assert 'gis_provider_stage_output_rows{stage="gis_sheet"} 3' in lines
+    assert "# TYPE gis_provider_stage_duration_seconds gauge" in lines
+    assert "gis_provider_untranslatable_line_names 2" in lines
+    assert "gis_provider_snapshot_age_seconds NaN" in lines
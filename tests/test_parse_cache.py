@@ -0,0 +1,68 @@
+import os
+import hashlib
+import pickle
+import pandas as pd
+from app.parse_cache import ParseCache, SourceFile, file_digest, source_digest
+
+# Location of test files used in the different test
+TESTDATA_PATH = f"{os.path.dirname(__file__)}/../tests/valid-testdata/"
+GIS_FILEPATH = f"{TESTDATA_PATH}" + "GIS_Driftstr_luftledning_koordinater.xls"
+GIS_SHEET_NAME = "GIS_Driftstr_luftledning_koordi"
+
+
+def test_cache_roundtrip_of_parsed_sheet(tmp_path):
+
+    cache = ParseCache(str(tmp_path))
+    gis_dataframe = pd.read_excel(GIS_FILEPATH, sheet_name=GIS_SHEET_NAME)
+    key = cache.key(file_digest(GIS_FILEPATH), sheet=GIS_SHEET_NAME)
+
+    assert cache.load("gis_sheet", key) is None
+
+    cache.store("gis_sheet", key, gis_dataframe)
+
+    assert (
+        pd.testing.assert_frame_equal(
+            gis_dataframe, cache.load("gis_sheet", key), check_dtype=True
+        )
+        is None
+    )
+
+
+def test_cache_key_depends_on_settings_and_old_entries_are_removed(tmp_path):
+
+    cache = ParseCache(str(tmp_path))
+    dataframe = pd.DataFrame({"Name": ["ASK_400_ERS"]})
+    digest = file_digest(GIS_FILEPATH)
+    old_key = cache.key(digest, sheet=GIS_SHEET_NAME, regex="a")
+    new_key = cache.key(digest, sheet=GIS_SHEET_NAME, regex="b")
+
+    assert old_key != new_key
+
+    cache.store("gis_sheet", old_key, dataframe)
+    cache.store("gis_sheet", new_key, dataframe)
+
+    assert cache.load("gis_sheet", old_key) is None
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_disabled_cache():
+
+    cache = ParseCache("")
+    cache.store("gis_sheet", "key", pd.DataFrame({"Name": ["ASK_400_ERS"]}))
+
+    assert not cache.enabled
+    assert cache.load("gis_sheet", "key") is None
+
+
+def test_file_digest_and_source_file(tmp_path):
+
+    (tmp_path / "empty").write_bytes(b"")
+    with open(GIS_FILEPATH, "rb") as file:
+        expected = hashlib.sha256(file.read()).hexdigest()
+    source_file = pickle.loads(pickle.dumps(SourceFile(GIS_FILEPATH, "digest")))
+
+    assert file_digest(GIS_FILEPATH) == expected
+    assert file_digest(str(tmp_path / "empty")) == hashlib.sha256().hexdigest()
+    assert source_file == GIS_FILEPATH
+    assert source_digest(source_file) == "digest"
+    assert source_digest(GIS_FILEPATH) == expected
@@ -0,0 +1,49 @@
+import pandas as pd
+from app.persist import SnapshotArchive
+from app.snapshot import SnapshotStore
+
+
+def test_archive_restores_snapshot(tmp_path):
+
+    table = pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": pd.Categorical(["m1", "m1", "m2"]),
+            "LINE_EMSNAME": ["E_AAA-BBB", "E_AAA-BBB", "C_ÆØÅ-CCC"],
+            "Lat_DD": [55.1, 55.2, 56.0],
+        }
+    )
+    state = pd.DataFrame(
+        {"GEOMETRY_HASH": pd.Series([1, 2], dtype="uint64")},
+        index=pd.Index(["m1", "m2"], name="ACLINESEGMENT_MRID"),
+    )
+    store = SnapshotStore()
+    archive = SnapshotArchive(str(tmp_path), ["line_state", "non_translatable"])
+    store.subscribe(archive.save)
+    store.publish({"GIS_DATA": table.iloc[:1]}, {})
+    store.publish(
+        {"GIS_DATA": table},
+        {"line_state": state, "non_translatable": ["X"], "lookup": object()},
+    )
+
+    new_store = SnapshotStore()
+    snapshot = new_store.publish(*SnapshotArchive(str(tmp_path)).load())
+
+    assert snapshot.version == 2
+    assert snapshot.built_at == store.current.built_at
+    pd.testing.assert_frame_equal(snapshot.tables["GIS_DATA"], table)
+    pd.testing.assert_frame_equal(snapshot.artifacts["line_state"], state)
+    assert snapshot.artifacts["non_translatable"] == ["X"]
+    assert "lookup" not in snapshot.artifacts
+    # Only the files of the stored version are kept
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "2-artifact-line_state.feather",
+        "2-table-GIS_DATA.feather",
+        "snapshot.json",
+    ]
+    assert new_store.publish({}, {}).version == 3
+
+
+def test_archive_without_stored_snapshot(tmp_path):
+
+    assert SnapshotArchive(str(tmp_path)).load() is None
+    assert SnapshotArchive("").load() is None
@@ -0,0 +1,146 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.pipeline import Pipeline
+
+
+def build_pipeline(tmp_path, calls):
+    # Two sources, where only "combined" depends on both
+    for name in ["a", "b"]:
+        (tmp_path / name).write_text(name)
+
+    def stage(name, function):
+        def wrapper(*args):
+            calls.append(name)
+            return function(*args)
+
+        return wrapper
+
+    pipeline = Pipeline()
+    pipeline.add_source("a_file", str(tmp_path / "a"))
+    pipeline.add_source("b_file", str(tmp_path / "b"))
+    pipeline.add_stage("a", stage("a", lambda p: open(p).read()), ["a_file"])
+    pipeline.add_stage(
+        "b", stage("b", lambda p: open(p).read().strip()), ["b_file"], compare=True
+    )
+    pipeline.add_stage("combined", stage("combined", lambda a, b: a + b), ["a", "b"])
+    return pipeline
+
+
+def touch(file_path, content):
+    # Changing content and moving the modification time, to be independent of the file system resolution
+    file_path.write_text(content)
+    mtime = os.stat(file_path).st_mtime_ns + 10**9
+    os.utime(file_path, ns=(mtime, mtime))
+
+
+def test_pipeline_only_recomputes_downstream_stages(tmp_path):
+
+    calls = []
+    pipeline = build_pipeline(tmp_path, calls)
+
+    assert pipeline.run() == ["a_file", "b_file", "a", "b", "combined"]
+    assert pipeline["combined"] == "ab"
+    assert pipeline.run() == []
+
+    calls.clear()
+    touch(tmp_path / "a", "A")
+
+    assert pipeline.run() == ["a_file", "a", "combined"]
+    assert calls == ["a", "combined"]
+    assert pipeline["combined"] == "Ab"
+    assert pipeline.downstream("a_file") == ["a", "combined"]
+
+
+def test_pipeline_stops_when_compared_output_is_unchanged(tmp_path):
+
+    calls = []
+    pipeline = build_pipeline(tmp_path, calls)
+    pipeline.run()
+
+    calls.clear()
+    touch(tmp_path / "b", "b\n")
+
+    assert pipeline.run() == ["b_file", "b"]
+    assert calls == ["b"]
+
+
+def test_pipeline_retries_failed_stage(tmp_path):
+
+    pipeline = build_pipeline(tmp_path, [])
+    os.remove(tmp_path / "a")
+
+    with pytest.raises(FileNotFoundError):
+        pipeline.run()
+
+    touch(tmp_path / "a", "a")
+
+    assert pipeline.run() == ["a_file", "a", "b", "combined"]
+    assert pipeline["combined"] == "ab"
+
+
+def test_pipeline_marks_versions_of_used_outputs(tmp_path):
+
+    pipeline = build_pipeline(tmp_path, [])
+    pipeline.run()
+
+    assert pipeline.changed_since_mark("used", ["a", "combined"]) == ["a", "combined"]
+    pipeline.set_mark("used", ["a", "combined"])
+    assert pipeline.changed_since_mark("used", ["a", "combined"]) == []
+
+    # Changes recomputed by runs after the mark are found, even if a later run did not recompute them
+    touch(tmp_path / "a", "A")
+    pipeline.run()
+    pipeline.run()
+
+    assert pipeline.changed_since_mark("used", ["a", "combined"]) == ["a", "combined"]
+
+
+def test_pipeline_runs_parallel_stages_concurrently(tmp_path):
+
+    for name in ["a", "b"]:
+        (tmp_path / name).write_text(name)
+    # Both stages must be waiting at the same time for the barrier to be passed
+    barrier = threading.Barrier(2, timeout=5)
+
+    def read(file_path):
+        barrier.wait()
+        return open(file_path).read()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pipeline = Pipeline(executor)
+        pipeline.add_source("a_file", str(tmp_path / "a"))
+        pipeline.add_source("b_file", str(tmp_path / "b"))
+        pipeline.add_stage("a", read, ["a_file"], parallel=True)
+        pipeline.add_stage("b", read, ["b_file"], parallel=True)
+        pipeline.add_stage("combined", lambda a, b: a + b, ["a", "b"])
+
+        assert pipeline.run() == ["a_file", "b_file", "a", "b", "combined"]
+        assert pipeline["combined"] == "ab"
+
+        # With only one changed source, the other parallel stage is not run again
+        barrier = threading.Barrier(1)
+        touch(tmp_path / "a", "A")
+        assert pipeline.run() == ["a_file", "a", "combined"]
+        assert pipeline["combined"] == "Ab"
+
+
+def test_pipeline_detects_changes_by_content(tmp_path):
+
+    pipeline = build_pipeline(tmp_path, [])
+    pipeline.run()
+    digest = pipeline["a_file"].digest
+
+    # Touching the file without changing the content
+    touch(tmp_path / "a", "a")
+    assert pipeline.run() == []
+
+    # Changing the content and moving the modification time backwards
+    mtime = os.stat(tmp_path / "a").st_mtime_ns
+    (tmp_path / "a").write_text("A")
+    os.utime(tmp_path / "a", ns=(mtime - 10**9, mtime - 10**9))
+
+    assert pipeline.run() == ["a_file", "a", "combined"]
+    assert pipeline["combined"] == "Ab"
+    assert pipeline["a_file"].digest != digest
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from app.compact import compact_dataframe
+from app.projection import UTM32N, project_coordinates
+
+# Longitude, latitude and UTM 32N easting and northing (EPSG:25832) of reference points, from PROJ
+REFERENCE_POINTS = np.array(
+    [
+        [9.0, 0.0, 500000.0, 0.0],
+        [9.0, 56.0, 500000.0, 6206079.5871],
+        [12.568, 55.676, 724333.6481, 6175791.9299],
+        [8.1, 54.6, 441857.7895, 6050653.5349],
+        [15.19, 55.1, 894713.7053, 6123434.6506],
+        [10.2, 57.7, 571521.0552, 6395944.1333],
+        [3.0, 60.0, 165640.3321, 6666593.572],
+        [9.5, 80.0, 509692.7485, 8881627.4662],
+    ]
+)
+
+
+def test_projection_matches_reference_points():
+
+    easting, northing = UTM32N.project(REFERENCE_POINTS[:, 0], REFERENCE_POINTS[:, 1])
+
+    # Within a millimetre (the reference values are rounded to 0.1 mm)
+    assert np.abs(easting - REFERENCE_POINTS[:, 2]).max() < 1e-3
+    assert np.abs(northing - REFERENCE_POINTS[:, 3]).max() < 1e-3
+
+
+def test_project_coordinates_of_compact_dataframe():
+
+    dataframe = pd.DataFrame(
+        {
+            "Name": ["A", "A", "B"],
+            "Long_DD": REFERENCE_POINTS[1:4, 0],
+            "Lat_DD": REFERENCE_POINTS[1:4, 1],
+        },
+        index=[5, 6, 7],
+    )
+    compact = compact_dataframe(dataframe, ["Long_DD", "Lat_DD"])
+
+    projected = project_coordinates(compact, ["Long_DD", "Lat_DD"], UTM32N, ["X", "Y"])
+
+    assert list(projected.index) == [5, 6, 7]
+    # Compact coordinates are rounded to 1e-7 degrees (about a centimetre)
+    assert np.allclose(projected["X"], REFERENCE_POINTS[1:4, 2], atol=0.02)
+    assert np.allclose(projected["Y"], REFERENCE_POINTS[1:4, 3], atol=0.02)
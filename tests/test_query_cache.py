@@ -0,0 +1,197 @@
+import gzip
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from app.query_cache import (
+    QueryCache,
+    QueryResult,
+    accepts_gzip,
+    add_query_endpoint,
+    forward_sql_query,
+    normalize_query,
+)
+from app.rest import RestServer, json_response
+from app.snapshot import SnapshotStore
+
+
+class FakeSqlApi:
+    # Answers queries with the query and the version of the tables, counting the queries run
+    def __init__(self, store: SnapshotStore, size: int = 10):
+        self.store = store
+        self.size = size
+        self.queries = []
+
+    def __call__(self, query: str) -> QueryResult:
+        self.queries.append(query)
+        if "UNKNOWN" in query:
+            return QueryResult(400, "application/json", b'{"error": "unknown"}')
+        body = {"query": query, "version": self.store.current.version}
+        body["padding"] = "x" * self.size
+        return QueryResult(200, "application/json", json.dumps(body).encode())
+
+
+def test_normalize_query():
+
+    assert (
+        normalize_query("  SELECT *\n\tFROM  GIS_DATA ; ") == "SELECT * FROM GIS_DATA"
+    )
+    assert (
+        normalize_query("SELECT * FROM \"GIS  DATA\" WHERE Name = 'A  B';")
+        == "SELECT * FROM \"GIS  DATA\" WHERE Name = 'A  B'"
+    )
+    # Line comments end at the line break, so it is kept
+    assert (
+        normalize_query("SELECT *  FROM t -- note\nWHERE  id = 5 /* a  b */")
+        == "SELECT * FROM t -- note\nWHERE id = 5 /* a  b */"
+    )
+    assert normalize_query("SELECT 1 -- note") == "SELECT 1 -- note"
+    assert accepts_gzip("deflate, gzip;q=0.5")
+    assert not accepts_gzip("gzip;q=0, deflate")
+    assert not accepts_gzip("")
+
+
+def test_query_cache_invalidated_by_new_snapshot():
+
+    store = SnapshotStore()
+    api = FakeSqlApi(store)
+    cache = QueryCache(api, max_entries=2)
+    store.subscribe(cache.invalidate)
+
+    store.publish({}, {})
+    first = cache.get("SELECT * FROM GIS_DATA;")
+    assert cache.get("SELECT *  FROM GIS_DATA") is first
+    # The query is run as given, only the cache key is normalized
+    assert api.queries == ["SELECT * FROM GIS_DATA;"]
+    cache.get("SELECT 1")
+    cache.get("SELECT 2")
+    # The least recently used query is dropped
+    cache.get("SELECT * FROM GIS_DATA")
+    assert len(api.queries) == 4
+    # Failed queries are not cached
+    cache.get("SELECT * FROM UNKNOWN")
+    cache.get("SELECT * FROM UNKNOWN")
+    assert len(api.queries) == 6
+
+    store.publish({}, {})
+    second = cache.get("SELECT * FROM GIS_DATA")
+    assert (first.version, second.version) == (1, 2)
+    assert first.etag != second.etag
+    assert len(api.queries) == 7
+    assert (cache.hits, cache.misses) == (1, 7)
+
+
+def test_query_cache_runs_concurrent_queries_once():
+
+    store = SnapshotStore()
+    queries = []
+
+    def slow_api(query: str) -> QueryResult:
+        queries.append(query)
+        time.sleep(0.2)
+        return QueryResult(200, "application/json", b"[]")
+
+    cache = QueryCache(slow_api)
+    store.subscribe(cache.invalidate)
+    store.publish({}, {})
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("SELECT 1")))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert queries == ["SELECT 1"]
+    assert len(results) == 5 and all(result is results[0] for result in results)
+
+
+def test_query_endpoint_conditional_get_and_gzip():
+
+    store = SnapshotStore()
+    api = FakeSqlApi(store, size=5000)
+    cache = QueryCache(api)
+    store.subscribe(cache.invalidate)
+    server = RestServer(0)
+    add_query_endpoint(server, cache)
+    server.start()
+
+    url = f"http://localhost:{server.port}/query"
+    get_url = f"{url}?sql={urllib.parse.quote('SELECT * FROM GIS_DATA')}"
+
+    def request(url, headers={}, data=None):
+        request = urllib.request.Request(url, data=data, headers=headers)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    statuses = [request(get_url)[0]]
+    store.publish({}, {})
+    statuses.append(request(url, data=b"{}")[0])
+    statuses.append(request(f"{url}?sql=SELECT%20*%20FROM%20UNKNOWN")[0])
+
+    status, headers, body = request(get_url)
+    etag = headers["ETag"]
+    not_modified = request(get_url, {"If-None-Match": etag})
+    posted = request(
+        url,
+        {"If-None-Match": f'W/"other", {etag}'},
+        json.dumps({"sql-query": "SELECT * FROM GIS_DATA;"}).encode(),
+    )
+    compressed = request(get_url, {"Accept-Encoding": "gzip"})
+    compressed_not_modified = request(
+        get_url, {"Accept-Encoding": "gzip", "If-None-Match": compressed[1]["ETag"]}
+    )
+    store.publish({}, {})
+    modified = request(get_url, {"If-None-Match": etag})
+    server.stop()
+
+    assert statuses == [503, 400, 400]
+    assert status == 200
+    assert headers["X-Snapshot-Version"] == "1"
+    assert json.loads(body)["version"] == 1
+    assert not_modified[0] == 304 and not_modified[2] == b""
+    assert not_modified[1]["ETag"] == etag
+    assert posted[0] == 304
+    assert compressed[1]["Content-Encoding"] == "gzip"
+    assert compressed[1]["ETag"] != etag
+    assert gzip.decompress(compressed[2]) == body
+    assert len(compressed[2]) < len(body)
+    assert compressed_not_modified[0] == 304
+    assert modified[0] == 200
+    assert modified[1]["X-Snapshot-Version"] == "2"
+    assert json.loads(modified[2])["version"] == 2
+    # Queried once per snapshot version (and for the unknown table)
+    assert len(api.queries) == 3
+
+
+def test_forward_sql_query():
+
+    sql_api = RestServer(0)
+    sql_api.route(
+        "/",
+        lambda request: json_response(json.loads(request.body)),
+        method="POST",
+    )
+    sql_api.route(
+        "/missing",
+        lambda request: json_response({"error": "missing"}, 404),
+        method="POST",
+    )
+    sql_api.start()
+
+    result = forward_sql_query(f"http://localhost:{sql_api.port}/")("SELECT 1")
+    missing = forward_sql_query(f"http://localhost:{sql_api.port}/missing")("SELECT 1")
+    sql_api.stop()
+
+    assert result.status == 200
+    assert result.content_type == "application/json"
+    assert json.loads(result.body) == {"sql-query": "SELECT 1"}
+    assert missing.status == 404
@@ -1,5 +1,8 @@
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import pytest
 import app.main as main
 
 # Location of test files used in the different test
@@ -106,3 +109,245 @@ def test_creating_dataframe_with_gis_coordinates_and_ets_mrid():
         pd.testing.assert_frame_equal(TEST_DATAFRAME, dataframe, check_dtype=True)
         is None
     )
+
+
+def test_enriching_keeps_inputs_and_matches_pandas_join():
+
+    # Line names with duplicates in ETS, missing names, names not translated and names dropped as bad
+    aclinesegment = pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": ["m1", "m2", "m3", "m4", "m5"],
+            "LINE_EMSNAME": ["E_A", "E_B", None, "E_A", "E_C"],
+            "DLR_ENABLED": ["YES", "NO", "YES", "YES", "NO"],
+        }
+    )
+    gis = pd.DataFrame(
+        {
+            "Name": ["A1", "B1", "X1", "A2", None, "B1", "A1", "Y1"],
+            "OBJECTID": pd.array(range(8), dtype="int32"),
+            "Lat_DD": [55.0, 55.1, 55.2, 55.3, 55.4, 55.5, 55.6, 55.7],
+        }
+    )
+    mapping = {"A1": "E_A", "A2": "E_A", "B1": "E_B", "Y1": "E_C"}
+    bad_line_names = ["X1", "Y1"]
+    inputs = (aclinesegment.copy(), gis.copy())
+
+    dataframe = main.enrich_dlr_dataframe(
+        gis, aclinesegment, mapping, bad_line_names, "Name", "LINE_EMSNAME"
+    )
+
+    # The join as done before the join by codes
+    expected = gis.copy()
+    expected["ETS_NAME"] = expected["Name"].map(mapping)
+    expected = expected[~expected["Name"].isin(bad_line_names)]
+    expected = aclinesegment.join(
+        expected.set_index("ETS_NAME"), on="LINE_EMSNAME", how="inner"
+    ).reset_index(drop=True)
+    pd.testing.assert_frame_equal(dataframe, expected)
+    pd.testing.assert_frame_equal(aclinesegment, inputs[0])
+    pd.testing.assert_frame_equal(gis, inputs[1])
+
+
+def test_loading_gis_sheet_from_cache(tmp_path):
+
+    cache = main.ParseCache(str(tmp_path))
+
+    # First call parses the excel file and fills the cache, second call loads from the cache
+    parsed = main.load_gis_sheet(GIS_FILEPATH, GIS_SHEET_NAME, cache)
+    cached = main.load_gis_sheet(GIS_FILEPATH, GIS_SHEET_NAME, cache)
+
+    assert pd.testing.assert_frame_equal(parsed, cached) is None
+
+
+def test_reload_pipeline(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main, "GIS_FILEPATH", GIS_FILEPATH)
+    monkeypatch.setattr(main, "ACLINESEGMENT_FILEPATH", ACLINESEGMENT_FILEPATH)
+    monkeypatch.setattr(main, "GIS_TO_ETS_MAP_FILEPATH", GIS_TO_ETS_MAP_FILEPATH)
+    pipeline = main.build_reload_pipeline(main.ParseCache(str(tmp_path)))
+
+    TEST_DATAFRAME = pd.read_csv(TEST_DATA_FILEPATH, delimiter=";")
+
+    assert "enriched" in pipeline.run()
+    assert (
+        pd.testing.assert_frame_equal(
+            TEST_DATAFRAME, pipeline["enriched"], check_dtype=True
+        )
+        is None
+    )
+    assert pipeline.run() == []
+    # The outputs of the run have not been in a snapshot yet
+    assert main.build_snapshot_content(pipeline) is not None
+    assert main.build_snapshot_content(pipeline) is None
+
+
+def test_building_snapshot_content_after_failed_stage(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main, "GIS_FILEPATH", GIS_FILEPATH)
+    monkeypatch.setattr(main, "ACLINESEGMENT_FILEPATH", ACLINESEGMENT_FILEPATH)
+    monkeypatch.setattr(main, "GIS_TO_ETS_MAP_FILEPATH", GIS_TO_ETS_MAP_FILEPATH)
+    pipeline = main.build_reload_pipeline(main.ParseCache(str(tmp_path)))
+    build_line_geometry = main.build_line_geometry
+
+    def fail_once(*args, **kwargs):
+        monkeypatch.setattr(main, "build_line_geometry", build_line_geometry)
+        raise MemoryError()
+
+    # The geometry fails after the enriched data has been computed, so the retry only recomputes the
+    # geometry and the stages after it, but still builds a snapshot
+    monkeypatch.setattr(main, "build_line_geometry", fail_once)
+    with pytest.raises(MemoryError):
+        main.build_snapshot_content(pipeline)
+    content = main.build_snapshot_content(pipeline)
+
+    assert content is not None
+    assert len(content[0][main.API_DB_NAME]) == len(pipeline["enriched"])
+    assert main.build_snapshot_content(pipeline) is None
+
+
+def test_reload_pipeline_with_projected_coordinates(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main, "GIS_FILEPATH", GIS_FILEPATH)
+    monkeypatch.setattr(main, "ACLINESEGMENT_FILEPATH", ACLINESEGMENT_FILEPATH)
+    monkeypatch.setattr(main, "GIS_TO_ETS_MAP_FILEPATH", GIS_TO_ETS_MAP_FILEPATH)
+    monkeypatch.setattr(main, "PROJECT_COORDINATES", "TRUE")
+    pipeline = main.build_reload_pipeline(main.ParseCache(str(tmp_path)))
+
+    pipeline.run()
+    table = pipeline["table"]
+
+    assert list(table.columns[-2:]) == main.PROJECTED_COORDINATE_COLUMNS
+    assert (
+        table["UTM32N_X"].to_numpy()
+        == main.UTM32N.project(table["Long_DD"], table["Lat_DD"])[0]
+    ).all()
+    # The enriched dataframe is not changed
+    assert "UTM32N_X" not in pipeline["enriched"]
+
+
+def test_reload_pipeline_parsing_in_processes(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main, "GIS_FILEPATH", GIS_FILEPATH)
+    monkeypatch.setattr(main, "ACLINESEGMENT_FILEPATH", ACLINESEGMENT_FILEPATH)
+    monkeypatch.setattr(main, "GIS_TO_ETS_MAP_FILEPATH", GIS_TO_ETS_MAP_FILEPATH)
+
+    TEST_DATAFRAME = pd.read_csv(TEST_DATA_FILEPATH, delimiter=";")
+
+    with ProcessPoolExecutor(
+        max_workers=3, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        pipeline = main.build_reload_pipeline(main.ParseCache(str(tmp_path)), executor)
+        pipeline.run()
+
+    assert (
+        pd.testing.assert_frame_equal(
+            TEST_DATAFRAME, pipeline["enriched"], check_dtype=True
+        )
+        is None
+    )
+
+
+def test_building_snapshot_content(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main, "GIS_FILEPATH", GIS_FILEPATH)
+    monkeypatch.setattr(main, "ACLINESEGMENT_FILEPATH", ACLINESEGMENT_FILEPATH)
+    monkeypatch.setattr(main, "GIS_TO_ETS_MAP_FILEPATH", GIS_TO_ETS_MAP_FILEPATH)
+    pipeline = main.build_reload_pipeline(main.ParseCache(str(tmp_path)))
+
+    tables, artifacts = main.build_snapshot_content(pipeline)
+
+    assert set(tables) == {
+        main.API_DB_NAME,
+        main.API_LINE_DB_NAME,
+        main.API_SPAN_DB_NAME,
+        main.API_VALIDATION_DB_NAME,
+    }
+    assert len(tables[main.API_LINE_DB_NAME]) == 6
+    assert artifacts["spatial_index"] is pipeline["spatial_index"]
+
+
+def test_reload_pipeline_with_several_gis_sources(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main, "ACLINESEGMENT_FILEPATH", ACLINESEGMENT_FILEPATH)
+    monkeypatch.setattr(main, "GIS_TO_ETS_MAP_FILEPATH", GIS_TO_ETS_MAP_FILEPATH)
+    sources = main.parse_gis_sources(
+        '[{"name": "overhead", "file": "GIS_Driftstr_luftledning_koordinater.xls", "table": "OVERHEAD"},'
+        ' {"name": "regional", "file": "GIS_Driftstr_luftledning_koordinater.xls", "table": "REGIONAL",'
+        ' "regex": "^(?P<STN1>\\\\w{3})_(?P<volt>\\\\d{3})_(?P<STN2>\\\\w{3})(?P<id>)$"}]',
+        TESTDATA_PATH,
+        sheet=GIS_SHEET_NAME,
+        column=GIS_LINE_NAME_COLUMN,
+        regex=LINE_NAME_REGEX,
+    )
+    pipeline = main.build_reload_pipeline(
+        main.ParseCache(str(tmp_path)), sources=sources
+    )
+
+    tables, artifacts = main.build_snapshot_content(pipeline, sources)
+
+    assert set(tables) == {
+        "OVERHEAD",
+        "OVERHEAD_LINES",
+        "OVERHEAD_SPANS",
+        "OVERHEAD_VALIDATION",
+        "REGIONAL",
+        "REGIONAL_LINES",
+        "REGIONAL_SPANS",
+        "REGIONAL_VALIDATION",
+    }
+    # Both sources are enriched with the same parsed ACLinesegment data
+    assert "aclinesegment:regional" not in pipeline.nodes
+    assert "enriched:regional" in pipeline.downstream("gis_file")
+    assert "aclinesegment" not in pipeline.downstream("gis_file")
+    assert len(tables["REGIONAL"]) < len(tables["OVERHEAD"])
+    assert len(artifacts["non_translatable:regional"]) > len(
+        artifacts["non_translatable"]
+    )
+
+
+def test_reload_pipeline_with_weather_grid(tmp_path, monkeypatch):
+
+    grid_path = tmp_path / "weather_grid.json"
+    grid_path.write_text(
+        '{"origin": [400000, 6100000], "resolution": 2500, "extent": [1000000, 6800000], "crs": "EPSG:25832"}'
+    )
+    monkeypatch.setattr(main, "GIS_FILEPATH", GIS_FILEPATH)
+    monkeypatch.setattr(main, "ACLINESEGMENT_FILEPATH", ACLINESEGMENT_FILEPATH)
+    monkeypatch.setattr(main, "GIS_TO_ETS_MAP_FILEPATH", GIS_TO_ETS_MAP_FILEPATH)
+    monkeypatch.setattr(main, "WEATHER_GRID_FILEPATH", str(grid_path))
+    pipeline = main.build_reload_pipeline(main.ParseCache(str(tmp_path)))
+
+    tables, _ = main.build_snapshot_content(pipeline)
+    span_cells = tables[main.API_SPAN_CELL_DB_NAME]
+
+    assert span_cells["LENGTH_M"].sum() == pytest.approx(
+        tables[main.API_SPAN_DB_NAME]["LENGTH_M"].sum()
+    )
+    # A changed grid is reassigned without parsing the input files again
+    grid_path.write_text(
+        '{"origin": [400000, 6100000], "resolution": 10000, "extent": [1000000, 6800000], "crs": "EPSG:25832"}'
+    )
+    tables, _ = main.build_snapshot_content(pipeline)
+    assert "enriched" not in pipeline.downstream("weather_grid_file")
+    assert (
+        tables[main.API_SPAN_CELL_DB_NAME]["CELL_COLUMN"]
+        == span_cells["CELL_COLUMN"] // 4
+    ).all()
+
+
+def test_reload_pipeline_with_simplified_lines(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main, "GIS_FILEPATH", GIS_FILEPATH)
+    monkeypatch.setattr(main, "ACLINESEGMENT_FILEPATH", ACLINESEGMENT_FILEPATH)
+    monkeypatch.setattr(main, "GIS_TO_ETS_MAP_FILEPATH", GIS_TO_ETS_MAP_FILEPATH)
+    monkeypatch.setattr(main, "SIMPLIFY_TOLERANCE_LIST", [10, 100000])
+    pipeline = main.build_reload_pipeline(main.ParseCache(str(tmp_path)))
+
+    tables, _ = main.build_snapshot_content(pipeline)
+    lines = tables[main.API_LINE_DB_NAME]
+
+    assert len(tables["GIS_SIMPLIFIED_10M"]) <= len(tables[main.API_DB_NAME])
+    # At a tolerance larger than the lines only the end points are kept
+    assert (
+        len(tables["GIS_SIMPLIFIED_100000M"]) == (lines["POINTS"].clip(upper=2)).sum()
+    )
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from app.geometry import build_line_geometry
+from app.simplify import point_significance, simplify_lines
+
+
+def douglas_peucker(x, y, tolerance) -> list[int]:
+    # Recursive Douglas-Peucker of a single line, as reference (indexes of the kept points)
+    if len(x) < 3:
+        return list(range(len(x)))
+    dx, dy = x[-1] - x[0], y[-1] - y[0]
+    t = np.clip(((x - x[0]) * dx + (y - y[0]) * dy) / (dx**2 + dy**2), 0, 1)
+    distance = np.hypot(x - x[0] - t * dx, y - y[0] - t * dy)
+    farthest = 1 + int(np.argmax(distance[1:-1]))
+    if distance[farthest] <= tolerance:
+        return [0, len(x) - 1]
+    left = douglas_peucker(x[: farthest + 1], y[: farthest + 1], tolerance)
+    right = douglas_peucker(x[farthest:], y[farthest:], tolerance)
+    return left + [farthest + i for i in right[1:]]
+
+
+def test_point_significance_matches_douglas_peucker():
+
+    rng = np.random.default_rng(1)
+    lengths = [1, 2, 3, 50, 500, 1000]
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    # Random walks, so the lines have detail at all scales
+    x = np.cumsum(rng.normal(0, 100, offsets[-1]))
+    y = np.cumsum(rng.normal(0, 100, offsets[-1]))
+
+    significance = point_significance(x, y, offsets, 10)
+
+    for tolerance in [10, 50, 200, 1000]:
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            expected = douglas_peucker(x[start:end], y[start:end], tolerance)
+            kept = np.flatnonzero(significance[start:end] > tolerance)
+            assert list(kept) == expected
+
+
+def test_simplify_lines():
+
+    # Line "A" is straight with a detour of about 111 metres, line "B" is a single point
+    dataframe = pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": ["A"] * 5 + ["B"],
+            "OBJECTID": [5, 4, 3, 2, 1, 9],
+            "Long_DD": [10.0, 10.001, 10.002, 10.003, 10.004, 11.0],
+            "Lat_DD": [56.0, 56.0, 56.001, 56.0, 56.0, 56.0],
+        }
+    )
+    geometry = build_line_geometry(
+        dataframe, "ACLINESEGMENT_MRID", "OBJECTID", ["Long_DD", "Lat_DD"]
+    )
+
+    tables = simplify_lines(
+        geometry,
+        [100, 1000],
+        "ACLINESEGMENT_MRID",
+        "OBJECTID",
+        ["Long_DD", "Lat_DD"],
+    )
+
+    assert list(tables[100]["OBJECTID"]) == [1, 3, 5, 9]
+    assert list(tables[1000]["OBJECTID"]) == [1, 5, 9]
+    assert list(tables[1000]["ACLINESEGMENT_MRID"]) == ["A", "A", "B"]
+    assert list(tables[1000]["Long_DD"]) == [10.004, 10.0, 11.0]
@@ -0,0 +1,73 @@
+import threading
+import pandas as pd
+from app.snapshot import SnapshotStore, SnapshotBuilder
+
+
+def test_store_publishes_versioned_snapshots():
+
+    store = SnapshotStore()
+    published = []
+    store.subscribe(published.append)
+
+    assert store.current is None
+    assert store.artifact("index") is None
+
+    first = store.publish({"GIS_DATA": pd.DataFrame({"a": [1]})}, {"index": 1})
+    second = store.publish({"GIS_DATA": pd.DataFrame({"a": [2]})}, {"index": 2})
+
+    assert (first.version, second.version) == (1, 2)
+    assert second.built_at >= first.built_at
+    assert store.current is second
+    assert store.artifact("index") == 2
+    assert published == [first, second]
+
+
+def test_failed_build_keeps_current_snapshot():
+
+    store = SnapshotStore()
+    results = iter([({}, {"index": 1}), None, RuntimeError("Broken file")])
+
+    def build():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    builder = SnapshotBuilder(build, store)
+
+    assert builder.build_once().version == 1
+    # Nothing changed
+    assert builder.build_once() is None
+    # Failing build
+    assert builder.build_once() is None
+    assert isinstance(builder.last_error, RuntimeError)
+    assert store.current.version == 1
+    assert store.artifact("index") == 1
+
+
+def test_snapshot_is_built_in_background():
+
+    store = SnapshotStore()
+    store.publish({}, {"index": "old"})
+    build_started = threading.Event()
+    release_build = threading.Event()
+    published = threading.Event()
+
+    def build():
+        build_started.set()
+        release_build.wait(5)
+        return {}, {"index": "new"}
+
+    store.subscribe(lambda snapshot: published.set())
+    builder = SnapshotBuilder(build, store)
+    builder.start()
+    builder.trigger()
+
+    # While the build runs the old snapshot is served
+    assert build_started.wait(5)
+    assert store.artifact("index") == "old"
+
+    release_build.set()
+    assert published.wait(5)
+    assert store.artifact("index") == "new"
+    assert store.current.version == 2
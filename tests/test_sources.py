@@ -0,0 +1,46 @@
+import json
+import pytest
+from app.sources import parse_gis_sources
+
+DEFAULTS = {"sheet": "Sheet", "column": "Name", "regex": "^(?P<STN1>\\w+)$"}
+
+
+def test_parse_gis_sources_from_file(tmp_path):
+
+    config = [
+        {"name": "overhead", "file": "overhead.xls", "table": "OVERHEAD"},
+        {
+            "name": "cables",
+            "file": "cables.xlsx",
+            "sheet": "Cables",
+            "table": "CABLES",
+            "span_table": "CABLE_SECTIONS",
+        },
+    ]
+    (tmp_path / "sources.json").write_text(json.dumps(config))
+
+    overhead, cables = parse_gis_sources("sources.json", str(tmp_path), **DEFAULTS)
+
+    assert overhead.file_path == str(tmp_path / "overhead.xls")
+    assert (overhead.sheet, overhead.line_name_column) == ("Sheet", "Name")
+    assert overhead.line_table == "OVERHEAD_LINES"
+    assert overhead.span_cell_table == "OVERHEAD_SPAN_CELLS"
+    assert cables.sheet == "Cables"
+    assert (cables.line_table, cables.span_table) == ("CABLES_LINES", "CABLE_SECTIONS")
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        "[]",
+        '[{"name": "a", "file": "a.xls"}]',
+        '[{"name": "a-b", "file": "a.xls", "table": "A"}]',
+        '[{"name": "a", "file": "a.xls", "table": "A"}, {"name": "a", "file": "b.xls", "table": "B"}]',
+        '[{"name": "a", "file": "a.xls", "table": "A"}, {"name": "b", "file": "b.xls", "table": "A_LINES"}]',
+        "[{",
+    ],
+)
+def test_invalid_gis_sources(config):
+
+    with pytest.raises(ValueError):
+        parse_gis_sources(config, "/data", **DEFAULTS)
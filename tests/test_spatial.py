@@ -0,0 +1,157 @@
+import json
+import urllib.error
+import urllib.request
+import numpy as np
+import pandas as pd
+from app.geometry import build_line_geometry
+from app.rest import RestServer
+from app.spatial import SpatialIndex, add_spatial_endpoints
+
+COORDINATE_COLUMNS = ["Long_DD", "Lat_DD"]
+
+
+def random_lines(lines: int = 50, points: int = 20, seed: int = 1) -> pd.DataFrame:
+    # Random walks starting within a 2 x 2 degree box
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(10, 12, size=(lines, 1, 2))
+    steps = rng.normal(0, 0.01, size=(lines, points, 2))
+    coordinates = (start + np.cumsum(steps, axis=1)).reshape(-1, 2)
+    return pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": np.repeat(
+                [f"mrid-{i}" for i in range(lines)], points
+            ),
+            "OBJECTID": np.arange(lines * points),
+            "Long_DD": coordinates[:, 0],
+            "Lat_DD": coordinates[:, 1],
+        }
+    )
+
+
+def build_index(dataframe: pd.DataFrame, cell_size: float) -> SpatialIndex:
+    geometry = build_line_geometry(
+        dataframe, "ACLINESEGMENT_MRID", "OBJECTID", COORDINATE_COLUMNS
+    )
+    return SpatialIndex(geometry, cell_size=cell_size)
+
+
+def test_bbox_query_matches_full_scan():
+
+    dataframe = random_lines()
+    index = build_index(dataframe, cell_size=0.02)
+    # A single cell covering everything, so all spans are checked
+    full_scan = build_index(dataframe, cell_size=100)
+
+    for bbox in [(10.5, 10.5, 10.7, 10.6), (9, 9, 13, 13), (11.9, 11.0, 12.3, 11.01)]:
+        assert list(index.bbox(*bbox)) == list(full_scan.bbox(*bbox))
+
+    assert len(index.bbox(20, 20, 21, 21)) == 0
+    # Boxes far beyond the extent are clipped to the cells of the index
+    assert list(index.bbox(9, 9, 13, 1e9)) == list(full_scan.bbox(9, 9, 13, 13))
+    assert list(index._candidates(-1e9, -1e9, 1e9, 1e9)) == list(
+        np.arange(len(index.span_line))
+    )
+
+
+def test_bbox_query_finds_span_crossing_the_box():
+
+    dataframe = pd.DataFrame(
+        {
+            "ACLINESEGMENT_MRID": ["A", "A"],
+            "OBJECTID": [1, 2],
+            "Long_DD": [10.0, 11.0],
+            "Lat_DD": [10.0, 11.0],
+        }
+    )
+    index = build_index(dataframe, cell_size=0.1)
+
+    # Neither end point is in the box, but the span crosses it
+    assert list(index.bbox(10.4, 10.4, 10.6, 10.6)) == [0]
+    assert list(index.bbox(10.6, 10.0, 11.0, 10.4)) == []
+
+
+def test_radius_and_nearest_queries_match_full_scan():
+
+    index = build_index(random_lines(), cell_size=0.02)
+    all_spans = np.arange(len(index.span_line))
+    distances = index._distances(all_spans, 11.0, 11.0)
+
+    spans, span_distances = index.radius(11.0, 11.0, 5000)
+    assert set(spans) == set(all_spans[distances <= 5000])
+    assert list(span_distances) == sorted(span_distances)
+
+    line_distances = pd.Series(distances).groupby(index.span_line).min()
+    lines, nearest_distances, _ = index.nearest_lines(11.0, 11.0, 3)
+    assert list(lines) == list(line_distances.sort_values().index[:3])
+    np.testing.assert_allclose(nearest_distances, line_distances.sort_values()[:3])
+
+
+def test_spatial_endpoints():
+
+    index = build_index(random_lines(), cell_size=0.02)
+    server = RestServer(0)
+    add_spatial_endpoints(server, lambda: index, "ACLINESEGMENT_MRID")
+    server.start()
+
+    url = f"http://localhost:{server.port}"
+    with urllib.request.urlopen(f"{url}/lines/nearest?lat=11&lon=11&k=2") as response:
+        nearest = json.loads(response.read())
+    with urllib.request.urlopen(
+        f"{url}/spans/bbox?min_lon=10.5&min_lat=10.5&max_lon=10.7&max_lat=10.6"
+    ) as response:
+        spans = json.loads(response.read())
+    statuses = []
+    for query in [
+        "/spans/radius?lat=11",
+        "/spans/bbox?min_lon=10&min_lat=10&max_lon=11&max_lat=nan",
+        "/spans/radius?lat=11&lon=inf&radius_km=1",
+        "/lines/nearest?lat=11&lon=11&k=0",
+    ]:
+        try:
+            urllib.request.urlopen(f"{url}{query}")
+        except urllib.error.HTTPError as e:
+            statuses.append(e.code)
+    server.stop()
+
+    assert len(nearest) == 2
+    assert set(nearest[0]) == {"ACLINESEGMENT_MRID", "SPAN", "DISTANCE_M"}
+    assert len(spans) == len(index.bbox(10.5, 10.5, 10.7, 10.6))
+    assert statuses == [400, 400, 400, 400]
+
+
+def span_keys(index: SpatialIndex, spans: np.ndarray) -> list[tuple]:
+    # Spans as (MRID, OBJECTID of the first point), to compare spans of different indexes
+    start = index.geometry.span_start_index()[spans]
+    return list(
+        zip(
+            index.geometry.mrids[index.span_line[spans]], index.geometry.objectid[start]
+        )
+    )
+
+
+def test_index_leaves_out_spans_without_coordinates():
+
+    dataframe = random_lines()
+    # The point is in the middle of a line, so the two spans around it have no valid coordinates
+    dataframe.loc[5, "Lat_DD"] = np.nan
+    index = build_index(dataframe, cell_size=0.02)
+    expected = build_index(dataframe.drop(index=5), cell_size=0.02)
+    left_out = [("mrid-0", 4), ("mrid-0", 5)]
+
+    assert np.isfinite(index.origin + index.extent).all()
+    assert span_keys(index, index.bbox(9, 9, 13, 13)) == [
+        key
+        for key in span_keys(expected, expected.bbox(9, 9, 13, 13))
+        if key != ("mrid-0", 4)
+    ]
+    spans, distances = index.radius(11.0, 11.0, 50000)
+    assert len(spans) > 0 and np.isfinite(distances).all()
+    assert not set(left_out).intersection(span_keys(index, spans))
+    lines, nearest_distances, _ = index.nearest_lines(11.0, 11.0, 3)
+    expected_lines, expected_distances, _ = expected.nearest_lines(11.0, 11.0, 3)
+    assert list(index.geometry.mrids[lines]) == list(
+        expected.geometry.mrids[expected_lines]
+    )
+    np.testing.assert_allclose(nearest_distances, expected_distances)
+    # Asking for more lines than there are ends when the whole index is covered
+    assert len(index.nearest_lines(11.0, 11.0, 1000)[0]) == 50
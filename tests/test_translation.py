@@ -0,0 +1,54 @@
+from app.translation import LineNameTranslator
+
+LINE_NAME_REGEX = r"^(?P<STN1>\w{3,4}?)_?(?P<volt>\d{3})_(?P<STN2>\w{3,4}?)(?P<id>\d)?$"
+
+
+def test_translation_of_names():
+
+    translator = LineNameTranslator(LINE_NAME_REGEX)
+
+    assert translator.translate(
+        ["ASK_400_ERS", "EEE_150_FFF1", "III_400_ÆØÅ", "Not a line", "EEE150_FFF2"]
+    ) == (
+        {
+            "ASK_400_ERS": "C_ASK-ERS",
+            "EEE_150_FFF1": "E_EEE-FFF_1",
+            "III_400_ÆØÅ": "C_III-ÆØÅ",
+            "EEE150_FFF2": "E_EEE-FFF_2",
+        },
+        ["Not a line"],
+    )
+
+
+def test_translation_reuses_memoized_names(monkeypatch):
+
+    translator = LineNameTranslator(LINE_NAME_REGEX)
+    translator.translate(["ASK_400_ERS", "Not a line"])
+
+    # Names already translated must not be extracted again
+    translated_names = []
+    original = translator._translate_new_names
+    monkeypatch.setattr(
+        translator,
+        "_translate_new_names",
+        lambda names: translated_names.extend(names) or original(names),
+    )
+
+    assert translator.translate(["Not a line", "ASK_400_ERS", "CCC_220_DDD"]) == (
+        {"ASK_400_ERS": "C_ASK-ERS", "CCC_220_DDD": "D_CCC-DDD"},
+        ["Not a line"],
+    )
+    assert translated_names == ["CCC_220_DDD"]
+
+
+def test_translation_matches_from_start_of_name():
+
+    # Like 're.match' the regex must match from the start of the name, also without '^'
+    translator = LineNameTranslator(
+        r"(?P<STN1>[A-Z]{3})_(?P<volt>\d{3})_(?P<STN2>[A-Z]{3})(?P<id>\d)?"
+    )
+
+    assert translator.translate(["ASK_400_ERS", "xASK_400_ERS"]) == (
+        {"ASK_400_ERS": "C_ASK-ERS"},
+        ["xASK_400_ERS"],
+    )
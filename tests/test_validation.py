@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from app.geometry import build_line_geometry
+from app.validation import ValidationLimits, validate_gis_data
+
+ACLINESEGMENT = pd.DataFrame(
+    {
+        "ACLINESEGMENT_MRID": ["m1", "m2", "m3", "m4", "m5"],
+        "LINE_EMSNAME": [
+            "E_AAA-BBB",
+            "D_CCC-DDD",
+            "C_EEE-FFF",
+            "B_GGG-HHH",
+            "E_III-JJJ",
+        ],
+        "DLR_ENABLED": ["YES", "YES", "YES", "NO", "NO"],
+    }
+)
+MAPPING = {"AAA_150_BBB": "E_AAA-BBB", "CCC_220_DDD": "D_CCC-DDD"}
+
+# Line "m1" has a duplicate OBJECTID, a point out of order and a point far outside the bounding box, and
+# line "m2" has a single point
+ENRICHED = pd.DataFrame(
+    {
+        "ACLINESEGMENT_MRID": ["m1", "m1", "m1", "m1", "m2"],
+        "LINE_EMSNAME": ["E_AAA-BBB"] * 4 + ["D_CCC-DDD"],
+        "OBJECTID": [1, 3, 2, 3, 7],
+        "Long_DD": [10.0, 10.01, 10.005, 20.0, 11.0],
+        "Lat_DD": [56.0, 56.0, 56.0, 56.0, 55.0],
+    }
+)
+
+
+def validate(
+    limits: ValidationLimits = ValidationLimits(), enriched: pd.DataFrame = ENRICHED
+) -> pd.DataFrame:
+    geometry = build_line_geometry(
+        enriched, "ACLINESEGMENT_MRID", "OBJECTID", ["Long_DD", "Lat_DD"]
+    )
+    return validate_gis_data(
+        ACLINESEGMENT,
+        MAPPING,
+        enriched,
+        geometry,
+        limits,
+        "ACLINESEGMENT_MRID",
+        "LINE_EMSNAME",
+        "DLR_ENABLED",
+        "OBJECTID",
+    )
+
+
+def test_validate_gis_data():
+
+    report = validate()
+
+    assert list(report.columns) == [
+        "CHECK",
+        "SEVERITY",
+        "ACLINESEGMENT_MRID",
+        "LINE_EMSNAME",
+        "OBJECTID",
+        "VALUE",
+    ]
+    findings = report.set_index("CHECK")
+    # Lines below C level and lines in the GIS data are not reported as missing
+    assert list(findings.loc["LINE_NOT_IN_GIS", "ACLINESEGMENT_MRID"]) == ["m3", "m5"]
+    assert list(findings.loc["DLR_LINE_WITHOUT_GEOMETRY", "LINE_EMSNAME"]) == [
+        "D_CCC-DDD",
+        "C_EEE-FFF",
+    ]
+    assert list(findings.loc["DLR_LINE_WITHOUT_GEOMETRY", "VALUE"]) == [1, 0]
+    assert findings.loc["DUPLICATE_OBJECTID", "OBJECTID"] == 3
+    assert findings.loc["DUPLICATE_OBJECTID", "VALUE"] == 2
+    assert findings.loc["OBJECTID_OUT_OF_ORDER", "OBJECTID"] == 2
+    assert findings.loc["OUTSIDE_BBOX", "OBJECTID"] == 3
+    assert findings.loc["LONG_SPAN", "LINE_EMSNAME"] == "E_AAA-BBB"
+    assert findings.loc["LONG_SPAN", "VALUE"] > 600000
+    assert list(report["SEVERITY"].unique()) == ["INFO", "ERROR", "WARNING"]
+
+
+def test_validate_gis_data_with_limits():
+
+    report = validate(ValidationLimits(bbox=(0, 0, 90, 90), max_span_length=np.inf))
+
+    assert not report["CHECK"].isin(["OUTSIDE_BBOX", "LONG_SPAN"]).any()
+    assert report["OBJECTID"].dtype == "Int64"
+
+
+def test_validate_gis_data_with_missing_mrid():
+
+    enriched = pd.concat(
+        [
+            ENRICHED,
+            pd.DataFrame(
+                {
+                    "ACLINESEGMENT_MRID": [None],
+                    "LINE_EMSNAME": ["E_AAA-BBB"],
+                    "OBJECTID": [0],
+                    "Long_DD": [10.0],
+                    "Lat_DD": [56.0],
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+
+    report = validate(enriched=enriched)
+    findings = report.set_index("CHECK")
+
+    assert findings.loc["MISSING_MRID", "OBJECTID"] == 0
+    assert findings.loc["MISSING_MRID", "LINE_EMSNAME"] == "E_AAA-BBB"
+    assert findings.loc["MISSING_MRID", "SEVERITY"] == "ERROR"
+    # The other findings are as without the point
+    pd.testing.assert_frame_equal(
+        report[report["CHECK"] != "MISSING_MRID"].reset_index(drop=True), validate()
+    )
@@ -0,0 +1,93 @@
+import threading
+from time import monotonic, sleep
+from app.watcher import InputWatcher
+
+
+def write_file_slowly(file_path, delay):
+    # Simulating a copy of a file that takes a while to complete
+    sleep(delay)
+    with open(file_path, "w") as file:
+        file.write("part one,")
+        file.flush()
+        sleep(delay)
+        file.write("part two")
+
+
+def test_watcher_reports_completely_written_file(tmp_path):
+
+    file_path = str(tmp_path / "input.csv")
+    watcher = InputWatcher([file_path], poll_interval=10, debounce=0.2)
+    assert watcher.uses_inotify
+
+    writer = threading.Thread(target=write_file_slowly, args=(file_path, 0.3))
+    start_time = monotonic()
+    writer.start()
+    changed = watcher.wait()
+    writer.join()
+    watcher.close()
+
+    assert changed == {file_path}
+    # The file is reported after the write was completed and within a second
+    assert 0.6 <= monotonic() - start_time < 1.6
+
+
+def test_watcher_waits_for_all_files_being_written(tmp_path):
+
+    first_path = str(tmp_path / "first.csv")
+    second_path = str(tmp_path / "second.csv")
+    watcher = InputWatcher([first_path, second_path], poll_interval=10, debounce=0.3)
+
+    def write_files():
+        # The first file is complete, while the second is written again within the debounce time until
+        # well after the first file has been quiet for the debounce time
+        with open(first_path, "w") as file:
+            file.write("complete")
+        with open(second_path, "w") as file:
+            for part in range(4):
+                sleep(0.2)
+                file.write(f"part {part},")
+                file.flush()
+
+    writer = threading.Thread(target=write_files)
+    start_time = monotonic()
+    writer.start()
+    changed = watcher.wait()
+    writer.join()
+
+    assert changed == {first_path, second_path}
+    assert monotonic() - start_time >= 1.1
+
+    # A file completed while another file is still written when the poll interval passes is reported by
+    # the next call
+    watcher.poll_interval = 0.2
+    with open(first_path, "w") as file:
+        file.write("complete")
+    with open(second_path, "w") as file:
+        file.write("part one,")
+        file.flush()
+        assert watcher.wait() == set()
+    watcher.poll_interval = 10
+    assert watcher.wait() == {first_path, second_path}
+    watcher.close()
+
+
+def test_watcher_ignores_other_files_and_returns_after_poll_interval(tmp_path):
+
+    watcher = InputWatcher([str(tmp_path / "input.csv")], poll_interval=0.5)
+    (tmp_path / "other.csv").write_text("data")
+    # A file name that is not UTF-8
+    with open(bytes(tmp_path) + b"/other-\xe6.csv", "w") as file:
+        file.write("data")
+
+    assert watcher.wait() == set()
+    watcher.close()
+
+
+def test_watcher_in_poll_mode(tmp_path):
+
+    watcher = InputWatcher(
+        [str(tmp_path / "input.csv")], poll_interval=0.1, mode="POLL"
+    )
+
+    assert not watcher.uses_inotify
+    assert watcher.wait() == set()
@@ -0,0 +1,105 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from app.geometry import build_line_geometry
+from app.weather_grid import WeatherGrid, assign_spans_to_cells, load_weather_grid
+
+COORDINATE_COLUMNS = ["Long_DD", "Lat_DD"]
+GRID = WeatherGrid(
+    origin_x=0.0, origin_y=0.0, resolution_x=1.0, resolution_y=1.0, columns=4, rows=4
+)
+
+
+def build_geometry(dataframe: pd.DataFrame):
+    return build_line_geometry(
+        dataframe, "ACLINESEGMENT_MRID", "OBJECTID", COORDINATE_COLUMNS
+    )
+
+
+def test_assign_spans_to_cells():
+
+    # Line "A" crosses two cells, "B" crosses the corner of a cell and "C" leaves the grid
+    geometry = build_geometry(
+        pd.DataFrame(
+            {
+                "ACLINESEGMENT_MRID": ["A", "A", "B", "B", "C", "C", "C"],
+                "OBJECTID": [1, 2, 1, 2, 1, 2, 3],
+                "Long_DD": [0.5, 2.5, 0.5, 1.5, 2.5, 3.5, 4.5],
+                "Lat_DD": [0.5, 0.5, 0.5, 1.5, 3.5, 3.5, 3.5],
+            }
+        )
+    )
+
+    cells = assign_spans_to_cells(geometry, GRID, "ACLINESEGMENT_MRID")
+
+    assert list(cells["ACLINESEGMENT_MRID"]) == ["A", "A", "A", "B", "B", "C", "C", "C"]
+    assert list(cells["SPAN"]) == [0, 0, 0, 0, 0, 0, 0, 1]
+    assert list(cells["CELL_ROW"]) == [0, 0, 0, 0, 1, 3, 3, 3]
+    assert list(cells["CELL_COLUMN"]) == [0, 1, 2, 0, 1, 2, 3, 3]
+    np.testing.assert_allclose(
+        cells["LENGTH_M"],
+        geometry.span_length[[0, 0, 0, 1, 1, 2, 2, 3]]
+        * [0.25, 0.5, 0.25, 0.5, 0.5, 0.5, 0.5, 0.5],
+    )
+
+
+def test_assign_spans_to_cells_keeps_span_lengths():
+
+    rng = np.random.default_rng(1)
+    points = 1000
+    geometry = build_geometry(
+        pd.DataFrame(
+            {
+                "ACLINESEGMENT_MRID": np.repeat(np.arange(10), points // 10),
+                "OBJECTID": np.arange(points),
+                "Long_DD": rng.uniform(0.01, 3.99, points),
+                "Lat_DD": rng.uniform(0.01, 3.99, points),
+            }
+        )
+    )
+
+    cells = assign_spans_to_cells(
+        geometry, WeatherGrid(0.0, 0.0, 0.3, 0.2, 14, 20), "ACLINESEGMENT_MRID"
+    )
+    span_length = cells.groupby(["ACLINESEGMENT_MRID", "SPAN"])["LENGTH_M"].sum()
+
+    np.testing.assert_allclose(span_length.to_numpy(), geometry.span_length)
+    assert not cells.duplicated(
+        ["ACLINESEGMENT_MRID", "SPAN", "CELL_ROW", "CELL_COLUMN"]
+    ).any()
+
+
+def test_load_weather_grid(tmp_path):
+
+    grid_path = tmp_path / "grid.json"
+    grid_path.write_text(
+        json.dumps({"origin": [8.0, 54.5], "resolution": 0.1, "extent": [15.25, 57.8]})
+    )
+
+    grid = load_weather_grid(str(grid_path))
+
+    assert (grid.origin_x, grid.origin_y) == (8.0, 54.5)
+    assert (grid.resolution_x, grid.resolution_y) == (0.1, 0.1)
+    # The partial column at the east edge is a whole column
+    assert (grid.columns, grid.rows) == (73, 33)
+    assert grid.crs == "EPSG:4326"
+
+
+@pytest.mark.parametrize(
+    "definition",
+    [
+        {"origin": [0, 0], "resolution": 1},
+        {"origin": [0, 0], "resolution": 0, "extent": [1, 1]},
+        {"origin": [0, 0], "resolution": 1, "extent": [-1, 1]},
+        {"origin": [0], "resolution": 1, "extent": [1, 1]},
+        {"origin": [0, 0], "resolution": 1, "extent": [1, 1], "crs": "EPSG:3857"},
+    ],
+)
+def test_invalid_weather_grid(tmp_path, definition):
+
+    grid_path = tmp_path / "grid.json"
+    grid_path.write_text(json.dumps(definition))
+
+    with pytest.raises(ValueError):
+        load_weather_grid(str(grid_path))